@@ -0,0 +1,205 @@
+# Aquecimento do cache de respostas antes de o servidor ficar pronto
+#
+# O espaço de entradas dos controles é finito: as opções de cada dropdown e
+# radio estão no próprio layout. Depois da carga dos dados, todas as
+# combinações que cada gráfico usa (variável x sexo x regra dos bins) e as
+# da tabela (diagnóstico x registros por página, primeira página sem
+# ordenação) são calculadas em paralelo e gravadas no cache de figuras, para
+# que o primeiro usuário de cada combinação não pague a montagem da figura.
+#
+# As combinações mais prováveis (valores iniciais dos controles) vêm
+# primeiro; o que não couber no orçamento de tempo
+# (config.AQUECIMENTO_ORCAMENTO) fica para ser calculado sob demanda.
+#
+# Com mais de um processo (config.AQUECIMENTO_PROCESSOS) o trabalho roda em
+# processos filhos criados por fork, que herdam o snapshot e as estruturas
+# derivadas; as respostas serializadas voltam ao processo principal e são
+# gravadas no cache. Com um processo, roda em threads.
+#
+#   python aquecimento.py      # aquece e mostra os tempos (sem servidor)
+
+import itertools
+import multiprocessing
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+import config
+import filtros
+import graficos
+import modo_cliente
+import tabela
+from cache_figuras import cache, serializar, serializar_saidas
+
+# Controles da tabela aquecidos (além das entradas dos gráficos)
+ENTRADAS_TABELA = ('filtro-diagnostico', 'num-registros')
+
+# Snapshot aquecido, herdado pelos processos filhos no fork
+_snap = None
+
+
+def _componentes(arvore):
+    """Todos os componentes de uma árvore do layout"""
+    pilha = [arvore]
+    while pilha:
+        componente = pilha.pop()
+        if isinstance(componente, (list, tuple)):
+            pilha.extend(componente)
+            continue
+        if componente is None or isinstance(componente, (str, int, float)):
+            continue
+        yield componente
+        pilha.append(getattr(componente, 'children', None))
+
+
+def espaco_entradas(arvore, ids):
+    """
+    Valores possíveis de cada controle em `ids`, a partir das opções no
+    layout, com o valor inicial primeiro: {id: [valores]}
+    """
+    espaco = {}
+    for componente in _componentes(arvore):
+        id_componente = getattr(componente, 'id', None)
+        if id_componente not in ids:
+            continue
+        valores = [
+            opcao['value'] if isinstance(opcao, dict) else opcao
+            for opcao in getattr(componente, 'options', None) or ()
+        ]
+        inicial = getattr(componente, 'value', None)
+        if inicial in valores:
+            valores.remove(inicial)
+            valores.insert(0, inicial)
+        espaco[id_componente] = valores
+    return espaco
+
+
+def tarefas(arvore, modo_graficos):
+    """
+    Lista de (tipo, nome, argumentos) a calcular, das combinações mais
+    prováveis para as menos prováveis
+    """
+    espaco = espaco_entradas(arvore, set(graficos.ENTRADAS) | set(ENTRADAS_TABELA))
+    por_parametro = {graficos.ENTRADAS[i]: v for i, v in espaco.items() if i in graficos.ENTRADAS}
+
+    lista = []
+    if modo_graficos == modo_cliente.MODO_SERVIDOR:
+        # Cada gráfico só varia com as próprias entradas: sem combinações repetidas
+        for grafico in graficos.graficos():
+            opcoes = [list(enumerate(por_parametro.get(nome, [None]))) for nome in grafico.entradas]
+            for combinacao in itertools.product(*opcoes):
+                prioridade = sum(posicao for posicao, _ in combinacao)
+                argumentos = {nome: valor for nome, (_, valor) in zip(grafico.entradas, combinacao)}
+                lista.append((prioridade, 'grafico', grafico.id, argumentos))
+
+    diagnosticos = list(enumerate(espaco.get('filtro-diagnostico', [filtros.TODOS])))
+    tamanhos = list(enumerate(espaco.get('num-registros', [25])))
+    for (i, diagnostico), (j, tamanho) in itertools.product(diagnosticos, tamanhos):
+        # Mesma chave que update_tabela monta para o estado inicial da DataTable
+        lista.append((i + j, 'tabela', 'pagina-tabela', tabela.argumentos_consulta(diagnostico, tamanho)))
+
+    lista.sort(key=lambda tarefa: tarefa[0])
+    return [tarefa[1:] for tarefa in lista]
+
+
+def _entradas_cache(tipo, argumentos):
+    return graficos.entradas_cache(argumentos) if tipo == 'grafico' else repr(argumentos)
+
+
+def _calcular(tarefa, snap=None):
+    """Resposta serializada de uma tarefa (roda no pool)"""
+    import callbacks
+
+    snap = snap or _snap
+    tipo, nome, argumentos = tarefa
+    if tipo == 'grafico':
+        grafico = next(g for g in graficos.graficos() if g.id == nome)
+        contexto = graficos.Contexto(snap, argumentos.get('sexo_filtro', filtros.TODOS))
+        return serializar(graficos.construir(grafico, contexto, argumentos))
+    return serializar_saidas(callbacks.pagina_tabela(snap, *argumentos))
+
+
+def _executor(processos):
+    """Pool de processos (fork) ou, com um processo só, de threads"""
+    if processos > 1 and 'fork' in multiprocessing.get_all_start_methods():
+        return ProcessPoolExecutor(processos, mp_context=multiprocessing.get_context('fork'))
+    return ThreadPoolExecutor(max(processos, 1), thread_name_prefix='aquecimento')
+
+
+def aquecer(snap, arvore=None, orcamento=None, processos=None, log=print):
+    """
+    Calcula e grava no cache as respostas do espaço de entradas do layout.
+    Devolve {'tarefas', 'calculadas', 'em_cache', 'segundos'}.
+    """
+    global _snap
+    import layout
+
+    orcamento = config.AQUECIMENTO_ORCAMENTO if orcamento is None else orcamento
+    processos = config.AQUECIMENTO_PROCESSOS if processos is None else processos
+    inicio = time.perf_counter()
+
+    modo_graficos = modo_cliente.modo(snap)
+    if arvore is None:
+        arvore = layout.criar_layout(modo_graficos)()
+    lista = tarefas(arvore, modo_graficos)
+    resultado = {'tarefas': len(lista), 'calculadas': 0, 'em_cache': 0, 'segundos': 0.0}
+    if not cache.ativo:
+        log("⚠️ Cache de figuras desligado; aquecimento ignorado")
+        return resultado
+
+    pendentes = []
+    for tipo, nome, argumentos in lista:
+        if cache.contem(nome, _entradas_cache(tipo, argumentos), snap.versao):
+            resultado['em_cache'] += 1
+        else:
+            pendentes.append((tipo, nome, argumentos))
+
+    _snap = snap
+    executor = _executor(processos)
+    # Threads recebem o snapshot; processos o herdam no fork
+    extra = (snap,) if isinstance(executor, ThreadPoolExecutor) else ()
+    try:
+        futuros = {executor.submit(_calcular, tarefa, *extra): tarefa for tarefa in pendentes}
+        restantes = set(futuros)
+        proximo_log = inicio + 5
+        while restantes:
+            tempo_restante = orcamento - (time.perf_counter() - inicio)
+            if tempo_restante <= 0:
+                break
+            prontos, restantes = wait(restantes, timeout=tempo_restante, return_when=FIRST_COMPLETED)
+            for futuro in prontos:
+                tipo, nome, argumentos = futuros[futuro]
+                try:
+                    valor = futuro.result()
+                except Exception as e:
+                    log(f"⚠️ Falha ao aquecer {nome} {argumentos}: {e}")
+                    continue
+                cache.gravar(nome, _entradas_cache(tipo, argumentos), valor, snap.versao)
+                resultado['calculadas'] += 1
+            if time.perf_counter() >= proximo_log:
+                proximo_log += 5
+                log(f"🔥 Aquecimento: {resultado['calculadas']}/{len(pendentes)} respostas")
+    finally:
+        # Tarefas não iniciadas são canceladas; as em andamento são descartadas
+        executor.shutdown(wait=False, cancel_futures=True)
+        _snap = None
+
+    resultado['segundos'] = round(time.perf_counter() - inicio, 2)
+    faltando = len(pendentes) - resultado['calculadas']
+    log(f"🔥 Aquecimento: {resultado['calculadas']} respostas calculadas, "
+        f"{resultado['em_cache']} já em cache em {resultado['segundos']:.1f}s"
+        + (f" ({faltando} fora do orçamento de {orcamento:.0f}s)" if faltando else ""))
+    return resultado
+
+
+def main(argv=None):
+    import snapshot
+    import servidor
+
+    snap = servidor.preparar(snapshot.atual())
+    resultado = aquecer(snap)
+    return 0 if resultado['calculadas'] + resultado['em_cache'] == resultado['tarefas'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,464 @@
+// Callback clientside dos gráficos (veja modo_cliente.py)
+//
+// Recebe as colunas do dataset já no navegador (dcc.Store 'dados-cliente',
+// arrays tipados em base64) e reproduz os mesmos gráficos do servidor:
+// histograma com bins fixos/Freedman–Diaconis/quantis, pizza por sexo,
+// dispersão idade x frequência cardíaca e barras por tipo de dor. A matriz
+// de correlação vem pronta do servidor (uma por método e filtro de sexo).
+
+(function () {
+    var TIPOS = {
+        f4: Float32Array,
+        f8: Float64Array,
+        i1: Int8Array,
+        u1: Uint8Array,
+        i2: Int16Array,
+        i4: Int32Array
+    };
+
+    // Colunas decodificadas por versão do snapshot (decodifica uma vez só)
+    var cacheColunas = {versao: null, colunas: null};
+
+    function decodificar(coluna) {
+        var binario = atob(coluna.bdata);
+        var bytes = new Uint8Array(binario.length);
+        for (var i = 0; i < binario.length; i++) {
+            bytes[i] = binario.charCodeAt(i);
+        }
+        return new TIPOS[coluna.dtype](bytes.buffer);
+    }
+
+    function colunas(dados) {
+        if (cacheColunas.versao !== dados.versao) {
+            var decodificadas = {};
+            Object.keys(dados.colunas).forEach(function (nome) {
+                decodificadas[nome] = decodificar(dados.colunas[nome]);
+            });
+            cacheColunas = {versao: dados.versao, colunas: decodificadas};
+        }
+        return cacheColunas.colunas;
+    }
+
+    function posicoes(cols, n, sexo) {
+        var resultado = [];
+        for (var i = 0; i < n; i++) {
+            if (sexo === 'all' || cols.sex[i] === Number(sexo)) {
+                resultado.push(i);
+            }
+        }
+        return resultado;
+    }
+
+    function figuraVazia(dados, titulo) {
+        return {
+            data: [],
+            layout: {template: dados.template, title: {text: titulo}}
+        };
+    }
+
+    // --- Histograma (mesmas regras de histograma.py) ---
+
+    function quantil(ordenados, q) {
+        // Interpolação linear, como np.quantile
+        var pos = (ordenados.length - 1) * q;
+        var base = Math.floor(pos);
+        var resto = pos - base;
+        if (base + 1 < ordenados.length) {
+            return ordenados[base] + resto * (ordenados[base + 1] - ordenados[base]);
+        }
+        return ordenados[base];
+    }
+
+    function linspace(inicio, fim, n) {
+        var bordas = [];
+        for (var i = 0; i < n; i++) {
+            bordas.push(inicio + (fim - inicio) * i / (n - 1));
+        }
+        return bordas;
+    }
+
+    function calcularBordas(ordenados, regra, nbins, maxBins) {
+        var minimo = ordenados[0];
+        var maximo = ordenados[ordenados.length - 1];
+        if (minimo === maximo) {
+            return [minimo - 0.5, maximo + 0.5];
+        }
+        if (regra === 'quantis') {
+            var bordas = [];
+            for (var i = 0; i <= nbins; i++) {
+                var q = quantil(ordenados, i / nbins);
+                if (bordas.length === 0 || q !== bordas[bordas.length - 1]) {
+                    bordas.push(q);
+                }
+            }
+            if (bordas.length >= 2) {
+                return bordas;
+            }
+        } else if (regra === 'freedman-diaconis') {
+            var iqr = quantil(ordenados, 0.75) - quantil(ordenados, 0.25);
+            var largura = 2 * iqr * Math.pow(ordenados.length, -1 / 3);
+            if (largura > 0) {
+                nbins = Math.min(maxBins, Math.max(1, Math.ceil((maximo - minimo) / largura)));
+            }
+        }
+        return linspace(minimo, maximo, nbins + 1);
+    }
+
+    function bin(bordas, valor) {
+        // Bins semiabertos [a, b), exceto o último, fechado (como np.histogram)
+        var ultimo = bordas.length - 2;
+        if (valor < bordas[0] || valor > bordas[ultimo + 1]) {
+            return -1;
+        }
+        if (valor === bordas[ultimo + 1]) {
+            return ultimo;
+        }
+        var lo = 0;
+        var hi = ultimo;
+        while (lo < hi) {
+            var meio = (lo + hi + 1) >> 1;
+            if (bordas[meio] <= valor) {
+                lo = meio;
+            } else {
+                hi = meio - 1;
+            }
+        }
+        return lo;
+    }
+
+    function figuraDistribuicao(dados, cols, pos, variavel, regra) {
+        var valoresCol = cols[variavel];
+        if (!valoresCol) {
+            return figuraVazia(dados, 'Variável ' + variavel + ' não encontrada no dataset');
+        }
+        var valores = [];
+        var classes = [];
+        pos.forEach(function (i) {
+            var v = valoresCol[i];
+            if (!isNaN(v) && cols.has_disease[i] >= 0) {
+                valores.push(v);
+                classes.push(cols.has_disease[i]);
+            }
+        });
+        if (valores.length === 0) {
+            return figuraVazia(dados, 'Nenhum dado válido disponível após limpeza');
+        }
+
+        var ordenados = Float64Array.from(valores).sort();
+        var bordas = calcularBordas(ordenados, regra || 'fixa', dados.nbins, dados.max_bins);
+        var nb = bordas.length - 1;
+        var contagens = {0: new Array(nb).fill(0), 1: new Array(nb).fill(0)};
+        for (var k = 0; k < valores.length; k++) {
+            var b = bin(bordas, valores[k]);
+            if (b >= 0 && contagens[classes[k]]) {
+                contagens[classes[k]][b] += 1;
+            }
+        }
+
+        var centros = [];
+        var larguras = [];
+        var intervalos = [];
+        for (var j = 0; j < nb; j++) {
+            centros.push((bordas[j] + bordas[j + 1]) / 2);
+            larguras.push(bordas[j + 1] - bordas[j]);
+            intervalos.push([bordas[j], bordas[j + 1]]);
+        }
+        var label = dados.labels[variavel] || variavel;
+
+        // Média e desvio padrão (Welford), como no subtítulo do servidor
+        var media = 0, m2 = 0;
+        for (var w = 0; w < valores.length; w++) {
+            var delta = valores[w] - media;
+            media += delta / (w + 1);
+            m2 += delta * (valores[w] - media);
+        }
+        var desvio = valores.length > 1 ? Math.sqrt(m2 / (valores.length - 1)) : NaN;
+        var subtitulo = 'Média ' + media.toFixed(1) + ' · DP ' + desvio.toFixed(1) +
+            ' · ' + valores.length + ' pacientes';
+
+        return {
+            data: [0, 1].map(function (classe) {
+                return {
+                    type: 'bar',
+                    x: centros,
+                    y: contagens[classe],
+                    width: larguras,
+                    name: String(classe),
+                    marker: {color: dados.cores[classe]},
+                    customdata: intervalos,
+                    hovertemplate: '%{customdata[0]:.4g} – %{customdata[1]:.4g}<br>Frequência: %{y}'
+                };
+            }),
+            layout: {
+                template: dados.template,
+                title: {text: 'Distribuição de ' + label + '<br><sup>' + subtitulo + '</sup>', font: {size: 16}},
+                xaxis: {title: {text: label, font: {size: 14}}},
+                yaxis: {title: {text: 'Frequência', font: {size: 14}}},
+                legend: {title: {text: 'Doença Cardíaca', font: {size: 12}}},
+                barmode: 'stack',
+                bargap: 0
+            }
+        };
+    }
+
+    // --- Contagens categóricas ---
+
+    function figuraSexo(dados, cols, pos) {
+        var contagens = {};
+        pos.forEach(function (i) {
+            var s = cols.sex[i];
+            if (s >= 0) {
+                contagens[s] = (contagens[s] || 0) + 1;
+            }
+        });
+        var labels = [];
+        var valores = [];
+        Object.keys(dados.sexo).forEach(function (codigo) {
+            if (contagens[codigo]) {
+                labels.push(dados.sexo[codigo]);
+                valores.push(contagens[codigo]);
+            }
+        });
+        if (valores.length === 0) {
+            return figuraVazia(dados, 'Nenhum dado disponível');
+        }
+        return {
+            data: [{
+                type: 'pie',
+                labels: labels,
+                values: valores,
+                hovertemplate: 'sex_label=%{label}<br>count=%{value}<extra></extra>'
+            }],
+            layout: {
+                template: dados.template,
+                title: {text: 'Distribuição por Sexo', font: {size: 16}},
+                piecolorway: ['#e74c3c', '#3498db'],
+                legend: {tracegroupgap: 0}
+            }
+        };
+    }
+
+    function eixoCor(titulo) {
+        return {colorbar: {title: {text: titulo}}};
+    }
+
+    // Modo de renderização pelo número de pontos (mesmos limites de dispersao.py)
+    function modoDispersao(dados, pontos) {
+        if (pontos > dados.dispersao.limite_densidade) {
+            return 'densidade';
+        }
+        return pontos > dados.dispersao.limite_webgl ? 'webgl' : 'svg';
+    }
+
+    function tracosDensidade(dados, x, y, cor) {
+        var nbins = dados.dispersao.nbins;
+        var tracos = [{
+            type: 'histogram2d',
+            x: x,
+            y: y,
+            nbinsx: nbins,
+            nbinsy: nbins,
+            colorscale: 'Greys',
+            zmin: 1,
+            colorbar: {title: {text: 'Pacientes'}},
+            name: 'Total'
+        }];
+        [0, 1].forEach(function (classe) {
+            var cx = [], cy = [];
+            for (var k = 0; k < cor.length; k++) {
+                if (cor[k] === classe) {
+                    cx.push(x[k]);
+                    cy.push(y[k]);
+                }
+            }
+            var c = dados.cores[String(classe)];
+            tracos.push({
+                type: 'histogram2dcontour',
+                x: cx,
+                y: cy,
+                nbinsx: nbins,
+                nbinsy: nbins,
+                contours: {coloring: 'lines'},
+                colorscale: [[0, c], [1, c]],
+                line: {width: 1.5},
+                ncontours: 8,
+                showscale: false,
+                showlegend: true,
+                name: 'Doença Cardíaca = ' + classe,
+                hoverinfo: 'skip'
+            });
+        });
+        return tracos;
+    }
+
+    function figuraCorrelacao(dados, cols, pos) {
+        if (pos.length === 0) {
+            return figuraVazia(dados, 'Dados de correlação não disponíveis');
+        }
+        var x = new Float32Array(pos.length);
+        var y = new Float32Array(pos.length);
+        var cor = new Int8Array(pos.length);
+        pos.forEach(function (i, k) {
+            x[k] = cols.age[i];
+            y[k] = cols.thalach[i];
+            cor[k] = cols.has_disease[i];
+        });
+        var modo = modoDispersao(dados, pos.length);
+        var titulo = 'Idade vs Frequência Cardíaca Máxima<br><sup>Modo ' +
+            dados.dispersao.nomes[modo] + ' · ' + pos.length + ' pontos</sup>';
+        var tracos = modo === 'densidade' ? tracosDensidade(dados, x, y, cor) : [{
+            type: modo === 'webgl' ? 'scattergl' : 'scatter',
+            mode: 'markers',
+            x: Array.from(x),
+            y: Array.from(y),
+            marker: {color: Array.from(cor), coloraxis: 'coloraxis', symbol: 'circle'},
+            hovertemplate: 'Idade (anos)=%{x}<br>Freq. Cardíaca Máxima (bpm)=%{y}<br>' +
+                'Doença Cardíaca=%{marker.color}<extra></extra>',
+            showlegend: false
+        }];
+        return {
+            data: tracos,
+            layout: {
+                template: dados.template,
+                title: {text: titulo, font: {size: 16}},
+                xaxis: {title: {text: 'Idade (anos)', font: {size: 14}}},
+                yaxis: {title: {text: 'Freq. Cardíaca Máxima (bpm)', font: {size: 14}}},
+                coloraxis: eixoCor('Doença Cardíaca'),
+                legend: {tracegroupgap: 0}
+            }
+        };
+    }
+
+    function figuraTipoDor(dados, cols, pos) {
+        if (pos.length === 0) {
+            return figuraVazia(dados, 'Nenhum dado disponível');
+        }
+        var contagens = {};
+        pos.forEach(function (i) {
+            var cp = cols.cp[i];
+            var hd = cols.has_disease[i];
+            if (cp >= 0 && hd >= 0) {
+                var chave = cp + '|' + hd;
+                contagens[chave] = (contagens[chave] || 0) + 1;
+            }
+        });
+        var x = [];
+        var y = [];
+        var cor = [];
+        Object.keys(dados.dor).forEach(function (cp) {
+            [0, 1].forEach(function (hd) {
+                var n = contagens[cp + '|' + hd];
+                if (n) {
+                    x.push(dados.dor[cp]);
+                    y.push(n);
+                    cor.push(hd);
+                }
+            });
+        });
+        return {
+            data: [{
+                type: 'bar',
+                x: x,
+                y: y,
+                marker: {color: cor, coloraxis: 'coloraxis'},
+                hovertemplate: 'Tipo de Dor=%{x}<br>Quantidade=%{y}<br>' +
+                    'Doença Cardíaca=%{marker.color}<extra></extra>',
+                showlegend: false
+            }],
+            layout: {
+                template: dados.template,
+                title: {text: 'Tipos de Dor no Peito', font: {size: 16}},
+                xaxis: {title: {text: 'Tipo de Dor', font: {size: 14}}, tickangle: -45},
+                yaxis: {title: {text: 'Quantidade', font: {size: 14}}},
+                coloraxis: eixoCor('Doença Cardíaca'),
+                barmode: 'relative',
+                legend: {tracegroupgap: 0}
+            }
+        };
+    }
+
+    // --- Matriz de correlação (mesma figura de graficos/matriz_correlacao.py) ---
+
+    function figuraMatrizCorrelacao(dados, sexo, metodo) {
+        var porMetodo = dados.correlacoes[metodo || 'pearson'];
+        var matriz = porMetodo && porMetodo.sexo[String(sexo)];
+        if (!matriz || matriz.linhas === 0) {
+            return figuraVazia(dados, 'Nenhum dado disponível');
+        }
+        var origem = matriz.completo ? 'dataset completo' : matriz.linhas + ' pacientes';
+        return {
+            data: [{
+                type: 'heatmap',
+                x: matriz.rotulos,
+                y: matriz.rotulos,
+                z: matriz.valores,
+                zmin: -1,
+                zmax: 1,
+                colorscale: 'RdBu',
+                reversescale: true,
+                texttemplate: '%{z:.2f}',
+                textfont: {size: 9},
+                colorbar: {title: {text: 'r'}},
+                hovertemplate: '%{y} x %{x}<br>r = %{z:.2f}<extra></extra>'
+            }],
+            layout: {
+                template: dados.template,
+                title: {
+                    text: 'Matriz de Correlação (' + porMetodo.nome + ')<br><sup>' + origem + '</sup>',
+                    font: {size: 16}
+                },
+                yaxis: {autorange: 'reversed'},
+                height: 600
+            }
+        };
+    }
+
+    // Entradas usadas por cada gráfico (na ordem dos Outputs)
+    var DEPENDENCIAS = [
+        ['variavel-dropdown', 'sexo-radio', 'regra-bins-radio'],
+        ['sexo-radio'],
+        ['sexo-radio'],
+        ['sexo-radio'],
+        ['sexo-radio', 'metodo-correlacao-radio']
+    ];
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        graficos: {
+            atualizar: function (variavel, sexo, regra, metodo, dados) {
+                var dc = window.dash_clientside;
+                var disparadas = (dc.callback_context.triggered || []).map(function (t) {
+                    return t.prop_id.split('.')[0];
+                });
+                var todas = disparadas.length === 0 || disparadas.indexOf('dados-cliente') >= 0 ||
+                    disparadas.indexOf('') >= 0;
+                var semFiguras = DEPENDENCIAS.map(function () { return dc.no_update; });
+
+                if (!dados) {
+                    // Página sem os dados (snapshot acima do limite do modo
+                    // cliente): os gráficos são pedidos ao servidor
+                    return semFiguras.concat([{
+                        valores: [variavel, sexo, regra, metodo],
+                        disparadas: todas ? null : disparadas
+                    }]);
+                }
+
+                var cols = colunas(dados);
+                var pos = posicoes(cols, dados.linhas, sexo);
+                var construtores = [
+                    function () { return figuraDistribuicao(dados, cols, pos, variavel, regra); },
+                    function () { return figuraSexo(dados, cols, pos); },
+                    function () { return figuraCorrelacao(dados, cols, pos); },
+                    function () { return figuraTipoDor(dados, cols, pos); },
+                    function () { return figuraMatrizCorrelacao(dados, sexo, metodo); }
+                ];
+                var figuras = construtores.map(function (construir, k) {
+                    var depende = DEPENDENCIAS[k].some(function (id) {
+                        return disparadas.indexOf(id) >= 0;
+                    });
+                    return (todas || depende) ? construir() : dc.no_update;
+                });
+                return figuras.concat([dc.no_update]);
+            }
+        }
+    });
+})();
@@ -0,0 +1 @@
+# Scripts de benchmark do dashboard (veja benchmarks/bench_callbacks.py)
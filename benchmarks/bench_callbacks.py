@@ -0,0 +1,336 @@
+# Benchmark dos callbacks do dashboard com dados sintéticos
+#
+# Para cada tamanho de dataset, grava (uma vez) um snapshot sintético em
+# benchmarks/.dados/ (veja sintetico.py) e mede, em um subprocesso
+# separado, o tempo de carga do app e de cada callback chamado
+# diretamente: os construtores registrados no pacote graficos, o callback
+# único dos gráficos, update_tabela e mostrar_detalhes_paciente.
+#
+# Por callback são reportados o tempo da primeira chamada (frio), os
+# percentis p50/p90/p99 das chamadas seguintes, o pico de RSS do processo
+# e o tamanho da resposta serializada: como o app a envia (arrays tipados em
+# base64, veja codificacao.py), com os arrays em JSON de texto (antes) e
+# comprimida com gzip/brotli. O cache de figuras é desligado e os
+# gráficos rodam no servidor, então todas as chamadas recalculam a figura
+# (as estruturas derivadas do snapshot continuam em cache, como no app).
+#
+# Os resultados são gravados em JSON em benchmarks/resultados/, junto com
+# o commit e as versões das bibliotecas, para comparação entre commits:
+#
+#   python -m benchmarks.bench_callbacks                        # 10k, 100k, 1M
+#   python -m benchmarks.bench_callbacks --linhas 10000 5000000
+#   python -m benchmarks.bench_callbacks --comparar base.json novo.json
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+RAIZ_REPO = Path(__file__).resolve().parent.parent
+DIRETORIO_DADOS = Path(__file__).resolve().parent / '.dados'
+DIRETORIO_RESULTADOS = Path(__file__).resolve().parent / 'resultados'
+
+LINHAS_PADRAO = (10_000, 100_000, 1_000_000)
+REPETICOES_PADRAO = 20
+
+# Variação do p50 acima da qual --comparar acusa regressão
+LIMIAR_REGRESSAO = 0.20
+
+# Cenários da tabela: (diagnóstico, registros, página, sort_by, filter_query)
+CENARIOS_TABELA = [
+    ('all', 25, 0, [], ''),
+    (1, 50, 3, [{'column_id': 'chol', 'direction': 'desc'}], ''),
+    ('all', 25, 0, [], '{age} > 60 && {sex_label} = Masculino'),
+    (0, 100, 10, [{'column_id': 'cp_label', 'direction': 'asc'}], '{chol} >= 250'),
+]
+
+
+# --- Medição (executada no subprocesso) ---
+
+def _rss_mb():
+    """Pico de RSS do processo até agora, em MB"""
+    maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss é em KB no Linux e em bytes no macOS
+    return maximo / (1024 * 1024) if sys.platform == 'darwin' else maximo / 1024
+
+
+def _cenarios(snap):
+    """Chamadas de cada callback: nome -> lista de funções sem argumentos"""
+    import callbacks
+    import codificacao
+    import correlacoes
+    import filtros
+    import graficos
+    import histograma
+    from graficos.distribuicao import LABELS
+
+    sexos = [filtros.TODOS, 1, 0]
+    valores_entradas = {
+        'variavel': list(LABELS),
+        'sexo_filtro': sexos,
+        'regra_bins': list(histograma.REGRAS),
+        'metodo_correlacao': list(correlacoes.NOMES_METODOS),
+    }
+
+    cenarios = {}
+    for grafico in graficos.graficos():
+        combinacoes = [{}]
+        for entrada in grafico.entradas:
+            combinacoes = [dict(c, **{entrada: v}) for c in combinacoes for v in valores_entradas[entrada]]
+        cenarios[grafico.id] = [
+            (lambda g=grafico, args=args: codificacao.figura(g.construir(
+                graficos.Contexto(snap, args.get('sexo_filtro', filtros.TODOS)), **args)))
+            for args in combinacoes
+        ]
+
+    cenarios['atualizar_graficos'] = [
+        (lambda s=s: graficos.atualizar({'variavel': 'age', 'sexo_filtro': s,
+                                          'regra_bins': histograma.REGRA_FIXA}, snap=snap))
+        for s in sexos
+    ]
+    cenarios['update_tabela'] = [
+        (lambda c=c: callbacks.update_tabela(*c)) for c in CENARIOS_TABELA
+    ]
+
+    rng = np.random.default_rng(0)
+    ids = rng.integers(1, len(snap.df) + 1, size=8)
+    cenarios['mostrar_detalhes_paciente'] = [
+        (lambda i=int(i): callbacks.mostrar_detalhes_paciente([i])) for i in ids
+    ]
+    return cenarios
+
+
+def _medir(chamadas, repeticoes):
+    """Tempos (ms) de `repeticoes` rodadas por todas as chamadas e bytes da resposta"""
+    from plotly.io.json import to_json_plotly
+
+    def chamar(funcao):
+        inicio = time.perf_counter()
+        # A serialização faz parte do custo de cada resposta do Dash
+        corpo = to_json_plotly(funcao())
+        return (time.perf_counter() - inicio) * 1000, len(corpo.encode())
+
+    frio, _ = chamar(chamadas[0])
+    tempos = []
+    for _ in range(repeticoes):
+        for funcao in chamadas:
+            ms, _ = chamar(funcao)
+            tempos.append(ms)
+    return frio, tempos, _tamanhos(chamadas)
+
+
+def _tamanhos(chamadas):
+    """Bytes médios da resposta de cada chamada, por codificação (fora da medição de tempo)"""
+    import codificacao
+    from plotly.io.json import to_json_plotly
+
+    tamanhos = {'bytes': [], 'bytes_texto': []}
+    for nome in codificacao.codificacoes_disponiveis():
+        tamanhos[f'bytes_{nome}'] = []
+    for funcao in chamadas:
+        corpo = to_json_plotly(funcao()).encode()
+        tamanhos['bytes'].append(len(corpo))
+        # Antes: cada número em JSON decimal
+        texto = json.dumps(codificacao.decodificar(json.loads(corpo)), separators=(',', ':'))
+        tamanhos['bytes_texto'].append(len(texto.encode()))
+        for nome in codificacao.codificacoes_disponiveis():
+            tamanhos[f'bytes_{nome}'].append(len(codificacao.comprimir(corpo, nome)))
+    return tamanhos
+
+
+def executar(linhas, repeticoes):
+    """Carrega o app com o snapshot configurado no ambiente e mede os callbacks"""
+    rss_inicial = _rss_mb()
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app
+        import snapshot
+        app.create_app()
+    carga_s = time.perf_counter() - inicio
+    snap = snapshot.atual()
+    if len(snap.df) != linhas:
+        raise RuntimeError(f'Snapshot com {len(snap.df)} linhas; esperado {linhas}')
+
+    resultado = {
+        'linhas': len(snap.df),
+        'versao_snapshot': snap.versao,
+        'carga_s': round(carga_s, 4),
+        'rss_inicial_mb': round(rss_inicial, 1),
+        'rss_apos_carga_mb': round(_rss_mb(), 1),
+        'callbacks': {},
+    }
+    for nome, chamadas in _cenarios(snap).items():
+        rss_antes = _rss_mb()
+        frio, tempos, tamanhos = _medir(chamadas, repeticoes)
+        p50, p90, p99 = np.percentile(tempos, [50, 90, 99])
+        resultado['callbacks'][nome] = {
+            'chamadas': len(tempos),
+            'frio_ms': round(frio, 3),
+            'p50_ms': round(float(p50), 3),
+            'p90_ms': round(float(p90), 3),
+            'p99_ms': round(float(p99), 3),
+            'media_ms': round(float(np.mean(tempos)), 3),
+            'bytes_medio': int(np.mean(tamanhos['bytes'])),
+            'bytes_max': int(max(tamanhos['bytes'])),
+            **{f'{nome}_medio': int(np.mean(valores)) for nome, valores in tamanhos.items() if nome != 'bytes'},
+            'rss_pico_mb': round(_rss_mb(), 1),
+            'rss_incremento_mb': round(_rss_mb() - rss_antes, 1),
+        }
+    resultado['rss_pico_mb'] = round(_rss_mb(), 1)
+    return resultado
+
+
+# --- Orquestração (processo principal) ---
+
+def preparar_dados(linhas, semente=0):
+    """Diretório com o snapshot sintético de `linhas` linhas (gerado uma vez)"""
+    import snapshot
+    import sintetico
+
+    # Um diretório por formato do snapshot: mudanças de formato regeram os dados
+    raiz = DIRETORIO_DADOS / f'{linhas}-s{semente}-f{snapshot.VERSAO_FORMATO}'
+    if snapshot.versao_atual(raiz) is None:
+        print(f"🔄 Gerando snapshot sintético com {linhas} linhas em {raiz}...")
+        sintetico.gerar_snapshot(linhas, raiz=raiz, semente=semente)
+    return raiz
+
+
+def _subprocesso(linhas, raiz, repeticoes):
+    # Cada tamanho roda em um processo novo: carga fria e RSS independentes
+    ambiente = dict(
+        os.environ,
+        DASH_CACHE_DIR=str(raiz),
+        DASH_OFFLINE='1',
+        DASH_CACHE_FIGURAS='desligado',
+        DASH_MODO_GRAFICOS='servidor',
+    )
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as tmp:
+        parcial = Path(tmp.name)
+    try:
+        subprocess.run(
+            [sys.executable, '-m', 'benchmarks.bench_callbacks',
+             '--executar', str(linhas), '--repeticoes', str(repeticoes), '--parcial', str(parcial)],
+            cwd=RAIZ_REPO, env=ambiente, check=True,
+        )
+        return json.loads(parcial.read_text())
+    finally:
+        parcial.unlink(missing_ok=True)
+
+
+def _git(*args):
+    try:
+        return subprocess.run(['git', *args], cwd=RAIZ_REPO, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metadados():
+    """Commit, ambiente e versões das bibliotecas usadas na medição"""
+    import dash
+    import pandas as pd
+    import plotly
+
+    return {
+        'commit': _git('rev-parse', 'HEAD'),
+        'commit_assunto': _git('log', '-1', '--format=%s'),
+        'arvore_alterada': bool(_git('status', '--porcelain', '--untracked-files=no')),
+        'data': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'bibliotecas': {
+            'dash': dash.__version__,
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'plotly': plotly.__version__,
+        },
+    }
+
+
+def imprimir(resultado):
+    print(f"\n📏 {resultado['linhas']} linhas — carga {resultado['carga_s']:.2f}s, "
+          f"RSS pico {resultado['rss_pico_mb']:.0f} MB")
+    print(f"  {'callback':<28}{'frio':>10}{'p50':>10}{'p90':>10}{'p99':>10}"
+          f"{'texto':>12}{'bytes':>12}{'gzip':>12}{'br':>12}")
+    for nome, m in resultado['callbacks'].items():
+        print(f"  {nome:<28}{m['frio_ms']:>10.2f}{m['p50_ms']:>10.2f}"
+              f"{m['p90_ms']:>10.2f}{m['p99_ms']:>10.2f}{m.get('bytes_texto_medio', '-'):>12}"
+              f"{m['bytes_medio']:>12}{m.get('bytes_gzip_medio', '-'):>12}{m.get('bytes_br_medio', '-'):>12}")
+
+
+def comparar(base, novo, limiar=LIMIAR_REGRESSAO):
+    """Compara o p50 de dois arquivos de resultado; devolve as regressões"""
+    dados = [json.loads(Path(caminho).read_text()) for caminho in (base, novo)]
+    por_linhas = [{r['linhas']: r for r in d['resultados']} for d in dados]
+    print(f"Base: {dados[0]['meta']['commit'] or '?'}  Novo: {dados[1]['meta']['commit'] or '?'}")
+
+    regressoes = []
+    for linhas in sorted(set(por_linhas[0]) & set(por_linhas[1])):
+        antes, depois = por_linhas[0][linhas]['callbacks'], por_linhas[1][linhas]['callbacks']
+        print(f"\n📏 {linhas} linhas")
+        for nome in [n for n in antes if n in depois]:
+            p50_antes, p50_depois = antes[nome]['p50_ms'], depois[nome]['p50_ms']
+            variacao = (p50_depois - p50_antes) / p50_antes if p50_antes else 0.0
+            marca = ''
+            if variacao > limiar:
+                marca = '  ⚠️ regressão'
+                regressoes.append((linhas, nome, variacao))
+            print(f"  {nome:<28}{p50_antes:>10.2f} → {p50_depois:>10.2f} ms  ({variacao:+.0%}){marca}")
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark dos callbacks do dashboard')
+    parser.add_argument('--linhas', type=int, nargs='+', default=list(LINHAS_PADRAO))
+    parser.add_argument('--repeticoes', type=int, default=REPETICOES_PADRAO)
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--saida', help='arquivo JSON de resultados (padrão: benchmarks/resultados/)')
+    parser.add_argument('--comparar', nargs=2, metavar=('BASE', 'NOVO'),
+                        help='compara dois arquivos de resultados')
+    parser.add_argument('--limiar', type=float, default=LIMIAR_REGRESSAO)
+    # Uso interno: medição dentro do subprocesso
+    parser.add_argument('--executar', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--parcial', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.comparar:
+        return 1 if comparar(*args.comparar, limiar=args.limiar) else 0
+
+    if args.executar is not None:
+        resultado = executar(args.executar, args.repeticoes)
+        Path(args.parcial).write_text(json.dumps(resultado))
+        return 0
+
+    resultados = []
+    for linhas in args.linhas:
+        raiz = preparar_dados(linhas, args.semente)
+        resultado = _subprocesso(linhas, raiz, args.repeticoes)
+        imprimir(resultado)
+        resultados.append(resultado)
+
+    meta = metadados()
+    saida = Path(args.saida) if args.saida else DIRETORIO_RESULTADOS / (
+        f"{time.strftime('%Y%m%d-%H%M%S')}-{(meta['commit'] or 'sem-commit')[:8]}.json"
+    )
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    saida.write_text(json.dumps({
+        'meta': dict(meta, repeticoes=args.repeticoes, semente=args.semente),
+        'resultados': resultados,
+    }, indent=2, ensure_ascii=False))
+    print(f"\n✅ Resultados gravados em {saida}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,490 @@
+# Teste de carga HTTP de ponta a ponta contra /_dash-update-component
+#
+# Os microbenchmarks (bench_callbacks.py) chamam as funções dos callbacks no
+# próprio processo; aqui as requisições passam pelo servidor de verdade:
+# roteamento do Flask, JSON do Dash, compressão e disputa entre workers.
+#
+# Os callbacks são descobertos em /_dash-dependencies e o estado inicial dos
+# componentes em /_dash-layout, então os payloads seguem o app em execução
+# (novos controles e gráficos entram sem mudar este arquivo). Cada usuário
+# virtual abre uma conexão HTTP/1.1 persistente (asyncio, só biblioteca
+# padrão), faz a carga inicial da página (todos os callbacks do servidor) e
+# repete interações realistas:
+#
+#   controle    troca o valor de um dropdown/radio por outra das opções
+#   pagina      avança (ou volta ao início) a página da tabela
+#   selecao     seleciona uma linha da página visível da tabela
+#
+# disparando, como o navegador, os callbacks do servidor que têm a
+# propriedade alterada como entrada. As respostas atualizam o estado local
+# (página atual, linhas visíveis...). Ao final, por callback: requisições,
+# vazão, latência (p50/p90/p99/máx), bytes e taxa de erros.
+#
+#   python app.py                                    # em outro terminal
+#   python -m benchmarks.carga_http --concorrencia 16 --duracao 30
+#   python -m benchmarks.carga_http --iniciar --linhas 1000000 --workers 2 --modo-graficos servidor
+
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from pathlib import Path
+
+from benchmarks.bench_callbacks import RAIZ_REPO, preparar_dados
+from benchmarks.memoria_workers import _esperar, _porta_livre
+
+ROTA_CALLBACK = '/_dash-update-component'
+
+# Peso de cada tipo de interação no sorteio
+PESOS_ACOES = {'controle': 5, 'pagina': 3, 'selecao': 2}
+
+# Propriedades de tabela usadas nas interações
+PAGINA = ('tabela-dados', 'page_current')
+CONTAGEM_PAGINAS = ('tabela-dados', 'page_count')
+DADOS_TABELA = ('tabela-dados', 'data')
+SELECAO = ('tabela-dados', 'selected_row_ids')
+
+
+# --- App: callbacks e estado inicial ---
+
+def _obter_json(url):
+    with urllib.request.urlopen(url, timeout=60) as resposta:
+        corpo = resposta.read()
+        if resposta.headers.get('Content-Encoding') == 'gzip':
+            corpo = gzip.decompress(corpo)
+    return json.loads(corpo)
+
+
+def _saidas(output):
+    """Lista de (id, propriedade) do campo 'output' de uma dependência"""
+    if output.startswith('..'):
+        partes = output[2:-2].split('...')
+    else:
+        partes = [output]
+    return [tuple(parte.rsplit('.', 1)) for parte in partes]
+
+
+def _componentes(arvore):
+    pilha = [arvore]
+    while pilha:
+        no = pilha.pop()
+        if isinstance(no, list):
+            pilha.extend(no)
+        elif isinstance(no, dict) and 'props' in no:
+            yield no['props']
+            pilha.append(no['props'].get('children'))
+
+
+def carregar_app(url):
+    """
+    Callbacks do servidor ({'output', 'saidas', 'entradas', 'estados'}), o
+    estado inicial {(id, prop): valor} e as opções de cada controle
+    """
+    callbacks = []
+    for dep in _obter_json(url + '/_dash-dependencies'):
+        # Callbacks clientside rodam no navegador, sem requisição
+        if dep.get('clientside_function'):
+            continue
+        callbacks.append({
+            'output': dep['output'],
+            'saidas': _saidas(dep['output']),
+            'entradas': [(e['id'], e['property']) for e in dep['inputs']],
+            'estados': [(e['id'], e['property']) for e in dep.get('state', [])],
+        })
+
+    estado = {}
+    opcoes = {}
+    for props in _componentes(_obter_json(url + '/_dash-layout')):
+        id_componente = props.get('id')
+        if not isinstance(id_componente, str):
+            continue
+        for prop, valor in props.items():
+            if prop not in ('id', 'children'):
+                estado[(id_componente, prop)] = valor
+        if props.get('options'):
+            opcoes[id_componente] = [
+                o['value'] if isinstance(o, dict) else o for o in props['options']
+            ]
+    return callbacks, estado, opcoes
+
+
+def nome_callback(callback):
+    """Rótulo curto: primeira saída e quantas outras"""
+    id_saida, prop = callback['saidas'][0]
+    extras = len(callback['saidas']) - 1
+    return f'{id_saida}.{prop}' + (f' (+{extras})' if extras else '')
+
+
+def payload(callback, estado, alteradas):
+    """Corpo JSON de uma chamada ao callback, como o enviado pelo navegador"""
+    saidas = [{'id': i, 'property': p} for i, p in callback['saidas']]
+    return json.dumps({
+        'output': callback['output'],
+        'outputs': saidas if callback['output'].startswith('..') else saidas[0],
+        'inputs': [{'id': i, 'property': p, 'value': estado.get((i, p))} for i, p in callback['entradas']],
+        'state': [{'id': i, 'property': p, 'value': estado.get((i, p))} for i, p in callback['estados']],
+        'changedPropIds': [f'{i}.{p}' for i, p in alteradas],
+    }).encode()
+
+
+# --- Cliente HTTP/1.1 mínimo (asyncio) ---
+
+class Conexao:
+    """Conexão persistente com o servidor (reaberta se cair)"""
+
+    def __init__(self, url, aceitar_codificacao):
+        partes = urllib.parse.urlsplit(url)
+        self.host = partes.hostname
+        self.porta = partes.port or 80
+        self.aceitar_codificacao = aceitar_codificacao
+        self._leitor = self._escritor = None
+
+    async def _abrir(self):
+        self._leitor, self._escritor = await asyncio.open_connection(self.host, self.porta)
+
+    async def fechar(self):
+        if self._escritor is not None:
+            self._escritor.close()
+            try:
+                await self._escritor.wait_closed()
+            except ConnectionError:
+                pass
+            self._escritor = None
+
+    async def post(self, caminho, corpo):
+        """(status, cabeçalhos, corpo bruto) de um POST JSON"""
+        for tentativa in (1, 2):
+            if self._escritor is None:
+                await self._abrir()
+            try:
+                return await self._post(caminho, corpo)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                # Conexão fechada pelo servidor entre requisições: reabre uma vez
+                await self.fechar()
+                if tentativa == 2:
+                    raise
+
+    async def _post(self, caminho, corpo):
+        cabecalho = (
+            f'POST {caminho} HTTP/1.1\r\n'
+            f'Host: {self.host}:{self.porta}\r\n'
+            'Content-Type: application/json\r\n'
+            f'Content-Length: {len(corpo)}\r\n'
+            + (f'Accept-Encoding: {self.aceitar_codificacao}\r\n' if self.aceitar_codificacao else '')
+            + 'Connection: keep-alive\r\n\r\n'
+        )
+        self._escritor.write(cabecalho.encode('latin-1') + corpo)
+        await self._escritor.drain()
+
+        linha = await self._leitor.readuntil(b'\r\n')
+        status = int(linha.split()[1])
+        cabecalhos = {}
+        while True:
+            linha = await self._leitor.readuntil(b'\r\n')
+            if linha == b'\r\n':
+                break
+            nome, _, valor = linha.decode('latin-1').partition(':')
+            cabecalhos[nome.strip().lower()] = valor.strip()
+
+        if cabecalhos.get('transfer-encoding', '').lower() == 'chunked':
+            partes = []
+            while True:
+                tamanho = int((await self._leitor.readuntil(b'\r\n')).split(b';')[0], 16)
+                if tamanho == 0:
+                    await self._leitor.readuntil(b'\r\n')
+                    break
+                partes.append(await self._leitor.readexactly(tamanho))
+                await self._leitor.readexactly(2)
+            dados = b''.join(partes)
+        else:
+            dados = await self._leitor.readexactly(int(cabecalhos.get('content-length', 0)))
+
+        if cabecalhos.get('connection', '').lower() == 'close':
+            await self.fechar()
+        return status, cabecalhos, dados
+
+
+def _decodificar(cabecalhos, dados):
+    codificacao = cabecalhos.get('content-encoding')
+    if codificacao == 'gzip':
+        dados = gzip.decompress(dados)
+    elif codificacao == 'br':
+        import brotli
+        dados = brotli.decompress(dados)
+    return json.loads(dados) if dados else {}
+
+
+# --- Usuários virtuais ---
+
+class Medicoes:
+    """Latências, bytes e erros por callback"""
+
+    def __init__(self):
+        self.latencias = defaultdict(list)
+        self.bytes = defaultdict(int)
+        self.erros = defaultdict(int)
+
+    def registrar(self, nome, segundos, tamanho, erro=False):
+        if erro:
+            self.erros[nome] += 1
+        else:
+            self.latencias[nome].append(segundos)
+            self.bytes[nome] += tamanho
+
+
+class Usuario:
+    """Sessão de um usuário: carga da página e interações sorteadas"""
+
+    def __init__(self, url, callbacks, estado, opcoes, medicoes, rng, aceitar_codificacao, pausa):
+        self.conexao = Conexao(url, aceitar_codificacao)
+        self.callbacks = callbacks
+        self.estado = dict(estado)
+        self.opcoes = opcoes
+        self.medicoes = medicoes
+        self.rng = rng
+        self.pausa = pausa
+
+    async def _chamar(self, callback, alteradas):
+        nome = nome_callback(callback)
+        inicio = time.perf_counter()
+        try:
+            status, cabecalhos, dados = await self.conexao.post(
+                ROTA_CALLBACK, payload(callback, self.estado, alteradas)
+            )
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            self.medicoes.registrar(nome, 0, 0, erro=True)
+            return
+        segundos = time.perf_counter() - inicio
+
+        # 204: o callback não mudou nada (PreventUpdate)
+        if status not in (200, 204):
+            self.medicoes.registrar(nome, segundos, len(dados), erro=True)
+            return
+        if status == 200:
+            # Corpo que não é a resposta de um callback (página HTML de um 502
+            # do proxy, JSON truncado, compressão inválida) conta como erro e
+            # não interrompe os demais usuários
+            try:
+                resposta = _decodificar(cabecalhos, dados).get('response', {})
+                atualizacoes = [
+                    ((id_componente, prop), valor)
+                    for id_componente, props in resposta.items()
+                    for prop, valor in props.items()
+                ]
+            except Exception:
+                self.medicoes.registrar(nome, segundos, len(dados), erro=True)
+                return
+            self.estado.update(atualizacoes)
+        self.medicoes.registrar(nome, segundos, len(dados))
+
+    async def _disparar(self, alteradas):
+        """Chama, em sequência, os callbacks que têm alguma das propriedades como entrada"""
+        for callback in self.callbacks:
+            if any(entrada in alteradas for entrada in callback['entradas']):
+                await self._chamar(callback, alteradas)
+
+    async def carregar_pagina(self):
+        # Carga inicial: o Dash chama todos os callbacks, sem entrada alterada
+        for callback in self.callbacks:
+            await self._chamar(callback, [])
+
+    def _acao(self):
+        """(tipo, propriedade alterada) da próxima interação, já aplicada ao estado"""
+        tipos = list(PESOS_ACOES)
+        tipo = self.rng.choices(tipos, weights=[PESOS_ACOES[t] for t in tipos])[0]
+
+        if tipo == 'pagina' and PAGINA in self.estado:
+            paginas = self.estado.get(CONTAGEM_PAGINAS) or 1
+            atual = self.estado.get(PAGINA) or 0
+            self.estado[PAGINA] = atual + 1 if atual + 1 < paginas else 0
+            return tipo, PAGINA
+
+        linhas = self.estado.get(DADOS_TABELA) or []
+        if tipo == 'selecao' and linhas:
+            self.estado[SELECAO] = [self.rng.choice(linhas)['id']]
+            return tipo, SELECAO
+
+        # Troca de valor de um controle com opções que seja entrada de algum callback
+        entradas = {entrada for callback in self.callbacks for entrada in callback['entradas']}
+        controles = [i for i in self.opcoes if (i, 'value') in entradas and len(self.opcoes[i]) > 1]
+        if not controles:
+            return None, None
+        id_controle = self.rng.choice(controles)
+        atual = self.estado.get((id_controle, 'value'))
+        self.estado[(id_controle, 'value')] = self.rng.choice(
+            [v for v in self.opcoes[id_controle] if v != atual]
+        )
+        return 'controle', (id_controle, 'value')
+
+    async def executar(self, fim, passos_por_sessao):
+        try:
+            while time.monotonic() < fim:
+                await self.carregar_pagina()
+                for _ in range(passos_por_sessao):
+                    if time.monotonic() >= fim:
+                        break
+                    _, alterada = self._acao()
+                    if alterada is None:
+                        break
+                    await self._disparar([alterada])
+                    if self.pausa:
+                        await asyncio.sleep(self.rng.uniform(0, 2 * self.pausa))
+        finally:
+            await self.conexao.fechar()
+
+
+async def _carga(url, callbacks, estado, opcoes, concorrencia, duracao, passos, semente,
+                 aceitar_codificacao, pausa):
+    medicoes = Medicoes()
+    fim = time.monotonic() + duracao
+    usuarios = [
+        Usuario(url, callbacks, estado, opcoes, medicoes, random.Random(semente + i), aceitar_codificacao, pausa)
+        for i in range(concorrencia)
+    ]
+    inicio = time.perf_counter()
+    await asyncio.gather(*(u.executar(fim, passos) for u in usuarios))
+    return medicoes, time.perf_counter() - inicio
+
+
+# --- Relatório ---
+
+def _percentil(ordenados, q):
+    if not ordenados:
+        return float('nan')
+    return ordenados[min(len(ordenados) - 1, int(q * len(ordenados)))]
+
+
+def resumir(medicoes, duracao):
+    """Linhas do relatório por callback e o total"""
+    resultados = []
+    nomes = sorted(set(medicoes.latencias) | set(medicoes.erros))
+    todas = []
+    for nome in nomes + ['total']:
+        if nome == 'total':
+            latencias = sorted(todas)
+            erros = sum(medicoes.erros.values())
+            tamanho = sum(medicoes.bytes.values())
+        else:
+            latencias = sorted(medicoes.latencias[nome])
+            todas.extend(latencias)
+            erros = medicoes.erros[nome]
+            tamanho = medicoes.bytes[nome]
+        total = len(latencias) + erros
+        resultados.append({
+            'callback': nome,
+            'requisicoes': total,
+            'req_s': round(total / duracao, 1),
+            'erros_pct': round(100 * erros / total, 2) if total else 0.0,
+            'p50_ms': round(1000 * _percentil(latencias, 0.50), 2),
+            'p90_ms': round(1000 * _percentil(latencias, 0.90), 2),
+            'p99_ms': round(1000 * _percentil(latencias, 0.99), 2),
+            'max_ms': round(1000 * latencias[-1], 2) if latencias else float('nan'),
+            'bytes_medio': round(tamanho / len(latencias)) if latencias else 0,
+        })
+    return resultados
+
+
+def imprimir(resultados):
+    print(f"  {'callback':<34}{'req':>7}{'req/s':>8}{'erros':>8}{'p50':>9}{'p90':>9}"
+          f"{'p99':>9}{'máx':>9}{'bytes':>9}")
+    for r in resultados:
+        print(f"  {r['callback']:<34}{r['requisicoes']:>7}{r['req_s']:>8}{r['erros_pct']:>7}%"
+              f"{r['p50_ms']:>9}{r['p90_ms']:>9}{r['p99_ms']:>9}{r['max_ms']:>9}{r['bytes_medio']:>9}")
+
+
+# --- Servidor local (opcional) ---
+
+def iniciar_servidor(linhas, workers, threads, modo_graficos=None):
+    """Sobe o gunicorn sobre um snapshot sintético; devolve (processo, url)"""
+    porta = _porta_livre()
+    url = f'http://127.0.0.1:{porta}'
+    ambiente = dict(
+        os.environ,
+        DASH_CACHE_DIR=str(preparar_dados(linhas)),
+        DASH_OFFLINE='1',
+        DASH_ENDERECO=f'127.0.0.1:{porta}',
+        DASH_WORKERS=str(workers),
+        DASH_THREADS=str(threads),
+        DASH_RECARGA_INTERVALO='0',
+    )
+    if modo_graficos:
+        ambiente['DASH_MODO_GRAFICOS'] = modo_graficos
+    processo = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', 'servidor:criar_app()'],
+        cwd=RAIZ_REPO, env=ambiente, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        _esperar(url, processo, workers, limite=600)
+    except BaseException:
+        processo.kill()
+        raise
+    return processo, url
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Teste de carga HTTP dos callbacks do dashboard')
+    parser.add_argument('--url', default='http://127.0.0.1:8050')
+    parser.add_argument('--concorrencia', type=int, default=8, help='usuários virtuais simultâneos')
+    parser.add_argument('--duracao', type=float, default=20, help='segundos de carga')
+    parser.add_argument('--passos', type=int, default=20, help='interações por sessão antes de recarregar a página')
+    parser.add_argument('--pausa', type=float, default=0,
+                        help='pausa média (s) entre interações de um usuário; 0 = sem pausa')
+    parser.add_argument('--accept-encoding', default='gzip',
+                        help="Accept-Encoding enviado ('' para respostas sem compressão)")
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--saida', help='grava os resultados em JSON')
+    parser.add_argument('--iniciar', action='store_true',
+                        help='sobe o gunicorn com um snapshot sintético em vez de usar --url')
+    parser.add_argument('--linhas', type=int, default=100_000)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--modo-graficos', choices=('auto', 'cliente', 'servidor'),
+                        help='modo dos gráficos do servidor iniciado (padrão: config.MODO_GRAFICOS)')
+    args = parser.parse_args(argv)
+
+    if 'br' in args.accept_encoding:
+        try:
+            import brotli  # noqa: F401
+        except ImportError:
+            print("❌ Accept-Encoding com br requer o pacote brotli para ler as respostas", file=sys.stderr)
+            return 1
+
+    processo, url = (iniciar_servidor(args.linhas, args.workers, args.threads, args.modo_graficos)
+                     if args.iniciar else (None, args.url.rstrip('/')))
+    try:
+        callbacks, estado, opcoes = carregar_app(url)
+        print(f"🔄 {len(callbacks)} callbacks do servidor em {url}; "
+              f"{args.concorrencia} usuários por {args.duracao:.0f}s")
+        medicoes, duracao = asyncio.run(_carga(
+            url, callbacks, estado, opcoes, args.concorrencia, args.duracao, args.passos,
+            args.semente, args.accept_encoding, args.pausa,
+        ))
+    finally:
+        if processo is not None:
+            processo.send_signal(signal.SIGTERM)
+            processo.wait(timeout=30)
+
+    resultados = resumir(medicoes, duracao)
+    imprimir(resultados)
+    if args.saida:
+        Path(args.saida).write_text(json.dumps({
+            'url': url,
+            'concorrencia': args.concorrencia,
+            'duracao_s': round(duracao, 2),
+            'accept_encoding': args.accept_encoding,
+            'resultados': resultados,
+        }, indent=2, ensure_ascii=False))
+    return 1 if any(r['erros_pct'] for r in resultados) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,89 @@
+# Vazão e memória da exportação em streaming (exportacao.py)
+#
+# Para cada tamanho de snapshot sintético, consome o gerador da exportação
+# (o mesmo corpo enviado pela rota /exportar) em cada formato e compressão
+# e mede linhas/s, MB/s do corpo enviado e, em uma segunda passada (o
+# tracemalloc deixa as alocações bem mais lentas), o pico de memória
+# alocada durante a geração. Com a geração em blocos, o pico depende do
+# tamanho do bloco e fica estável entre os tamanhos de snapshot, enquanto
+# bytes e tempo crescem com as linhas.
+#
+#   python -m benchmarks.exportacao --linhas 100000 1000000 --bloco 50000
+
+import argparse
+import sys
+import time
+import tracemalloc
+
+from benchmarks.bench_callbacks import preparar_dados
+
+LINHAS_PADRAO = (100_000, 1_000_000)
+
+# (formato, Content-Encoding)
+VARIANTES = (
+    ('csv', None),
+    ('csv', 'gzip'),
+    ('csv', 'br'),
+    ('parquet', None),
+)
+
+
+def _consumir(snap, formato, codificacao, tamanho_bloco):
+    import exportacao
+
+    total = 0
+    for parte in exportacao.exportar(snap, formato, codificacao=codificacao, tamanho_bloco=tamanho_bloco):
+        total += len(parte)
+    return total
+
+
+def medir(snap, formato, codificacao, tamanho_bloco):
+    """Bytes, segundos e pico de memória (bytes) de uma exportação completa"""
+    inicio = time.perf_counter()
+    total = _consumir(snap, formato, codificacao, tamanho_bloco)
+    segundos = time.perf_counter() - inicio
+
+    tracemalloc.start()
+    _consumir(snap, formato, codificacao, tamanho_bloco)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'bytes': total, 'segundos': segundos, 'pico': pico}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Vazão e memória da exportação em streaming')
+    parser.add_argument('--linhas', type=int, nargs='+', default=list(LINHAS_PADRAO))
+    parser.add_argument('--bloco', type=int, default=None,
+                        help='linhas por bloco (padrão: config.EXPORTACAO_BLOCO)')
+    parser.add_argument('--semente', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    import codificacao
+    import exportacao
+    import risco
+    import snapshot
+
+    disponiveis = codificacao.codificacoes_disponiveis()
+    print(f"{'linhas':>10}  {'formato':<13}{'MB':>9}{'s':>8}{'linhas/s':>13}{'MB/s':>8}{'pico MB':>9}")
+    for linhas in args.linhas:
+        snap = snapshot.ler(raiz=preparar_dados(linhas, args.semente))
+        # Modelo de risco pontuado antes: fora da medição, como no servidor
+        risco.modelo(snap)
+        for formato, codificacao_variante in VARIANTES:
+            nome = formato + (f'+{codificacao_variante}' if codificacao_variante else '')
+            if codificacao_variante and codificacao_variante not in disponiveis:
+                print(f"{linhas:>10}  {nome:<13}   (indisponível: pacote brotli ausente)")
+                continue
+            try:
+                r = medir(snap, formato, codificacao_variante, args.bloco)
+            except exportacao.ExportacaoInvalida as e:
+                print(f"{linhas:>10}  {nome:<13}   ({e})")
+                continue
+            mb = r['bytes'] / 1e6
+            print(f"{linhas:>10}  {nome:<13}{mb:>9.1f}{r['segundos']:>8.2f}"
+                  f"{linhas / r['segundos']:>13,.0f}{mb / r['segundos']:>8.1f}{r['pico'] / 1e6:>9.1f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
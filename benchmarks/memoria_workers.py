@@ -0,0 +1,165 @@
+# Memória e vazão do modo de produção por número de workers (Linux)
+#
+# Para cada número de workers, sobe o gunicorn com gunicorn.conf.py sobre
+# um snapshot sintético, espera /pronto, dispara requisições concorrentes do
+# callback da tabela e soma RSS e PSS (/proc/<pid>/smaps_rollup) do mestre
+# e dos workers. Com o snapshot carregado antes do fork, o PSS total deve
+# crescer bem menos que o RSS somado, que conta as páginas compartilhadas
+# uma vez por processo.
+#
+#   python -m benchmarks.memoria_workers --linhas 1000000 --workers 1 2 4
+
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from benchmarks.bench_callbacks import RAIZ_REPO, preparar_dados
+
+SAIDAS_TABELA = ['data', 'page_count', 'page_size', 'page_current']
+
+
+def _porta_livre():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _corpo_tabela(pagina):
+    saida = '..' + '...'.join(
+        [f'tabela-dados.{p}' for p in SAIDAS_TABELA] + ['tabela-total.children']
+    ) + '..'
+    return json.dumps({
+        'output': saida,
+        'outputs': [{'id': 'tabela-dados', 'property': p} for p in SAIDAS_TABELA]
+                   + [{'id': 'tabela-total', 'property': 'children'}],
+        'inputs': [
+            {'id': 'filtro-diagnostico', 'property': 'value', 'value': 1},
+            {'id': 'num-registros', 'property': 'value', 'value': 25},
+            {'id': 'tabela-dados', 'property': 'page_current', 'value': pagina},
+            {'id': 'tabela-dados', 'property': 'sort_by', 'value': [{'column_id': 'chol', 'direction': 'desc'}]},
+            {'id': 'tabela-dados', 'property': 'filter_query', 'value': '{age} > 50'},
+        ],
+        'changedPropIds': ['tabela-dados.page_current'],
+        'state': [],
+    }).encode()
+
+
+def _memoria(pid):
+    """(RSS, PSS) em MB de um processo"""
+    valores = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for linha in f:
+            partes = linha.split()
+            if partes[0] in ('Rss:', 'Pss:'):
+                valores[partes[0]] = int(partes[1]) / 1024
+    return valores['Rss:'], valores['Pss:']
+
+
+def _filhos(pid):
+    try:
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            return [int(p) for p in f.read().split()]
+    except FileNotFoundError:
+        return []
+
+
+def _esperar(url, processo, workers, limite=120):
+    fim = time.monotonic() + limite
+    while time.monotonic() < fim:
+        if processo.poll() is not None:
+            raise RuntimeError('O gunicorn terminou antes de ficar pronto')
+        try:
+            with urllib.request.urlopen(url + '/pronto', timeout=2) as resposta:
+                if resposta.status == 200 and len(_filhos(processo.pid)) >= workers:
+                    return
+        except (urllib.error.URLError, ConnectionError):
+            pass
+        time.sleep(0.2)
+    raise TimeoutError('O servidor não ficou pronto a tempo')
+
+
+def medir(raiz, workers, threads, requisicoes, concorrencia):
+    porta = _porta_livre()
+    url = f'http://127.0.0.1:{porta}'
+    ambiente = dict(
+        os.environ,
+        DASH_CACHE_DIR=str(raiz),
+        DASH_OFFLINE='1',
+        DASH_MODO_GRAFICOS='servidor',
+        DASH_ENDERECO=f'127.0.0.1:{porta}',
+        DASH_WORKERS=str(workers),
+        DASH_THREADS=str(threads),
+    )
+    processo = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', 'servidor:criar_app()'],
+        cwd=RAIZ_REPO, env=ambiente, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        _esperar(url, processo, workers)
+
+        def chamar(i):
+            requisicao = urllib.request.Request(
+                url + '/_dash-update-component', data=_corpo_tabela(i % 50),
+                headers={'Content-Type': 'application/json'},
+            )
+            with urllib.request.urlopen(requisicao, timeout=60) as resposta:
+                resposta.read()
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(concorrencia) as executor:
+            list(executor.map(chamar, range(requisicoes)))
+        duracao = time.perf_counter() - inicio
+
+        pids = [processo.pid, *_filhos(processo.pid)]
+        memorias = [_memoria(pid) for pid in pids]
+        return {
+            'workers': workers,
+            'threads': threads,
+            'requisicoes_por_s': round(requisicoes / duracao, 1),
+            'rss_total_mb': round(sum(r for r, _ in memorias), 1),
+            'pss_total_mb': round(sum(p for _, p in memorias), 1),
+            'pss_mestre_mb': round(memorias[0][1], 1),
+        }
+    finally:
+        processo.send_signal(signal.SIGTERM)
+        processo.wait(timeout=30)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Memória e vazão por número de workers')
+    parser.add_argument('--linhas', type=int, default=1_000_000)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--threads', type=int, default=1)
+    parser.add_argument('--requisicoes', type=int, default=400)
+    parser.add_argument('--concorrencia', type=int, default=8)
+    parser.add_argument('--saida', help='grava os resultados em JSON')
+    args = parser.parse_args(argv)
+
+    if not Path('/proc/self/smaps_rollup').exists():
+        print("❌ Este benchmark precisa do /proc do Linux", file=sys.stderr)
+        return 1
+
+    raiz = preparar_dados(args.linhas)
+    resultados = []
+    print(f"{'workers':>8}{'req/s':>10}{'RSS total':>12}{'PSS total':>12}")
+    for workers in args.workers:
+        r = medir(raiz, workers, args.threads, args.requisicoes, args.concorrencia)
+        resultados.append(r)
+        print(f"{workers:>8}{r['requisicoes_por_s']:>10}{r['rss_total_mb']:>10} MB{r['pss_total_mb']:>10} MB")
+
+    if args.saida:
+        Path(args.saida).write_text(json.dumps({'linhas': args.linhas, 'resultados': resultados}, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
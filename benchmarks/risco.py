@@ -0,0 +1,81 @@
+# Vazão do modelo de risco: treino, pontuação em lote e por linha
+#
+# Para cada tamanho, gera dados sintéticos, treina o classificador de
+# risco.py e mede a pontuação em lote (blocos de risco.TAMANHO_BLOCO) em
+# linhas por segundo. Para comparação, mede também o predict_proba chamado
+# uma linha por vez (como seria a inferência por clique) em poucas linhas.
+#
+#   python -m benchmarks.risco --linhas 10000 100000 1000000
+
+import argparse
+import sys
+import time
+
+import risco
+import sintetico
+
+LINHAS_PADRAO = (10_000, 100_000, 1_000_000)
+
+# Linhas pontuadas uma a uma (o suficiente para estimar a vazão)
+LINHAS_UMA_A_UMA = 200
+
+
+def _cronometrar(funcao, repeticoes=1):
+    """Menor tempo (s) entre as repetições e o último resultado"""
+    melhor, resultado = float('inf'), None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+
+def medir(linhas, amostra_treino, repeticoes=3):
+    """Tempos e vazões (linhas/s) de treino e pontuação para `linhas` linhas"""
+    df = sintetico.gerar(linhas)
+    treino_s, modelo = _cronometrar(lambda: risco.treinar(df, amostra=amostra_treino))
+    lote_s, _ = _cronometrar(lambda: risco.pontuar(modelo, df), repeticoes)
+
+    poucas = df.iloc[:min(LINHAS_UMA_A_UMA, linhas)]
+    uma_s, _ = _cronometrar(lambda: [risco.pontuar(modelo, poucas.iloc[i:i + 1]) for i in range(len(poucas))])
+
+    linhas_treino = min(linhas, amostra_treino) if amostra_treino else linhas
+    return {
+        'linhas': linhas,
+        'treino_s': treino_s,
+        'treino_linhas_s': linhas_treino / treino_s,
+        'lote_s': lote_s,
+        'lote_linhas_s': linhas / lote_s,
+        'uma_a_uma_linhas_s': len(poucas) / uma_s,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Vazão do treino e da pontuação do modelo de risco')
+    parser.add_argument('--linhas', type=int, nargs='+', default=list(LINHAS_PADRAO))
+    parser.add_argument('--amostra-treino', type=int, default=None,
+                        help='linhas sorteadas para o treino (padrão: config.RISCO_AMOSTRA_TREINO)')
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    try:
+        risco._exigir_sklearn()
+    except risco.ModeloIndisponivel as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    import config
+    amostra = config.RISCO_AMOSTRA_TREINO if args.amostra_treino is None else args.amostra_treino
+
+    print(f"{'linhas':>10}{'treino (s)':>12}{'treino l/s':>14}{'lote (s)':>10}"
+          f"{'lote l/s':>14}{'1 a 1 l/s':>12}{'ganho':>9}")
+    for linhas in args.linhas:
+        r = medir(linhas, amostra, args.repeticoes)
+        print(f"{r['linhas']:>10}{r['treino_s']:>12.2f}{r['treino_linhas_s']:>14,.0f}"
+              f"{r['lote_s']:>10.3f}{r['lote_linhas_s']:>14,.0f}{r['uma_a_uma_linhas_s']:>12,.0f}"
+              f"{r['lote_linhas_s'] / r['uma_a_uma_linhas_s']:>8,.0f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
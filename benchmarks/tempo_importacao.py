@@ -0,0 +1,90 @@
+# Orçamento de tempo de importação do app
+#
+# Importar app.py não deve carregar dados, acessar a rede nem importar as
+# bibliotecas pesadas (Dash, Plotly, pandas): tudo isso fica para
+# create_app(). Este script mede `python -X importtime -c "import app"` em
+# um processo novo, lista as importações mais caras e falha (código de
+# saída 1) se o tempo total passar do orçamento ou se algum módulo proibido
+# for importado:
+#
+#   python -m benchmarks.tempo_importacao
+#   python -m benchmarks.tempo_importacao --modulo app --orcamento-ms 150
+#
+# A verificação dos módulos proibidos também roda com os testes
+# (tests/test_tempo_importacao.py); o tempo fica de fora deles, por variar
+# com a máquina.
+
+import argparse
+import subprocess
+import sys
+
+from benchmarks.bench_callbacks import RAIZ_REPO
+
+ORCAMENTO_MS = 150
+REPETICOES = 5
+
+# Módulos que `import app` não pode trazer junto
+PROIBIDOS = ('dash', 'plotly', 'pandas', 'flask', 'dash_bootstrap_components', 'ucimlrepo', 'sklearn')
+
+
+def medir(modulo):
+    """
+    Importa `modulo` em um processo novo com -X importtime.
+    Devolve (tempo cumulativo em ms, {módulo: (próprio ms, cumulativo ms)}).
+    """
+    resultado = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {modulo}'],
+        cwd=RAIZ_REPO, capture_output=True, text=True, check=True,
+    )
+    modulos = {}
+    for linha in resultado.stderr.splitlines():
+        if not linha.startswith('import time:') or 'self [us]' in linha:
+            continue
+        proprio, cumulativo, nome = linha[len('import time:'):].split('|')
+        modulos[nome.strip()] = (int(proprio) / 1000, int(cumulativo) / 1000)
+    if modulo not in modulos:
+        raise RuntimeError(f'{modulo} não aparece na saída de -X importtime')
+    return modulos[modulo][1], modulos
+
+
+def modulos_proibidos(modulos):
+    """Pacotes de PROIBIDOS presentes entre os módulos importados"""
+    return sorted({
+        nome.split('.')[0] for nome in modulos
+        if any(nome == p or nome.startswith(p + '.') for p in PROIBIDOS)
+    })
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Orçamento de tempo de importação')
+    parser.add_argument('--modulo', default='app')
+    parser.add_argument('--orcamento-ms', type=float, default=ORCAMENTO_MS)
+    parser.add_argument('--repeticoes', type=int, default=REPETICOES)
+    args = parser.parse_args(argv)
+
+    # Mediana de vários processos: a primeira importação paga o cache de disco
+    medicoes = [medir(args.modulo) for _ in range(args.repeticoes)]
+    tempos = sorted(total for total, _ in medicoes)
+    mediana = tempos[len(tempos) // 2]
+    _, modulos = medicoes[-1]
+
+    print(f"import {args.modulo}: {mediana:.1f} ms (orçamento {args.orcamento_ms:.0f} ms)")
+    print("Importações mais caras (cumulativo):")
+    for nome, (_, cumulativo) in sorted(modulos.items(), key=lambda m: -m[1][1])[:10]:
+        print(f"  {cumulativo:>8.1f} ms  {nome}")
+
+    proibidos = modulos_proibidos(modulos)
+    falhou = False
+    if proibidos:
+        print(f"❌ import {args.modulo} carrega módulos pesados: {', '.join(proibidos)}")
+        falhou = True
+    if mediana > args.orcamento_ms:
+        print(f"❌ Acima do orçamento: {mediana:.1f} ms > {args.orcamento_ms:.0f} ms")
+        falhou = True
+    if not falhou:
+        print("✅ Dentro do orçamento")
+    return 1 if falhou else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
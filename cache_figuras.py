@@ -0,0 +1,339 @@
+# Cache das respostas dos callbacks
+#
+# O espaço de entradas dos controles é pequeno (variáveis x filtros), então a
+# mesma figura seria reconstruída milhares de vezes. O cache guarda a figura
+# já serializada em JSON, indexada por (callback, entradas, versão do
+# snapshot): um acerto evita tanto a construção da figura quanto a validação
+# e a codificação feitas pelo Plotly.
+#
+# Num acerto o JSON guardado vai para a resposta sem ser decodificado: o
+# callback devolve um marcador (`resposta`) que o after_request instalado por
+# `instalar` troca pelos bytes depois que o Dash serializa a resposta. Fora
+# de uma requisição (benchmarks, aquecimento) `resposta` decodifica o JSON.
+#
+# Quando o recarregador publica um novo snapshot (veja recarga.py), as
+# entradas das outras versões são descartadas; a troca não limpa o cache
+# inteiro de uma vez, e requisições ainda em andamento com a versão anterior
+# apenas deixam de encontrar (ou gravam) entradas inalcançáveis.
+#
+# Backends disponíveis (config.CACHE_FIGURAS):
+#   'memoria'    LRU no próprio processo, limitado por itens e bytes
+#   'disco'      arquivos compartilhados entre os workers do servidor
+#   'desligado'  sem cache
+
+import functools
+import hashlib
+import json
+import os
+import secrets
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from plotly.io.json import to_json_plotly
+
+import config
+import metricas
+import snapshot
+
+
+def serializar(resposta):
+    with metricas.fase('serializacao'):
+        return to_json_plotly(resposta).encode()
+
+
+def serializar_saidas(valores):
+    """
+    JSON de cada saída de um callback multi-output, uma por linha (o JSON
+    compacto não tem quebras de linha), para `respostas` separá-las sem
+    decodificar
+    """
+    return b'\n'.join(serializar(valor) for valor in valores)
+
+
+class BackendMemoria:
+    """LRU em memória limitado por número de itens e total de bytes"""
+
+    def __init__(self, max_itens=256, max_bytes=64 * 1024 * 1024):
+        self.max_itens = max_itens
+        self.max_bytes = max_bytes
+        self._itens = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def obter(self, chave):
+        with self._lock:
+            valor = self._itens.get(chave)
+            if valor is not None:
+                self._itens.move_to_end(chave)
+            return valor
+
+    def gravar(self, chave, valor):
+        if len(valor) > self.max_bytes:
+            return
+        with self._lock:
+            antigo = self._itens.pop(chave, None)
+            if antigo is not None:
+                self._bytes -= len(antigo)
+            self._itens[chave] = valor
+            self._bytes += len(valor)
+            # Remove os itens menos usados até respeitar os limites
+            while len(self._itens) > self.max_itens or self._bytes > self.max_bytes:
+                _, removido = self._itens.popitem(last=False)
+                self._bytes -= len(removido)
+
+    def descartar_versoes(self, manter):
+        """Remove entradas de versões do snapshot diferentes de `manter`"""
+        with self._lock:
+            for chave in [c for c in self._itens if c[-1] != manter]:
+                self._bytes -= len(self._itens.pop(chave))
+
+    def tamanho(self):
+        with self._lock:
+            return {'itens': len(self._itens), 'bytes': self._bytes}
+
+
+class BackendDisco:
+    """
+    Cache em arquivos, compartilhado entre processos. Cada versão do
+    snapshot tem seu subdiretório; a remoção dos itens menos usados segue a
+    data de modificação, atualizada a cada acerto.
+    """
+
+    def __init__(self, diretorio, max_bytes=256 * 1024 * 1024):
+        self.diretorio = Path(diretorio)
+        self.max_bytes = max_bytes
+        self.diretorio.mkdir(parents=True, exist_ok=True)
+        self._bytes_gravados = 0
+
+    def _caminho(self, chave):
+        nome = hashlib.sha256(repr(chave[:-1]).encode()).hexdigest()
+        return self.diretorio / str(chave[-1]) / f'{nome}.json'
+
+    def obter(self, chave):
+        caminho = self._caminho(chave)
+        try:
+            valor = caminho.read_bytes()
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        try:
+            os.utime(caminho)
+        except OSError:
+            pass
+        return valor
+
+    def gravar(self, chave, valor):
+        if len(valor) > self.max_bytes:
+            return
+        caminho = self._caminho(chave)
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        # Escrita atômica: outros workers nunca leem um arquivo pela metade
+        fd, tmp = tempfile.mkstemp(dir=caminho.parent, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(valor)
+            os.replace(tmp, caminho)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+        # Verificar o tamanho total a cada ~1/8 do limite gravado
+        self._bytes_gravados += len(valor)
+        if self._bytes_gravados > self.max_bytes // 8:
+            self._bytes_gravados = 0
+            self._podar()
+
+    def _arquivos(self):
+        arquivos = []
+        for caminho in self.diretorio.glob('*/*.json'):
+            try:
+                st = caminho.stat()
+            except FileNotFoundError:
+                continue
+            arquivos.append((st.st_mtime, st.st_size, caminho))
+        return arquivos
+
+    def _podar(self):
+        arquivos = sorted(self._arquivos())
+        total = sum(tamanho for _, tamanho, _ in arquivos)
+        for _, tamanho, caminho in arquivos:
+            if total <= self.max_bytes:
+                break
+            try:
+                caminho.unlink()
+            except FileNotFoundError:
+                pass
+            total -= tamanho
+
+    def descartar_versoes(self, manter):
+        for sub in self.diretorio.iterdir():
+            if sub.is_dir() and sub.name != manter:
+                shutil.rmtree(sub, ignore_errors=True)
+
+    def tamanho(self):
+        arquivos = self._arquivos()
+        return {'itens': len(arquivos), 'bytes': sum(t for _, t, _ in arquivos)}
+
+
+class CacheFiguras:
+    """Memoização dos callbacks com contadores de acertos e falhas"""
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        self._contadores = {}
+        self._lock = threading.Lock()
+
+    @property
+    def ativo(self):
+        return self.backend is not None
+
+    def _contar(self, nome, tipo):
+        with self._lock:
+            contadores = self._contadores.setdefault(nome, {'acertos': 0, 'falhas': 0})
+            contadores[tipo] += 1
+
+    def descartar_versoes(self, manter):
+        """Libera as entradas de versões do snapshot diferentes de `manter`"""
+        if self.ativo:
+            self.backend.descartar_versoes(manter)
+
+    def obter_ou_calcular(self, nome, entradas, calcular, versao=None, codificar=None):
+        """
+        JSON (bytes) da resposta em cache, calculando-a se necessário.
+        `codificar` troca `serializar` (ex.: serializar_saidas).
+        """
+        codificar = codificar or serializar
+        if not self.ativo:
+            return codificar(calcular())
+
+        versao = versao or snapshot.atual().versao
+        chave = (nome, entradas, versao)
+
+        valor = self.backend.obter(chave)
+        if valor is not None:
+            self._contar(nome, 'acertos')
+            return valor
+
+        self._contar(nome, 'falhas')
+        valor = codificar(calcular())
+        self.backend.gravar(chave, valor)
+        return valor
+
+    def contem(self, nome, entradas, versao):
+        return self.ativo and self.backend.obter((nome, entradas, versao)) is not None
+
+    def gravar(self, nome, entradas, valor, versao):
+        """Grava uma resposta já serializada (ex.: calculada no aquecimento)"""
+        if self.ativo:
+            self.backend.gravar((nome, entradas, versao), valor)
+
+    def memoizar(self, nome):
+        """
+        Decorador para callbacks: as entradas (posicionais e nomeadas) e a
+        versão do snapshot formam a chave. O callback passa a retornar o
+        JSON já serializado (veja `resposta`), sem objetos do Plotly.
+        """
+        def decorador(funcao):
+            @functools.wraps(funcao)
+            def envoltorio(*args, **kwargs):
+                entradas = (args, tuple(sorted(kwargs.items())))
+                valor = self.obter_ou_calcular(
+                    nome, repr(entradas), lambda: funcao(*args, **kwargs)
+                )
+                return resposta(valor)
+            envoltorio.sem_cache = funcao
+            return envoltorio
+        return decorador
+
+    def estatisticas(self):
+        with self._lock:
+            contadores = {nome: dict(c) for nome, c in self._contadores.items()}
+        estatisticas = {'callbacks': contadores}
+        if self.ativo:
+            estatisticas.update(self.backend.tamanho())
+        return estatisticas
+
+
+def criar_backend(tipo=None):
+    """Backend configurado em config.CACHE_FIGURAS"""
+    tipo = tipo or config.CACHE_FIGURAS
+    if tipo == 'memoria':
+        return BackendMemoria(
+            max_itens=config.CACHE_FIGURAS_MAX_ITENS,
+            max_bytes=config.CACHE_FIGURAS_MAX_MB * 1024 * 1024,
+        )
+    if tipo == 'disco':
+        return BackendDisco(
+            config.DIRETORIO_CACHE / 'figuras',
+            max_bytes=config.CACHE_FIGURAS_MAX_MB * 1024 * 1024,
+        )
+    if tipo == 'desligado':
+        return None
+    raise ValueError(f'Backend de cache desconhecido: {tipo}')
+
+
+# --- Respostas pré-serializadas ---
+
+# Chave do Flask (app.config) que indica o after_request instalado
+CHAVE_APP = 'CACHE_FIGURAS_JSON_BRUTO'
+
+
+def resposta(payload):
+    """
+    Valor de retorno de um callback cujo JSON (bytes) já está pronto. Numa
+    requisição de um app com `instalar`, um marcador trocado pelos bytes no
+    after_request; caso contrário, o JSON decodificado.
+    """
+    import flask
+
+    if not (flask.has_request_context() and flask.current_app.config.get(CHAVE_APP)):
+        return json.loads(payload)
+    brutos = flask.g.setdefault('cache_figuras_brutos', {})
+    marcador = f'__json_bruto_{secrets.token_hex(8)}_{len(brutos)}__'
+    brutos[marcador] = payload
+    return marcador
+
+
+def respostas(payload):
+    """`resposta` de cada saída de um valor de serializar_saidas"""
+    return [resposta(parte) for parte in payload.split(b'\n')]
+
+
+def _apos_requisicao(resposta_http):
+    import flask
+
+    brutos = flask.g.pop('cache_figuras_brutos', None)
+    if not brutos or resposta_http.direct_passthrough:
+        return resposta_http
+    with metricas.fase('serializacao'):
+        corpo = resposta_http.get_data()
+        for marcador, payload in brutos.items():
+            # O Dash serializou o marcador como uma string JSON
+            corpo = corpo.replace(b'"' + marcador.encode('ascii') + b'"', payload, 1)
+        resposta_http.set_data(corpo)
+    return resposta_http
+
+
+def instalar(app):
+    """
+    Envia os JSON do cache sem decodificá-los. O after_request precisa rodar
+    antes dos de métricas e de compressão: o Flask executa esses ganchos na
+    ordem inversa do registro, então chame depois de metricas.instrumentar e
+    codificacao.instalar.
+    """
+    app.server.after_request(_apos_requisicao)
+    app.server.config[CHAVE_APP] = True
+    return app
+
+
+# Cache compartilhado pelos callbacks do app
+cache = CacheFiguras(criar_backend())
+
+# Na troca de snapshot as entradas antigas deixam de ser alcançáveis
+# (a versão faz parte da chave); aqui elas também são liberadas
+snapshot.ao_publicar(lambda snap: cache.descartar_versoes(snap.versao))
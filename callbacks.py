@@ -0,0 +1,253 @@
+# Callbacks do dashboard (como ele interage)
+#
+# As funções ficam no nível do módulo (e podem ser chamadas diretamente, como
+# faz o benchmark); registrar_callbacks as liga aos componentes do layout.
+
+import dash
+import dash_bootstrap_components as dbc
+import pandas as pd
+from dash import html, Input, Output, ClientsideFunction
+
+import exportacao
+import graficos
+import ingestao
+import metricas
+import modo_cliente
+import pacientes
+import risco
+import snapshot
+import tabela
+from cache_figuras import cache, resposta, respostas, serializar_saidas
+
+
+# --- Callback único dos gráficos ---
+# Todos os gráficos que dependem dos controles são atualizados por um só
+# callback multi-output (veja o pacote graficos): o filtro é resolvido uma
+# vez por requisição e cada gráfico registrado recebe a mesma visão.
+# No modo clientside o mesmo callback roda no navegador (modo_cliente.py).
+
+def atualizar_graficos(*valores):
+    """Atualizar todas as figuras em uma única resposta"""
+    valores = dict(zip(graficos.ENTRADAS.values(), valores))
+    
+    # Reconstruir apenas os gráficos que dependem das entradas alteradas
+    disparadas = None
+    if dash.callback_context.triggered_id is not None:
+        disparadas = [
+            graficos.ENTRADAS[item['prop_id'].split('.')[0]]
+            for item in dash.callback_context.triggered
+        ]
+    
+    figuras = graficos.atualizar(valores, disparadas)
+    return [dash.no_update if fig is None else fig for fig in figuras]
+
+
+def atualizar_graficos_pedido(pedido):
+    """
+    Figuras pedidas pelo callback clientside quando a página veio sem os
+    dados do modo cliente (snapshot recarregado acima do limite)
+    """
+    if not isinstance(pedido, dict) or not isinstance(pedido.get('valores'), list):
+        raise dash.exceptions.PreventUpdate
+    valores = dict(zip(graficos.ENTRADAS.values(), pedido['valores']))
+
+    # Ids dos controles alterados; None reconstrói todos os gráficos
+    disparadas = pedido.get('disparadas')
+    if isinstance(disparadas, list):
+        disparadas = [graficos.ENTRADAS[i] for i in disparadas if isinstance(i, str) and i in graficos.ENTRADAS]
+    else:
+        disparadas = None
+
+    figuras = graficos.atualizar(valores, disparadas)
+    return [dash.no_update if fig is None else fig for fig in figuras]
+
+# --- Callbacks para Tabela Interativa ---
+
+def update_tabela(filtro_diagnostico, num_registros, page_current=0, sort_by=None, filter_query=''):
+    """Atualizar a página visível da tabela baseado nos filtros e na ordenação"""
+    # Respostas em cache por entradas e versão do snapshot
+    snap = snapshot.atual()
+    argumentos = tabela.argumentos_consulta(filtro_diagnostico, num_registros, page_current, sort_by, filter_query)
+    payload = cache.obter_ou_calcular(
+        'pagina-tabela',
+        repr(argumentos),
+        lambda: pagina_tabela(snap, *argumentos),
+        versao=snap.versao,
+        codificar=serializar_saidas,
+    )
+    with metricas.fase('serializacao'):
+        return respostas(payload)
+
+def pagina_tabela(snap, filtro_diagnostico, num_registros, page_current=0, sort_by=None, filter_query=''):
+    """Registros da página, contagem de páginas e texto do total"""
+    indice = tabela.indice(snap)
+    num_registros = num_registros or 25
+    
+    try:
+        # Filtro e ordenação calculados uma vez; a página é fatiada deste array
+        posicoes = indice.posicoes(filtro_diagnostico, filter_query, sort_by)
+    except tabela.FiltroInvalido as e:
+        return [], 0, num_registros, 0, f"⚠️ {e}"
+    total = len(posicoes)
+    
+    # Manter a página dentro dos limites após mudanças de filtro
+    page_count = max(1, -(-total // num_registros))
+    pagina = min(page_current or 0, page_count - 1)
+    
+    # Apenas as linhas da página são reunidas e enviadas ao navegador
+    registros, total = indice.consultar(
+        pagina=pagina, tamanho_pagina=num_registros, posicoes=posicoes
+    )
+    
+    texto_total = f"{total} registros encontrados"
+    resumo = ingestao.resumo(snap)
+    if resumo is not None and resumo.linhas > len(snap.df):
+        # Snapshot ingerido em blocos: a tabela mostra uma amostra
+        texto_total += f" (amostra de {len(snap.df)} de {resumo.linhas} pacientes)"
+    
+    return registros, page_count, num_registros, pagina, texto_total
+
+def atualizar_links_exportacao(filtro_diagnostico, sexo_filtro):
+    """Links de download com os filtros atuais de diagnóstico e sexo"""
+    return (exportacao.href(exportacao.FORMATO_CSV, filtro_diagnostico, sexo_filtro),
+            exportacao.href(exportacao.FORMATO_PARQUET, filtro_diagnostico, sexo_filtro))
+
+# A coluna 'id' dos registros é o patient_id persistente, então a DataTable
+# informa diretamente os IDs selecionados; o callback não depende de 'data'
+# e só roda quando a seleção muda.
+def mostrar_detalhes_paciente(selected_row_ids):
+    """Mostrar detalhes do paciente selecionado na tabela"""
+    if not selected_row_ids:
+        return dbc.Alert("Selecione uma linha na tabela acima para ver os detalhes do paciente.", 
+                        color="info", className="text-center")
+    
+    # Cartões renderizados ficam em cache por paciente e versão do snapshot
+    snap = snapshot.atual()
+    paciente_id = selected_row_ids[0]
+    payload = cache.obter_ou_calcular(
+        'detalhes-paciente',
+        repr(paciente_id),
+        lambda: detalhes_paciente(snap, paciente_id),
+        versao=snap.versao,
+    )
+    with metricas.fase('serializacao'):
+        return resposta(payload)
+
+def detalhes_paciente(snap, paciente_id):
+    """Cartões com os dados completos de um paciente"""
+    # Busca em tempo constante pelo ID persistente
+    indice = pacientes.indice(snap)
+    p = indice.linha(paciente_id)
+    
+    if p is None:
+        return dbc.Alert("Erro ao carregar dados do paciente.", color="danger")
+    
+    # Probabilidade já calculada em lote para o snapshot (sem inferência aqui)
+    p['risco'] = risco.valor(snap, indice.posicao(paciente_id))
+    
+    with metricas.fase('figura'):
+        return _cartoes_paciente(p)
+
+def _cartoes_paciente(p):
+    """Componentes do painel de detalhes a partir da linha do paciente"""
+    # Criar layout de detalhes
+    detalhes = dbc.Row([
+        # Coluna 1 - Informações Básicas
+        dbc.Col([
+            dbc.Card([
+                dbc.CardHeader(html.H5("📋 Informações Básicas", className="mb-0")),
+                dbc.CardBody([
+                    html.P([html.Strong("ID do Paciente: "), p['patient_id']]),
+                    html.P([html.Strong("Idade: "), f"{p['age']} anos"]),
+                    html.P([html.Strong("Sexo: "), p['sex_label']]),
+                    html.P([html.Strong("Tipo de Dor no Peito: "), p['cp_label']]),
+                ])
+            ])
+        ], width=6),
+        
+        # Coluna 2 - Dados Clínicos
+        dbc.Col([
+            dbc.Card([
+                dbc.CardHeader(html.H5("🔬 Dados Clínicos", className="mb-0")),
+                dbc.CardBody([
+                    html.P([html.Strong("Pressão Arterial em Repouso: "), f"{p['trestbps']} mmHg"]),
+                    html.P([html.Strong("Colesterol Sérico: "), f"{p['chol']} mg/dl"]),
+                    html.P([html.Strong("Frequência Cardíaca Máxima: "), f"{p['thalach']} bpm"]),
+                    html.P([html.Strong("Depressão ST: "), f"{p['oldpeak']}" if pd.notna(p['oldpeak']) else "N/A"]),
+                ])
+            ])
+        ], width=6)
+    ], className="mb-3")
+    
+    # Adicionar diagnóstico com cor
+    diagnostico_color = "danger" if p['has_disease'] == 1 else "success"
+    diagnostico_text = "POSITIVO para doença cardíaca" if p['has_disease'] == 1 else "NEGATIVO para doença cardíaca"
+    
+    conteudo_diagnostico = [
+        html.H5("🏥 Diagnóstico", className="mb-2"),
+        html.H6(diagnostico_text, className="mb-0")
+    ]
+    if p.get('risco') is not None:
+        conteudo_diagnostico.append(
+            html.P(f"Risco estimado pelo modelo: {p['risco']:.1%}", className="mb-0 mt-2")
+        )
+    
+    diagnostico_card = dbc.Row([
+        dbc.Col([
+            dbc.Alert(conteudo_diagnostico, color=diagnostico_color, className="text-center")
+        ])
+    ])
+    
+    return [detalhes, diagnostico_card]
+
+
+# --- Registro ---
+
+def registrar_callbacks(app, modo_graficos):
+    """Liga os callbacks aos componentes do layout"""
+    saidas_graficos = [Output(component_id=grafico.id, component_property='figure')
+                       for grafico in graficos.graficos()]
+    entradas_graficos = [Input(component_id=componente, component_property='value')
+                         for componente in graficos.ENTRADAS]
+    
+    if modo_graficos == modo_cliente.MODO_CLIENTE:
+        app.clientside_callback(
+            ClientsideFunction(namespace=modo_cliente.NAMESPACE_JS, function_name=modo_cliente.FUNCAO_JS),
+            saidas_graficos + [Output('pedido-graficos', 'data')],
+            entradas_graficos + [Input('dados-cliente', 'data')]
+        )
+        # Páginas servidas sem 'dados-cliente' (veja layout.py) calculam as
+        # figuras no servidor, pedidas pelo próprio callback clientside
+        app.callback(
+            [Output(component_id=grafico.id, component_property='figure', allow_duplicate=True)
+             for grafico in graficos.graficos()],
+            Input('pedido-graficos', 'data'),
+            prevent_initial_call=True
+        )(atualizar_graficos_pedido)
+    else:
+        app.callback(saidas_graficos, entradas_graficos)(atualizar_graficos)
+    
+    app.callback(
+        [Output('tabela-dados', 'data'),
+         Output('tabela-dados', 'page_count'),
+         Output('tabela-dados', 'page_size'),
+         Output('tabela-dados', 'page_current'),
+         Output('tabela-total', 'children')],
+        [Input('filtro-diagnostico', 'value'),
+         Input('num-registros', 'value'),
+         Input('tabela-dados', 'page_current'),
+         Input('tabela-dados', 'sort_by'),
+         Input('tabela-dados', 'filter_query')]
+    )(update_tabela)
+    
+    app.callback(
+        [Output('link-exportar-csv', 'href'),
+         Output('link-exportar-parquet', 'href')],
+        [Input('filtro-diagnostico', 'value'),
+         Input('sexo-radio', 'value')]
+    )(atualizar_links_exportacao)
+    
+    app.callback(
+        Output('detalhes-paciente', 'children'),
+        [Input('tabela-dados', 'selected_row_ids')]
+    )(mostrar_detalhes_paciente)
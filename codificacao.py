@@ -0,0 +1,239 @@
+# Codificação das respostas: arrays binários nas figuras e compressão
+#
+# Arrays numéricos dos traces (x, y, customdata, width, marker.color...) são
+# enviados como arrays tipados em base64 ({dtype, bdata, shape}), formato
+# aceito pelo Plotly.js, em vez de um número decimal por ponto em JSON. Cada
+# array usa o menor dtype que representa os valores sem perda (int8 para
+# contagens pequenas, float32 para medidas com uma casa decimal...), o que
+# vale também para versões do Plotly que ainda serializam listas de texto.
+#
+# Só os atributos de dados dos traces (ATRIBUTOS_DADOS) são codificados;
+# atributos de layout que também são listas de números (domain.x de uma
+# pizza, por exemplo) ficam como estão, assim como 'ids', que o Plotly.js
+# trata como texto. Arrays curtos (abaixo de
+# config.ARRAYS_BINARIOS_MINIMO elementos) vão como listas de texto: o
+# cabeçalho {dtype, bdata} e o base64 de float64 custam mais do que poucos
+# números com duas casas.
+#
+# As respostas dos callbacks (/_dash-update-component) e o layout (que no
+# modo clientside leva os dados do dcc.Store) são comprimidos com brotli ou
+# gzip, conforme o Accept-Encoding do navegador, a partir de um tamanho
+# mínimo (config.COMPRESSAO_MINIMO_BYTES). O brotli é opcional: sem o pacote
+# instalado, apenas gzip é oferecido.
+
+import base64
+import gzip
+import zlib
+
+import numpy as np
+
+import config
+
+ROTAS_COMPRIMIDAS = ('/_dash-update-component', '/_dash-layout')
+
+NIVEL_GZIP = 6
+NIVEL_BROTLI = 5
+
+# Atributos de dados dos traces (data arrays do Plotly.js) codificados como
+# arrays tipados; um dict aninhado indica os atributos dentro daquele objeto
+ATRIBUTOS_DADOS = {
+    **dict.fromkeys((
+        'x', 'y', 'z', 'values', 'customdata', 'width', 'base', 'r', 'theta',
+        'lat', 'lon', 'open', 'high', 'low', 'close', 'a', 'b', 'c', 'u', 'v', 'w',
+        'i', 'j', 'k', 'intensity', 'surfacecolor', 'selectedpoints',
+    )),
+    'marker': {
+        **dict.fromkeys(('color', 'size', 'opacity', 'symbol')),
+        'line': dict.fromkeys(('color', 'width')),
+    },
+    'line': dict.fromkeys(('color', 'width')),
+    'error_x': dict.fromkeys(('array', 'arrayminus')),
+    'error_y': dict.fromkeys(('array', 'arrayminus')),
+}
+
+# dtypes inteiros aceitos pelo Plotly.js, do menor para o maior (sem 64 bits)
+_INTEIROS = tuple(np.dtype(t) for t in ('i1', 'u1', 'i2', 'u2', 'i4', 'u4'))
+
+
+def _tipo_compacto(arr):
+    """Menor dtype aceito pelo Plotly.js que representa `arr` sem perda, ou None"""
+    if arr.dtype.kind in 'iu':
+        if arr.size == 0:
+            return np.dtype('i1')
+        minimo, maximo = arr.min(), arr.max()
+        for dtype in _INTEIROS:
+            limites = np.iinfo(dtype)
+            if limites.min <= minimo and maximo <= limites.max:
+                return dtype
+        reduzido = arr.astype(np.float64)
+        return np.dtype('f8') if np.array_equal(reduzido, arr) else None
+    if arr.dtype.kind == 'f':
+        if arr.dtype.itemsize <= 4:
+            return np.dtype('f4')
+        reduzido = arr.astype(np.float32)
+        if np.array_equal(reduzido, arr, equal_nan=True):
+            return np.dtype('f4')
+        return np.dtype('f8')
+    return None
+
+
+def codificar_array(valores):
+    """Array tipado em base64 ({dtype, bdata[, shape]}) ou None se não for numérico"""
+    if isinstance(valores, (list, tuple)):
+        if not valores or not all(
+            isinstance(v, (int, float)) and not isinstance(v, bool) for v in valores
+        ):
+            return None
+        valores = np.asarray(valores)
+    if not isinstance(valores, np.ndarray) or valores.ndim not in (1, 2):
+        return None
+
+    dtype = _tipo_compacto(valores)
+    if dtype is None:
+        return None
+    arr = np.ascontiguousarray(valores, dtype=dtype.newbyteorder('<'))
+    codificado = {
+        'dtype': dtype.str.lstrip('<>|='),
+        'bdata': base64.b64encode(arr.tobytes()).decode('ascii'),
+    }
+    if arr.ndim == 2:
+        codificado['shape'] = f'{arr.shape[0]}, {arr.shape[1]}'
+    return codificado
+
+
+def _array_tipado(obj):
+    """ndarray de um array tipado {dtype, bdata[, shape]}"""
+    arr = np.frombuffer(base64.b64decode(obj['bdata']), dtype=np.dtype(obj['dtype']).newbyteorder('<'))
+    if 'shape' in obj:
+        arr = arr.reshape([int(d) for d in str(obj['shape']).split(',')])
+    return arr
+
+
+def _codificar_trace(trace, atributos=ATRIBUTOS_DADOS, minimo=0):
+    for chave, valor in trace.items():
+        if chave not in atributos:
+            continue
+        if isinstance(valor, dict) and 'bdata' in valor and 'dtype' in valor:
+            # ndarray já codificado pelo Plotly (to_dict), no dtype original
+            valor = _array_tipado(valor)
+        elif isinstance(valor, dict):
+            if isinstance(atributos[chave], dict):
+                _codificar_trace(valor, atributos[chave], minimo)
+            continue
+        if atributos[chave] is not None:
+            continue
+        if np.size(valor) < minimo:
+            # Curto: como lista de números (o Plotly codificaria o ndarray)
+            if isinstance(valor, np.ndarray):
+                trace[chave] = valor.tolist()
+            continue
+        codificado = codificar_array(valor)
+        if codificado is not None:
+            trace[chave] = codificado
+    return trace
+
+
+def figura(fig, minimo=None):
+    """Dicionário da figura com os arrays de dados dos traces em base64"""
+    fig = fig.to_dict() if hasattr(fig, 'to_dict') else fig
+    if config.ARRAYS_BINARIOS:
+        minimo = config.ARRAYS_BINARIOS_MINIMO if minimo is None else minimo
+        for trace in fig.get('data', ()):
+            _codificar_trace(trace, minimo=minimo)
+    return fig
+
+
+def decodificar(obj):
+    """
+    Inverso de `figura`: arrays tipados voltam a ser listas de números
+    (usado pelo benchmark para medir o tamanho em JSON de texto)
+    """
+    if isinstance(obj, dict):
+        if 'bdata' in obj and 'dtype' in obj:
+            return _array_tipado(obj).tolist()
+        return {chave: decodificar(valor) for chave, valor in obj.items()}
+    if isinstance(obj, list):
+        return [decodificar(valor) for valor in obj]
+    return obj
+
+
+# --- Compressão ---
+
+def _brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def codificacoes_disponiveis():
+    """Content-Encodings suportados, em ordem de preferência"""
+    return ('br', 'gzip') if _brotli() is not None else ('gzip',)
+
+
+def comprimir(corpo, codificacao):
+    """Corpo comprimido com 'br' ou 'gzip'"""
+    if codificacao == 'br':
+        return _brotli().compress(corpo, quality=NIVEL_BROTLI)
+    if codificacao == 'gzip':
+        return gzip.compress(corpo, compresslevel=NIVEL_GZIP, mtime=0)
+    raise ValueError(f'Codificação desconhecida: {codificacao}')
+
+
+class Compressor:
+    """
+    Compressão incremental com 'br' ou 'gzip', para respostas em streaming:
+    cada bloco é comprimido assim que fica pronto (memória constante).
+    """
+
+    def __init__(self, codificacao):
+        self.codificacao = codificacao
+        if codificacao == 'br':
+            self._brotli = _brotli().Compressor(quality=NIVEL_BROTLI)
+        elif codificacao == 'gzip':
+            # wbits=31: formato gzip (cabeçalho e CRC)
+            self._zlib = zlib.compressobj(NIVEL_GZIP, zlib.DEFLATED, 31)
+        else:
+            raise ValueError(f'Codificação desconhecida: {codificacao}')
+
+    def comprimir(self, dados):
+        if self.codificacao == 'br':
+            return self._brotli.process(dados)
+        return self._zlib.compress(dados)
+
+    def finalizar(self):
+        if self.codificacao == 'br':
+            return self._brotli.finish()
+        return self._zlib.flush()
+
+
+def _apos_requisicao(resposta):
+    import flask
+
+    if (flask.request.path not in ROTAS_COMPRIMIDAS or resposta.status_code != 200
+            or resposta.direct_passthrough or 'Content-Encoding' in resposta.headers):
+        return resposta
+    resposta.vary.add('Accept-Encoding')
+
+    corpo = resposta.get_data()
+    if len(corpo) < config.COMPRESSAO_MINIMO_BYTES:
+        return resposta
+    codificacao = flask.request.accept_encodings.best_match(codificacoes_disponiveis())
+    if codificacao is None:
+        return resposta
+
+    resposta.set_data(comprimir(corpo, codificacao))
+    resposta.headers['Content-Encoding'] = codificacao
+    return resposta
+
+
+def instalar(app):
+    """
+    Comprime as respostas do app. Chamar antes de metricas.instrumentar: o
+    Flask executa os after_request na ordem inversa do registro, e as
+    métricas medem o tamanho e o tempo de serialização sem a compressão.
+    """
+    if config.COMPRESSAO_MINIMO_BYTES > 0:
+        app.server.after_request(_apos_requisicao)
+    return app
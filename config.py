@@ -0,0 +1,136 @@
+# Configurações do dashboard
+# Todos os valores podem ser sobrescritos por variáveis de ambiente, o que
+# permite ajustar o comportamento em produção sem alterar o código.
+
+import os
+from pathlib import Path
+
+
+def _env_bool(nome, padrao=False):
+    """Lê uma variável de ambiente booleana ('1', 'true', 'sim', ...)"""
+    valor = os.environ.get(nome)
+    if valor is None:
+        return padrao
+    return valor.strip().lower() in ('1', 'true', 'sim', 'yes', 'on')
+
+
+# --- Snapshot local do dataset ---
+
+# Diretório onde os snapshots colunares do dataset são gravados
+DIRETORIO_CACHE = Path(os.environ.get(
+    'DASH_CACHE_DIR',
+    Path(__file__).resolve().parent / 'dados_cache'
+))
+
+# Modo offline: nunca acessa o UCI ML Repository, apenas o snapshot local
+MODO_OFFLINE = _env_bool('DASH_OFFLINE')
+
+
+# --- Recarga do snapshot (veja recarga.py) ---
+
+# Intervalo (s) entre as verificações de um novo snapshot em disco; 0 desliga
+RECARGA_INTERVALO = float(os.environ.get('DASH_RECARGA_INTERVALO', 30))
+
+# Baixa o dataset do UCI a cada verificação (grava nova versão se mudou)
+RECARGA_BAIXAR = _env_bool('DASH_RECARGA_BAIXAR')
+
+
+# --- Ingestão em blocos (veja ingestao.py) ---
+
+# Linhas mantidas no snapshot (tabela e detalhes) ao ingerir fontes grandes
+INGESTAO_AMOSTRA = int(os.environ.get('DASH_INGESTAO_AMOSTRA', 200_000))
+
+
+# --- Modelo de risco (veja risco.py) ---
+
+# Treina o classificador e mostra a probabilidade de doença na tabela
+RISCO = _env_bool('DASH_RISCO', True)
+
+# Classificador já treinado (joblib) usado no lugar do treino no snapshot
+RISCO_MODELO = os.environ.get('DASH_RISCO_MODELO') or None
+
+# Linhas sorteadas para o treino (0 = todas)
+RISCO_AMOSTRA_TREINO = int(os.environ.get('DASH_RISCO_AMOSTRA_TREINO', 100_000))
+
+# Tamanho máximo (MB) dos CSVs enviados para pontuação (rota /risco)
+RISCO_UPLOAD_MAX_MB = float(os.environ.get('DASH_RISCO_UPLOAD_MAX_MB', 50))
+
+
+# --- Exportação dos dados filtrados (veja exportacao.py) ---
+
+# Linhas por bloco gerado (a memória da exportação depende só deste valor)
+EXPORTACAO_BLOCO = int(os.environ.get('DASH_EXPORTACAO_BLOCO', 50_000))
+
+
+# --- Cache das figuras dos callbacks ---
+
+# Backend: 'memoria' (por processo), 'disco' (compartilhado) ou 'desligado'
+CACHE_FIGURAS = os.environ.get('DASH_CACHE_FIGURAS', 'memoria')
+
+# Limites do cache (número de itens vale apenas para o backend em memória)
+CACHE_FIGURAS_MAX_ITENS = int(os.environ.get('DASH_CACHE_FIGURAS_MAX_ITENS', 256))
+CACHE_FIGURAS_MAX_MB = int(os.environ.get('DASH_CACHE_FIGURAS_MAX_MB', 64))
+
+
+# --- Codificação das respostas (veja codificacao.py) ---
+
+# Arrays numéricos das figuras como arrays tipados em base64
+ARRAYS_BINARIOS = _env_bool('DASH_ARRAYS_BINARIOS', True)
+
+# Arrays com menos elementos que isto vão como listas de números (menores)
+ARRAYS_BINARIOS_MINIMO = int(os.environ.get('DASH_ARRAYS_BINARIOS_MINIMO', 256))
+
+# Comprime (brotli/gzip) respostas a partir deste tamanho em bytes; 0 desliga
+COMPRESSAO_MINIMO_BYTES = int(os.environ.get('DASH_COMPRESSAO_MINIMO_BYTES', 1024))
+
+
+# --- Aquecimento do cache (veja aquecimento.py) ---
+
+# Calcula as respostas de todas as combinações dos controles antes de o
+# servidor ficar pronto
+AQUECIMENTO = _env_bool('DASH_AQUECIMENTO', True)
+
+# Tempo máximo (s) do aquecimento; o restante é calculado sob demanda
+AQUECIMENTO_ORCAMENTO = float(os.environ.get('DASH_AQUECIMENTO_ORCAMENTO', 30))
+
+# Processos usados no aquecimento (1 = threads no próprio processo)
+AQUECIMENTO_PROCESSOS = int(os.environ.get('DASH_AQUECIMENTO_PROCESSOS', os.cpu_count() or 1))
+
+
+# --- Modo dos gráficos ---
+
+# 'auto' escolhe pelo tamanho do payload; 'cliente' ou 'servidor' forçam o modo
+MODO_GRAFICOS = os.environ.get('DASH_MODO_GRAFICOS', 'auto')
+
+# Tamanho máximo (MB) do dcc.Store com os dados para o modo clientside
+LIMITE_MODO_CLIENTE_MB = float(os.environ.get('DASH_LIMITE_CLIENTE_MB', 5))
+
+
+# --- Gráfico de dispersão (veja dispersao.py) ---
+
+# Acima deste número de pontos o gráfico usa WebGL (scattergl)
+DISPERSAO_LIMITE_WEBGL = int(os.environ.get('DASH_DISPERSAO_LIMITE_WEBGL', 5_000))
+
+# Acima deste número de pontos o gráfico vira uma grade de densidade 2D
+DISPERSAO_LIMITE_DENSIDADE = int(os.environ.get('DASH_DISPERSAO_LIMITE_DENSIDADE', 100_000))
+
+
+# --- Métricas ---
+
+# Mede os callbacks e expõe a rota /metrics (formato texto do Prometheus)
+METRICAS = _env_bool('DASH_METRICAS', True)
+
+# Habilita as rotas /metrics/perfil para ligar o perfilador por amostragem
+METRICAS_PERFIL = _env_bool('DASH_METRICAS_PERFIL')
+
+
+# --- Servidor de produção (gunicorn, veja servidor.py) ---
+
+# Endereço, processos e threads por processo
+SERVIDOR_ENDERECO = os.environ.get('DASH_ENDERECO', '0.0.0.0:8050')
+SERVIDOR_WORKERS = int(os.environ.get('DASH_WORKERS', os.cpu_count() or 1))
+SERVIDOR_THREADS = int(os.environ.get('DASH_THREADS', 4))
+SERVIDOR_TIMEOUT = int(os.environ.get('DASH_TIMEOUT', 60))
+
+# Carrega o snapshot no processo mestre antes do fork (memória compartilhada)
+SERVIDOR_PRELOAD = _env_bool('DASH_PRELOAD', True)
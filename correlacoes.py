@@ -0,0 +1,153 @@
+# Matriz de correlação de todas as colunas numéricas do dataset
+#
+# Pearson ou Spearman, por filtro de sexo. As linhas com valor ausente
+# ficam de fora apenas dos pares em que falta o valor (como em
+# DataFrame.corr). O cálculo usa os co-momentos de ingestao.Comomentos
+# sobre blocos de linhas montados dos arrays compactos das colunas: uma
+# multiplicação de matrizes (k x linhas) x (linhas x k) por bloco, sem
+# laços em Python por linha ou por par.
+#
+# Spearman é Pearson sobre os postos (médios, nos empates) de cada coluna;
+# os postos são calculados uma vez por coluna com os valores presentes.
+#
+# O custo O(n·k²) é pago uma vez por (método, sexo) e versão do snapshot
+# (servidor.preparar calcula todas as combinações). Em snapshots de uma
+# ingestão em blocos, Pearson vem dos co-momentos acumulados no resumo do
+# dataset completo; Spearman, que depende da ordem de todas as linhas, é
+# calculado na amostra.
+
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+
+import filtros
+import ingestao
+import metricas
+
+METODO_PEARSON = 'pearson'
+METODO_SPEARMAN = 'spearman'
+
+NOMES_METODOS = {
+    METODO_PEARSON: 'Pearson',
+    METODO_SPEARMAN: 'Spearman',
+}
+
+COLUNAS = ingestao.COLUNAS_COMOMENTOS
+
+ROTULOS = {
+    'age': 'Idade',
+    'sex': 'Sexo',
+    'cp': 'Tipo de dor',
+    'trestbps': 'Pressão arterial',
+    'chol': 'Colesterol',
+    'fbs': 'Glicemia > 120',
+    'restecg': 'ECG em repouso',
+    'thalach': 'FC máxima',
+    'exang': 'Angina no exercício',
+    'oldpeak': 'Depressão ST',
+    'slope': 'Inclinação ST',
+    'ca': 'Vasos (fluoroscopia)',
+    'thal': 'Talassemia',
+    'has_disease': 'Doença cardíaca',
+}
+
+# Linhas por bloco do produto de matrizes (limita a memória temporária)
+TAMANHO_BLOCO = 262_144
+
+
+@dataclass(frozen=True)
+class Matriz:
+    """Correlações entre as colunas e o número de linhas usado"""
+    colunas: tuple
+    valores: np.ndarray
+    linhas: int
+    metodo: str
+    completo: bool = False   # True quando vem do resumo do dataset completo
+
+
+def postos(valores):
+    """Postos (1..n, média nos empates) dos valores presentes; NaN continua NaN"""
+    valores = np.asarray(valores, dtype=np.float64)
+    saida = np.full(len(valores), np.nan)
+    presentes = ~np.isnan(valores)
+    # Colunas compactas têm poucos valores distintos: posto por valor distinto
+    distintos, inverso, contagens = np.unique(valores[presentes], return_inverse=True, return_counts=True)
+    fim = np.cumsum(contagens)
+    saida[presentes] = (fim - (contagens - 1) / 2)[inverso]
+    return saida
+
+
+def colunas_disponiveis(df):
+    return tuple(coluna for coluna in COLUNAS if coluna in df.columns)
+
+
+def calcular(indice, metodo=METODO_PEARSON, sexo=filtros.TODOS, tamanho_bloco=TAMANHO_BLOCO):
+    """Matriz de correlação das linhas filtradas (sem cache)"""
+    if metodo not in NOMES_METODOS:
+        raise ValueError(f'Método de correlação desconhecido: {metodo}')
+    colunas = colunas_disponiveis(indice.df)
+    arrays = [indice.coluna(coluna, sexo=sexo) for coluna in colunas]
+    if metodo == METODO_SPEARMAN:
+        arrays = [postos(arr) for arr in arrays]
+
+    linhas = len(arrays[0]) if arrays else 0
+    comomentos = ingestao.Comomentos()
+    for inicio in range(0, linhas, tamanho_bloco):
+        bloco = np.column_stack([
+            arr[inicio:inicio + tamanho_bloco].astype(np.float64, copy=False) for arr in arrays
+        ])
+        comomentos.acumular(bloco)
+    if comomentos.n is None:
+        return None
+    return _matriz(colunas, comomentos, linhas, metodo)
+
+
+def _matriz(colunas, comomentos, linhas, metodo, completo=False):
+    valores = comomentos.correlacao()
+    valores.flags.writeable = False
+    return Matriz(colunas=tuple(colunas), valores=valores, linhas=int(linhas), metodo=metodo,
+                  completo=completo)
+
+
+def _do_resumo(snap, sexo):
+    """Pearson do dataset completo a partir do resumo da ingestão, ou None"""
+    resumo = ingestao.resumo(snap)
+    if resumo is None or resumo.linhas <= len(snap.df):
+        return None
+    comomentos = resumo.comomentos(sexo)
+    if comomentos is None:
+        return None
+    # Linhas do grupo: n[i, i] de uma coluna sem ausentes (has_disease)
+    linhas = comomentos.n[-1, -1]
+    return _matriz(COLUNAS, comomentos, linhas, METODO_PEARSON, completo=True)
+
+
+class CacheCorrelacoes:
+    """Matrizes de correlação de um snapshot por (método, sexo)"""
+
+    def __init__(self, snap):
+        self.snap = snap
+        self.indice = filtros.indice(snap)
+        self._itens = {}
+        self._lock = threading.Lock()
+
+    def obter(self, metodo=METODO_PEARSON, sexo=filtros.TODOS):
+        chave = (metodo, filtros._chave(sexo))
+        try:
+            return self._itens[chave]
+        except KeyError:
+            pass
+        with metricas.fase('agregacao'):
+            matriz_calculada = None
+            if metodo == METODO_PEARSON:
+                matriz_calculada = _do_resumo(self.snap, sexo)
+            if matriz_calculada is None:
+                matriz_calculada = calcular(self.indice, metodo, sexo)
+        with self._lock:
+            return self._itens.setdefault(chave, matriz_calculada)
+
+
+def matriz(snap, metodo=METODO_PEARSON, sexo=filtros.TODOS):
+    """Matriz de correlação em cache para o snapshot"""
+    return snap.derivado('correlacoes', CacheCorrelacoes).obter(metodo, sexo)
@@ -0,0 +1,185 @@
+# Cubo de contagens das variáveis categóricas
+#
+# Uma única passada sobre os dados conta as linhas de cada combinação de
+# sex × cp × fbs × restecg × exang × slope × ca × thal × has_disease. Os
+# cards de KPI, o gráfico de pizza e o gráfico de tipos de dor passam a ser
+# fatias desse cubo (somas sobre eixos), sem reler as linhas do dataset.
+#
+# Cada eixo tem as categorias conhecidas do dataset mais uma posição final
+# para valores ausentes ou fora do domínio.
+
+import numpy as np
+import pandas as pd
+
+import filtros
+import metricas
+
+# Domínio de cada variável categórica do dataset UCI (na ordem dos eixos)
+CATEGORIAS = {
+    'sex': (0, 1),
+    'cp': (1, 2, 3, 4),
+    'fbs': (0, 1),
+    'restecg': (0, 1, 2),
+    'exang': (0, 1),
+    'slope': (1, 2, 3),
+    'ca': (0, 1, 2, 3),
+    'thal': (3, 6, 7),
+    'has_disease': (0, 1),
+}
+
+# Rótulo da posição de valores ausentes/desconhecidos em cada eixo
+AUSENTE = None
+
+# Linhas processadas por vez ao montar o cubo (limita a memória temporária)
+TAMANHO_BLOCO = 1_000_000
+
+# Proteção contra cubos grandes demais para a memória
+MAX_CELULAS = 10_000_000
+
+
+class CuboCategorico:
+    """Contagens sobre o produto cartesiano das variáveis categóricas"""
+
+    def __init__(self, categorias=None):
+        categorias = categorias or CATEGORIAS
+        self.dimensoes = tuple(categorias)
+        self.categorias = {
+            dim: tuple(cats) + (AUSENTE,) for dim, cats in categorias.items()
+        }
+        self.forma = tuple(len(self.categorias[dim]) for dim in self.dimensoes)
+        if np.prod(self.forma, dtype=np.int64) > MAX_CELULAS:
+            raise ValueError(f'Cubo com células demais: {self.forma}')
+        self.contagens = np.zeros(self.forma, dtype=np.int64)
+
+    @classmethod
+    def de_dataframe(cls, df, categorias=None):
+        """Monta o cubo com uma passada em blocos sobre o DataFrame"""
+        cubo = cls(categorias)
+        for inicio in range(0, len(df), TAMANHO_BLOCO):
+            cubo.acumular(df.iloc[inicio:inicio + TAMANHO_BLOCO])
+        cubo.contagens.flags.writeable = False
+        return cubo
+
+    def _codigos(self, dim, valores):
+        cats = np.array(self.categorias[dim][:-1], dtype=float)
+        valores = np.asarray(valores, dtype=float)
+        codigos = np.searchsorted(cats, valores)
+        # Valores ausentes ou fora do domínio vão para a última posição
+        fora = (codigos >= len(cats)) | (cats[np.minimum(codigos, len(cats) - 1)] != valores)
+        codigos[fora] = len(cats)
+        return codigos
+
+    def acumular(self, df):
+        """Soma as linhas de um bloco de dados às contagens do cubo"""
+        codigos = [self._codigos(dim, df[dim].to_numpy()) for dim in self.dimensoes]
+        combinados = np.ravel_multi_index(codigos, self.forma)
+        self.contagens += np.bincount(
+            combinados, minlength=self.contagens.size
+        ).reshape(self.forma)
+
+    def _eixo(self, dim):
+        try:
+            return self.dimensoes.index(dim)
+        except ValueError:
+            raise KeyError(f'Dimensão inexistente no cubo: {dim}')
+
+    def _fatia(self, dims, filtro):
+        with metricas.fase('agregacao'):
+            return self._fatia_contagens(dims, filtro)
+
+    def _fatia_contagens(self, dims, filtro):
+        indices = [slice(None)] * len(self.dimensoes)
+        mantidas = [self.categorias[dim] for dim in self.dimensoes]
+        for dim, valor in filtro.items():
+            if valor is None or valor == filtros.TODOS:
+                continue
+            eixo = self._eixo(dim)
+            chave = filtros._chave(valor)
+            if chave not in self.categorias[dim]:
+                # Valor fora do domínio: nenhuma linha
+                indices[eixo] = slice(0, 0)
+                mantidas[eixo] = ()
+            else:
+                i = self.categorias[dim].index(chave)
+                indices[eixo] = slice(i, i + 1)
+                mantidas[eixo] = (chave,)
+        sub = self.contagens[tuple(indices)]
+
+        eixos = [self._eixo(dim) for dim in dims]
+        resto = tuple(e for e in range(len(self.dimensoes)) if e not in eixos)
+        sub = sub.sum(axis=resto)
+        # Após a soma os eixos restantes estão em ordem crescente
+        ordem = np.argsort(np.argsort(eixos))
+        if len(eixos) > 1:
+            sub = np.transpose(sub, ordem)
+        return sub, [mantidas[e] for e in eixos]
+
+    def fatia(self, dims=(), **filtro):
+        """
+        Contagens agregadas nas dimensões `dims` (nessa ordem), restritas aos
+        valores em `filtro` (ex.: sex=1). Valores 'all' não filtram. Um eixo
+        filtrado mantém apenas a categoria selecionada.
+        """
+        return self._fatia(dims, filtro)[0]
+
+    def total(self, **filtro):
+        """Número de linhas que passam pelo filtro"""
+        return int(self.fatia((), **filtro))
+
+    def tabela(self, dims, incluir_ausentes=False, **filtro):
+        """Fatia como DataFrame longo (uma linha por combinação não vazia)"""
+        contagens, categorias = self._fatia(dims, filtro)
+        indice = pd.MultiIndex.from_product(categorias, names=list(dims))
+        tabela = pd.DataFrame({'count': contagens.reshape(-1)}, index=indice).reset_index()
+        tabela = tabela[tabela['count'] > 0]
+        if not incluir_ausentes:
+            tabela = tabela.dropna(subset=list(dims))
+            # Sem a categoria ausente os códigos voltam a ser inteiros
+            for dim in dims:
+                if tabela[dim].dtype.kind == 'f':
+                    tabela[dim] = tabela[dim].astype(np.int64)
+        return tabela.reset_index(drop=True)
+
+    def agrupar(self, dim, novo_nome, mapa):
+        """
+        Novo cubo em que a dimensão `dim` é substituída por `novo_nome`, com
+        as categorias agrupadas segundo `mapa` (categoria antiga -> nova).
+        Não relê os dados: as contagens são somadas ao longo do eixo.
+        """
+        eixo = self._eixo(dim)
+        novas = tuple(dict.fromkeys(v for v in mapa.values() if v is not AUSENTE))
+
+        categorias = {}
+        for d in self.dimensoes:
+            if d == dim:
+                categorias[novo_nome] = novas
+            else:
+                categorias[d] = self.categorias[d][:-1]
+        novo = CuboCategorico(categorias)
+
+        destino = [
+            novas.index(mapa[c]) if mapa.get(c, AUSENTE) is not AUSENTE else len(novas)
+            for c in self.categorias[dim]
+        ]
+        fatias = np.moveaxis(self.contagens, eixo, 0)
+        acumulado = np.zeros((len(novas) + 1,) + fatias.shape[1:], dtype=np.int64)
+        np.add.at(acumulado, destino, fatias)
+        novo.contagens = np.moveaxis(acumulado, 0, eixo)
+        novo.contagens.flags.writeable = False
+        return novo
+
+
+def _montar(snap):
+    # Snapshot de uma ingestão em blocos: o cubo do dataset completo já vem
+    # pronto no resumo (as linhas do snapshot são apenas uma amostra)
+    import ingestao
+
+    resumo = ingestao.resumo(snap)
+    if resumo is not None:
+        return resumo.cubo
+    return CuboCategorico.de_dataframe(snap.df)
+
+
+def cubo(snap):
+    """Cubo categórico do snapshot (calculado uma vez por versão)"""
+    return snap.derivado('cubo', _montar)
@@ -0,0 +1,143 @@
+# Modo de renderização do gráfico de dispersão idade x frequência cardíaca
+#
+# Um marcador SVG por paciente funciona para algumas centenas de pontos, mas
+# trava o navegador e infla a resposta com centenas de milhares. O modo é
+# escolhido pelo número de pontos após o filtro:
+#
+#   svg         até config.DISPERSAO_LIMITE_WEBGL pontos
+#   webgl       scattergl, até config.DISPERSAO_LIMITE_DENSIDADE pontos
+#   densidade   grade 2D calculada no servidor (np.histogram2d por classe
+#               de 'has_disease'), desenhada como mapa de calor e contornos
+#
+# No modo densidade o tamanho da figura depende apenas da grade, não do
+# número de linhas. As grades ficam em cache por snapshot e filtro de sexo.
+
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+
+import config
+import filtros
+import histograma
+import metricas
+
+MODO_SVG = 'svg'
+MODO_WEBGL = 'webgl'
+MODO_DENSIDADE = 'densidade'
+
+NOMES_MODOS = {
+    MODO_SVG: 'SVG',
+    MODO_WEBGL: 'WebGL',
+    MODO_DENSIDADE: 'densidade 2D',
+}
+
+COLUNA_X = 'age'
+COLUNA_Y = 'thalach'
+
+# Células da grade em cada eixo
+NBINS_GRADE = 60
+
+
+def modo(pontos, limite_webgl=None, limite_densidade=None):
+    """Modo de renderização para `pontos` pontos"""
+    limite_webgl = config.DISPERSAO_LIMITE_WEBGL if limite_webgl is None else limite_webgl
+    limite_densidade = config.DISPERSAO_LIMITE_DENSIDADE if limite_densidade is None else limite_densidade
+    if pontos > limite_densidade:
+        return MODO_DENSIDADE
+    if pontos > limite_webgl:
+        return MODO_WEBGL
+    return MODO_SVG
+
+
+@dataclass(frozen=True)
+class Grade:
+    """Contagens por célula (x, y) para cada classe de 'has_disease'"""
+    bordas_x: np.ndarray
+    bordas_y: np.ndarray
+    contagens: dict
+    total: int
+
+    @property
+    def centros_x(self):
+        return (self.bordas_x[:-1] + self.bordas_x[1:]) / 2
+
+    @property
+    def centros_y(self):
+        return (self.bordas_y[:-1] + self.bordas_y[1:]) / 2
+
+
+def bordas_inteiras(minimo, maximo, nbins):
+    """
+    Bordas em k - 0.5 com largura inteira (>= 1) para uma coluna de inteiros:
+    cada célula cobre o mesmo número de valores possíveis, então nenhuma
+    fica vazia só pelo alinhamento (no máximo `nbins` células)
+    """
+    valores_possiveis = int(maximo - minimo) + 1
+    largura = -(-valores_possiveis // nbins)
+    celulas = -(-valores_possiveis // largura)
+    return minimo - 0.5 + largura * np.arange(celulas + 1, dtype=np.float64)
+
+
+def _bordas(valores, nbins):
+    validos = valores[~np.isnan(valores)]
+    if len(validos) == 0:
+        return None
+    if np.array_equal(validos, np.floor(validos)):
+        # Bins de linspace sobre inteiros (idade) deixam colunas vazias na grade
+        return bordas_inteiras(float(validos.min()), float(validos.max()), nbins)
+    return histograma.calcular_bordas(validos, histograma.REGRA_FIXA, nbins)
+
+
+def calcular(indice, sexo=filtros.TODOS, nbins=NBINS_GRADE):
+    """Grade de densidade das linhas filtradas (sem cache)"""
+    # Bordas do snapshot inteiro: a grade não muda de escala com o filtro
+    bordas_x = _bordas(indice.coluna(COLUNA_X).astype(float, copy=False), nbins)
+    bordas_y = _bordas(indice.coluna(COLUNA_Y).astype(float, copy=False), nbins)
+    if bordas_x is None or bordas_y is None:
+        return None
+
+    x = indice.coluna(COLUNA_X, sexo=sexo).astype(float, copy=False)
+    y = indice.coluna(COLUNA_Y, sexo=sexo).astype(float, copy=False)
+    classes = indice.coluna('has_disease', sexo=sexo)
+
+    validos = ~(np.isnan(x) | np.isnan(y))
+    if not validos.all():
+        x, y, classes = x[validos], y[validos], classes[validos]
+
+    contagens = {}
+    for classe in histograma.CLASSES:
+        selecionadas = classes == classe
+        contagem, _, _ = np.histogram2d(x[selecionadas], y[selecionadas], bins=(bordas_x, bordas_y))
+        # Plotly espera z[linha = y][coluna = x]
+        contagem = np.ascontiguousarray(contagem.T.astype(np.int64))
+        contagem.flags.writeable = False
+        contagens[classe] = contagem
+    bordas_x.flags.writeable = False
+    bordas_y.flags.writeable = False
+    return Grade(bordas_x=bordas_x, bordas_y=bordas_y, contagens=contagens, total=int(len(x)))
+
+
+class CacheGrades:
+    """Grades de densidade de um snapshot por (sexo, nbins)"""
+
+    def __init__(self, snap):
+        self.indice = filtros.indice(snap)
+        self._itens = {}
+        self._lock = threading.Lock()
+
+    def obter(self, sexo=filtros.TODOS, nbins=NBINS_GRADE):
+        chave = (filtros._chave(sexo), nbins)
+        try:
+            return self._itens[chave]
+        except KeyError:
+            pass
+        with metricas.fase('agregacao'):
+            grade_calculada = calcular(self.indice, sexo, nbins)
+        with self._lock:
+            return self._itens.setdefault(chave, grade_calculada)
+
+
+def grade(snap, sexo=filtros.TODOS, nbins=NBINS_GRADE):
+    """Grade de densidade em cache para o snapshot"""
+    return snap.derivado('grades_dispersao', CacheGrades).obter(sexo, nbins)
@@ -0,0 +1,168 @@
+# Esquema compacto das colunas do dataset
+#
+# O dataset do UCI chega com colunas float64/int64 e os rótulos de texto
+# eram guardados como objetos Python (um por linha). O esquema define, por
+# coluna, o menor dtype que representa os valores sem perda:
+#
+#   códigos categóricos           int8       (sex, cp, fbs, restecg, ...)
+#   medidas inteiras              uint8/int16 (age, trestbps, chol, thalach)
+#   medidas decimais e com NaN    float32    (oldpeak, ca, thal)
+#
+# Os rótulos (sex_label, cp_label) não são gravados no snapshot: são
+# colunas pandas Categorical montadas na leitura a partir dos códigos, com
+# 1 byte por linha e uma única string por categoria.
+#
+# Relatório de bytes por linha (formato antigo x compacto):
+#
+#   python esquema.py              # dados sintéticos, 100 mil linhas
+#   python esquema.py --snapshot   # snapshot em uso
+
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+MAPA_SEXO = {0: 'Feminino', 1: 'Masculino'}
+MAPA_DOR = {
+    1: 'Angina típica',
+    2: 'Angina atípica',
+    3: 'Dor não-anginosa',
+    4: 'Assintomático'
+}
+
+# dtype de cada coluna gravada; colunas fora do esquema mantêm o dtype
+TIPOS = {
+    'patient_id': np.dtype(np.int32),
+    'age': np.dtype(np.uint8),
+    'sex': np.dtype(np.int8),
+    'cp': np.dtype(np.int8),
+    'trestbps': np.dtype(np.int16),
+    'chol': np.dtype(np.int16),
+    'fbs': np.dtype(np.int8),
+    'restecg': np.dtype(np.int8),
+    'thalach': np.dtype(np.int16),
+    'exang': np.dtype(np.int8),
+    # Depressão ST tem uma casa decimal: float32 basta
+    'oldpeak': np.dtype(np.float32),
+    'slope': np.dtype(np.int8),
+    # ca e thal têm valores ausentes (NaN)
+    'ca': np.dtype(np.float32),
+    'thal': np.dtype(np.float32),
+    'target': np.dtype(np.int8),
+    'has_disease': np.dtype(np.int8),
+}
+
+# Rótulos montados a partir dos códigos: coluna -> (coluna de origem, mapa)
+ROTULOS = {
+    'sex_label': ('sex', MAPA_SEXO),
+    'cp_label': ('cp', MAPA_DOR),
+}
+
+
+class EsquemaInvalido(ValueError):
+    """Valores que não cabem no dtype do esquema"""
+
+
+def converter(serie):
+    """Array da coluna no dtype do esquema (verificando se os valores cabem)"""
+    dtype = TIPOS.get(serie.name)
+    if dtype is None:
+        return serie.to_numpy()
+    valores = serie.to_numpy()
+    if valores.dtype == dtype:
+        return valores
+
+    if dtype.kind in 'iu':
+        if valores.dtype.kind == 'f':
+            if np.isnan(valores).any():
+                raise EsquemaInvalido(f'Coluna {serie.name} tem valores ausentes; esperado {dtype}')
+            if not np.array_equal(valores, np.round(valores)):
+                raise EsquemaInvalido(f'Coluna {serie.name} tem valores não inteiros; esperado {dtype}')
+        if len(valores):
+            limites = np.iinfo(dtype)
+            if valores.min() < limites.min or valores.max() > limites.max:
+                raise EsquemaInvalido(
+                    f'Coluna {serie.name} fora do intervalo de {dtype} '
+                    f'({valores.min()}..{valores.max()})'
+                )
+    return valores.astype(dtype)
+
+
+def rotulo(nome, codigos):
+    """Coluna Categorical do rótulo `nome` a partir dos códigos de origem"""
+    _, mapa = ROTULOS[nome]
+    codigos = np.asarray(codigos)
+    indices = np.full(len(codigos), -1, dtype=np.int8)
+    for i, chave in enumerate(mapa):
+        indices[codigos == chave] = i
+    return pd.Categorical.from_codes(indices, categories=list(mapa.values()))
+
+
+def adicionar_rotulos(df):
+    """Adiciona (in-place) as colunas de rótulo a partir dos códigos"""
+    for nome, (origem, _) in ROTULOS.items():
+        df[nome] = rotulo(nome, df[origem].to_numpy())
+    return df
+
+
+def compactar(df):
+    """DataFrame com as colunas no esquema compacto e rótulos Categorical"""
+    colunas = {
+        nome: converter(df[nome]) for nome in df.columns if nome not in ROTULOS
+    }
+    compacto = pd.DataFrame(colunas, index=df.index, copy=False)
+    return adicionar_rotulos(compacto)
+
+
+def bytes_por_linha(df):
+    """Bytes por linha de cada coluna (incluindo objetos Python)"""
+    linhas = max(len(df), 1)
+    uso = df.memory_usage(index=False, deep=True)
+    return {nome: uso[nome] / linhas for nome in df.columns}
+
+
+def relatorio(antes, depois):
+    """Tabela de bytes por linha por coluna, antes e depois"""
+    b_antes, b_depois = bytes_por_linha(antes), bytes_por_linha(depois)
+    linhas = [f"{'coluna':<14}{'antes':>10}{'depois':>10}   dtype"]
+    for nome in antes.columns:
+        if nome in b_depois:
+            linhas.append(f"{nome:<14}{b_antes[nome]:>10.1f}{b_depois[nome]:>10.1f}   "
+                          f"{antes[nome].dtype} -> {depois[nome].dtype}")
+    total_antes, total_depois = sum(b_antes.values()), sum(b_depois.values())
+    linhas.append(f"{'total':<14}{total_antes:>10.1f}{total_depois:>10.1f}   "
+                  f"({total_antes / total_depois:.1f}x menor)")
+    return '\n'.join(linhas)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Bytes por linha no esquema antigo e no compacto')
+    parser.add_argument('--linhas', type=int, default=100_000)
+    parser.add_argument('--snapshot', action='store_true', help='usa o snapshot em uso em vez de dados sintéticos')
+    args = parser.parse_args(argv)
+
+    import sintetico
+    import snapshot
+
+    if args.snapshot:
+        depois = snapshot.ler().df
+        # Formato antigo: tipos do UCI e rótulos como objetos Python
+        antes = depois.astype({n: (np.int64 if d.kind in 'iu' else np.float64)
+                               for n, d in depois.dtypes.items() if d.kind in 'iuf'})
+        for nome in ROTULOS:
+            antes[nome] = antes[nome].astype(object)
+    else:
+        antes = sintetico.gerar(args.linhas, derivar=False)
+        antes.insert(0, 'patient_id', np.arange(1, len(antes) + 1, dtype=np.int64))
+        antes['has_disease'] = (antes['target'] > 0).astype(np.int64)
+        for nome, (origem, mapa) in ROTULOS.items():
+            antes[nome] = antes[origem].map(mapa)
+        depois = compactar(antes)
+
+    print(relatorio(antes, depois))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
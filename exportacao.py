@@ -0,0 +1,205 @@
+# Exportação dos pacientes filtrados em CSV ou Parquet
+#
+# A rota GET /exportar devolve as linhas do filtro de diagnóstico e de sexo
+# (os mesmos controles do dashboard) com todas as colunas do snapshot e a
+# probabilidade do modelo de risco. O arquivo é gerado em streaming: as
+# linhas são lidas do snapshot em blocos de config.EXPORTACAO_BLOCO, cada
+# bloco é convertido e enviado antes do próximo, então a memória usada não
+# depende do tamanho do resultado.
+#
+#   /exportar?formato=csv&diagnostico=1&sexo=all
+#   /exportar?formato=parquet&sexo=0
+#
+# O CSV é comprimido em streaming com brotli ou gzip conforme o
+# Accept-Encoding (codificacao.Compressor). O Parquet já é comprimido por
+# coluna (snappy) e exige o pacote opcional pyarrow; cada bloco vira um row
+# group gravado assim que fica pronto.
+
+import numpy as np
+
+import config
+import filtros
+import risco
+
+ROTA_EXPORTAR = '/exportar'
+
+FORMATO_CSV = 'csv'
+FORMATO_PARQUET = 'parquet'
+
+TIPOS_CONTEUDO = {
+    FORMATO_CSV: 'text/csv; charset=utf-8',
+    FORMATO_PARQUET: 'application/vnd.apache.parquet',
+}
+
+
+class ExportacaoInvalida(ValueError):
+    """Parâmetros de exportação inválidos ou formato indisponível"""
+
+
+def _valor_filtro(valor):
+    """'all' (ou ausente) -> filtros.TODOS; '0'/'1' -> código inteiro"""
+    if valor in (None, '', filtros.TODOS):
+        return filtros.TODOS
+    try:
+        return int(valor)
+    except ValueError:
+        raise ExportacaoInvalida(f'Valor de filtro inválido: {valor}')
+
+
+def blocos(snap, sexo=filtros.TODOS, diagnostico=filtros.TODOS, tamanho_bloco=None):
+    """
+    DataFrames de no máximo `tamanho_bloco` linhas com as linhas do filtro.
+    Sem nenhuma linha, um único bloco vazio com as colunas (o CSV ainda tem
+    cabeçalho e o Parquet, o esquema).
+    """
+    tamanho_bloco = tamanho_bloco or config.EXPORTACAO_BLOCO
+    posicoes = filtros.indice(snap).posicoes(sexo, diagnostico)
+    total = len(snap.df) if posicoes is None else len(posicoes)
+    probabilidades = risco.coluna(snap)
+
+    for inicio in range(0, max(total, 1), tamanho_bloco):
+        fim = min(inicio + tamanho_bloco, total)
+        # Sem filtro, uma fatia contígua dos memmaps; com filtro, as posições do bloco
+        selecao = slice(inicio, fim) if posicoes is None else posicoes[inicio:fim]
+        bloco = snap.df.iloc[selecao].reset_index(drop=True)
+        if probabilidades is not None:
+            bloco[risco.COLUNA_RISCO] = np.round(probabilidades[selecao].astype(float), 4)
+        yield bloco
+
+
+def csv(blocos_df):
+    """Bytes do CSV, bloco a bloco (cabeçalho apenas no primeiro)"""
+    for i, bloco in enumerate(blocos_df):
+        yield bloco.to_csv(index=False, header=(i == 0)).encode('utf-8')
+
+
+class _Saida:
+    """Arquivo de escrita que acumula os bytes até serem retirados"""
+
+    def __init__(self):
+        self._partes = []
+        self._posicao = 0
+        self.closed = False
+
+    def write(self, dados):
+        self._partes.append(bytes(dados))
+        self._posicao += len(dados)
+        return len(dados)
+
+    def tell(self):
+        return self._posicao
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def retirar(self):
+        dados = b''.join(self._partes)
+        self._partes = []
+        return dados
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ExportacaoInvalida('Exportação em Parquet requer o pacote pyarrow (pip install pyarrow)')
+    return pa, pq
+
+
+def parquet(blocos_df):
+    """Bytes do Parquet, um row group por bloco"""
+    pa, pq = _pyarrow()
+    saida = _Saida()
+    escritor = None
+    try:
+        for bloco in blocos_df:
+            tabela = pa.Table.from_pandas(bloco, preserve_index=False)
+            if escritor is None:
+                escritor = pq.ParquetWriter(pa.PythonFile(saida, mode='w'), tabela.schema)
+            escritor.write_table(tabela)
+            yield saida.retirar()
+    finally:
+        if escritor is not None:
+            # Rodapé com os metadados dos row groups
+            escritor.close()
+    yield saida.retirar()
+
+
+def comprimir(partes, codificacao):
+    """Aplica a compressão em streaming a uma sequência de bytes"""
+    import codificacao as modulo_codificacao
+
+    compressor = modulo_codificacao.Compressor(codificacao)
+    for parte in partes:
+        comprimido = compressor.comprimir(parte)
+        if comprimido:
+            yield comprimido
+    yield compressor.finalizar()
+
+
+def exportar(snap, formato=FORMATO_CSV, sexo=filtros.TODOS, diagnostico=filtros.TODOS,
+             codificacao=None, tamanho_bloco=None):
+    """Gerador com os bytes do arquivo exportado (comprimido se `codificacao`)"""
+    if formato == FORMATO_CSV:
+        partes = csv(blocos(snap, sexo, diagnostico, tamanho_bloco))
+    elif formato == FORMATO_PARQUET:
+        _pyarrow()
+        partes = parquet(blocos(snap, sexo, diagnostico, tamanho_bloco))
+    else:
+        raise ExportacaoInvalida(f'Formato não suportado: {formato} (use csv ou parquet)')
+    return comprimir(partes, codificacao) if codificacao else partes
+
+
+def nome_arquivo(snap, formato, sexo=filtros.TODOS, diagnostico=filtros.TODOS):
+    partes = ['pacientes', snap.versao]
+    if sexo != filtros.TODOS:
+        partes.append(f'sexo{sexo}')
+    if diagnostico != filtros.TODOS:
+        partes.append(f'diagnostico{diagnostico}')
+    return '-'.join(partes) + f'.{formato}'
+
+
+def href(formato, diagnostico=filtros.TODOS, sexo=filtros.TODOS):
+    """Link de download para os filtros do dashboard"""
+    return f'{ROTA_EXPORTAR}?formato={formato}&diagnostico={diagnostico}&sexo={sexo}'
+
+
+def _rota_exportar():
+    import flask
+
+    import codificacao
+    import snapshot
+
+    argumentos = flask.request.args
+    formato = argumentos.get('formato', FORMATO_CSV)
+    try:
+        sexo = _valor_filtro(argumentos.get('sexo'))
+        diagnostico = _valor_filtro(argumentos.get('diagnostico'))
+        # Parquet já vem comprimido: Content-Encoding apenas no CSV
+        escolhida = None
+        if formato == FORMATO_CSV:
+            escolhida = flask.request.accept_encodings.best_match(codificacao.codificacoes_disponiveis())
+        # A mesma versão do snapshot do primeiro ao último bloco
+        snap = snapshot.atual()
+        corpo = exportar(snap, formato, sexo, diagnostico, escolhida)
+    except ExportacaoInvalida as e:
+        return flask.jsonify(erro=str(e)), 400
+
+    resposta = flask.Response(flask.stream_with_context(corpo), content_type=TIPOS_CONTEUDO[formato])
+    resposta.headers['Content-Disposition'] = (
+        f'attachment; filename="{nome_arquivo(snap, formato, sexo, diagnostico)}"'
+    )
+    resposta.vary.add('Accept-Encoding')
+    if escolhida:
+        resposta.headers['Content-Encoding'] = escolhida
+    return resposta
+
+
+def instalar(app):
+    """Adiciona a rota de exportação ao servidor Flask do app"""
+    app.server.add_url_rule(ROTA_EXPORTAR, 'exportar', _rota_exportar)
+    return app
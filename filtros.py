@@ -0,0 +1,149 @@
+# Visões filtradas somente leitura sobre o frame base do snapshot
+#
+# Os callbacks não copiam mais o DataFrame inteiro a cada interação: as
+# máscaras de 'sex' e 'has_disease' são calculadas uma vez por snapshot e as
+# posições de cada combinação de filtros ficam em cache. Cada callback recebe
+# apenas as colunas de que precisa, reunidas com `take` sobre o frame base,
+# que permanece congelado (arrays somente leitura).
+
+import numpy as np
+import pandas as pd
+
+import metricas
+
+# Colunas com máscaras pré-calculadas e o parâmetro de filtro correspondente
+COLUNAS_FILTRO = {
+    'sexo': 'sex',
+    'diagnostico': 'has_disease',
+}
+
+TODOS = 'all'
+
+
+class IndiceFiltros:
+    """Máscaras por valor de 'sex' e 'has_disease' e posições por combinação"""
+
+    def __init__(self, df):
+        self.df = df
+        self.total = len(df)
+        self._mascaras = {}
+        for coluna in COLUNAS_FILTRO.values():
+            valores = df[coluna].to_numpy()
+            mascaras = {}
+            for valor in pd.unique(df[coluna].dropna()):
+                mascara = valores == valor
+                mascara.flags.writeable = False
+                mascaras[_chave(valor)] = mascara
+            self._mascaras[coluna] = mascaras
+        self._posicoes = {}
+        # Resultado compartilhado para valores de filtro fora do dataset
+        self._vazio = np.empty(0, dtype=np.int32 if self.total < 2**31 else np.int64)
+        self._vazio.flags.writeable = False
+
+    def _chave_conhecida(self, coluna, valor):
+        """Chave normalizada do filtro, ou None quando o valor não existe no dataset"""
+        chave = _chave(valor)
+        if chave == TODOS:
+            return TODOS
+        try:
+            return chave if chave in self._mascaras[coluna] else None
+        except TypeError:
+            # Valor não hashable vindo do navegador (lista, dict...)
+            return None
+
+    def mascara(self, coluna, valor):
+        """Máscara booleana somente leitura (None quando não há filtro)"""
+        chave = self._chave_conhecida(coluna, valor)
+        if chave == TODOS:
+            return None
+        if chave is None:
+            # Valor inexistente no dataset: nenhuma linha
+            return np.zeros(self.total, dtype=bool)
+        return self._mascaras[coluna][chave]
+
+    def posicoes(self, sexo=TODOS, diagnostico=TODOS):
+        """
+        Posições (inteiras, ordenadas) das linhas que passam pelos filtros,
+        ou None quando nenhum filtro está ativo. O resultado é compartilhado
+        entre requisições e não deve ser alterado.
+        """
+        chave = (self._chave_conhecida(COLUNAS_FILTRO['sexo'], sexo),
+                 self._chave_conhecida(COLUNAS_FILTRO['diagnostico'], diagnostico))
+        if None in chave:
+            # Valor inexistente no dataset: nenhuma linha, e nada entra no cache
+            # (os valores vêm do navegador e poderiam ser qualquer coisa)
+            return self._vazio
+        try:
+            return self._posicoes[chave]
+        except KeyError:
+            pass
+
+        mascaras = [
+            self._mascaras[coluna][valor]
+            for coluna, valor in zip(COLUNAS_FILTRO.values(), chave)
+            if valor != TODOS
+        ]
+        if not mascaras:
+            posicoes = None
+        else:
+            with metricas.fase('filtro'):
+                combinada = np.logical_and.reduce(mascaras) if len(mascaras) > 1 else mascaras[0]
+                dtype = np.int32 if self.total < 2**31 else np.int64
+                posicoes = np.flatnonzero(combinada).astype(dtype, copy=False)
+                posicoes.flags.writeable = False
+
+        # Só combinações de valores existentes (ou TODOS) chegam aqui: o
+        # dicionário tem no máximo (valores de sexo + 1) x (diagnósticos + 1) chaves
+        self._posicoes[chave] = posicoes
+        return posicoes
+
+    def contagem(self, sexo=TODOS, diagnostico=TODOS):
+        """Número de linhas que passam pelos filtros"""
+        posicoes = self.posicoes(sexo, diagnostico)
+        return self.total if posicoes is None else len(posicoes)
+
+    def coluna(self, nome, sexo=TODOS, diagnostico=TODOS):
+        """Array numpy da coluna nas linhas filtradas (view sem filtros)"""
+        valores = self.df[nome].to_numpy()
+        posicoes = self.posicoes(sexo, diagnostico)
+        if posicoes is None:
+            return valores
+        with metricas.fase('filtro'):
+            return valores.take(posicoes)
+
+    def visao(self, colunas, sexo=TODOS, diagnostico=TODOS, limite=None):
+        """
+        DataFrame apenas com `colunas` das linhas filtradas (no máximo
+        `limite` linhas). Nunca copia o frame completo.
+        """
+        posicoes = self.posicoes(sexo, diagnostico)
+        if posicoes is not None and limite is not None:
+            posicoes = posicoes[:limite]
+
+        # Coluna a coluna: sem filtro as séries são fatias do frame base,
+        # com filtro apenas as linhas selecionadas de cada coluna são reunidas
+        dados = {}
+        with metricas.fase('filtro'):
+            for coluna in colunas:
+                serie = self.df[coluna]
+                if posicoes is not None:
+                    serie = serie.take(posicoes)
+                elif limite is not None:
+                    serie = serie.iloc[:limite]
+                dados[coluna] = serie
+            return pd.DataFrame(dados, copy=False)
+
+
+def _chave(valor):
+    """Normaliza valores de filtro (1, 1.0, np.int64(1) -> 1)"""
+    if valor is None or valor == TODOS:
+        return TODOS
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return valor
+
+
+def indice(snap):
+    """Índice de filtros do snapshot (construído uma vez por versão)"""
+    return snap.derivado('filtros', lambda s: IndiceFiltros(s.df))
@@ -0,0 +1,137 @@
+# Pipeline única dos gráficos que dependem dos controles do dashboard
+#
+# Cada gráfico é um módulo deste pacote que registra seu construtor com
+# @registrar, declarando quais entradas usa. Uma mudança em 'sexo-radio'
+# dispara um único callback multi-output: o filtro é resolvido uma vez no
+# Contexto e compartilhado por todos os construtores, e apenas os gráficos
+# que dependem da entrada alterada são reconstruídos (ou lidos do cache).
+#
+# Para adicionar um gráfico basta criar um módulo com um construtor
+# registrado e importá-lo no final deste arquivo.
+
+from dataclasses import dataclass
+
+import pandas as pd
+import plotly.express as px
+
+import codificacao
+import filtros
+import metricas
+import snapshot
+from cache_figuras import cache, resposta
+
+# Componentes de entrada -> nome do parâmetro recebido pelos construtores
+ENTRADAS = {
+    'variavel-dropdown': 'variavel',
+    'sexo-radio': 'sexo_filtro',
+    'regra-bins-radio': 'regra_bins',
+    'metodo-correlacao-radio': 'metodo_correlacao',
+}
+
+# Cores usadas para as classes de diagnóstico em todos os gráficos
+CORES_DIAGNOSTICO = {0: '#27ae60', 1: '#e74c3c'}
+
+
+@dataclass(frozen=True)
+class Grafico:
+    """Construtor registrado para um dcc.Graph"""
+    id: str
+    entradas: tuple
+    construir: object
+
+
+_REGISTRO = {}
+
+
+def registrar(id_grafico, entradas):
+    """Registra `construir(contexto, **entradas)` como figura de `id_grafico`"""
+    desconhecidas = set(entradas) - set(ENTRADAS.values())
+    if desconhecidas:
+        raise ValueError(f'Entradas desconhecidas para {id_grafico}: {desconhecidas}')
+
+    def decorador(funcao):
+        _REGISTRO[id_grafico] = Grafico(id_grafico, tuple(entradas), funcao)
+        return funcao
+    return decorador
+
+
+def graficos():
+    """Gráficos registrados, na ordem de registro (= ordem dos Outputs)"""
+    return list(_REGISTRO.values())
+
+
+def figura_vazia(titulo):
+    """Figura sem dados exibindo apenas uma mensagem no título"""
+    return px.scatter(title=titulo)
+
+
+class Contexto:
+    """
+    Estado compartilhado por todos os construtores de uma mesma requisição:
+    o snapshot (uma única versão do começo ao fim) e o filtro de sexo
+    resolvido uma vez, com as colunas reunidas sob demanda e reutilizadas.
+    """
+
+    def __init__(self, snap, sexo_filtro=filtros.TODOS):
+        self.snap = snap
+        self.indice = filtros.indice(snap)
+        self.sexo_filtro = sexo_filtro
+        self._colunas = {}
+
+    @property
+    def total(self):
+        return self.indice.contagem(sexo=self.sexo_filtro)
+
+    def coluna(self, nome):
+        """Array da coluna nas linhas filtradas (reunido uma vez por requisição)"""
+        if nome not in self._colunas:
+            self._colunas[nome] = self.indice.coluna(nome, sexo=self.sexo_filtro)
+        return self._colunas[nome]
+
+    def visao(self, colunas):
+        """DataFrame somente com as colunas pedidas, nas linhas filtradas"""
+        return pd.DataFrame({nome: self.coluna(nome) for nome in colunas}, copy=False)
+
+
+def entradas_cache(argumentos):
+    """Chave das entradas de um gráfico no cache de figuras"""
+    return repr(tuple(argumentos.items()))
+
+
+def construir(grafico, contexto, argumentos):
+    """Figura de um gráfico (dicionário, com arrays codificados) sem passar pelo cache"""
+    with metricas.fase('figura'):
+        fig = grafico.construir(contexto, **argumentos)
+    # Arrays numéricos em base64 no menor dtype (veja codificacao.py)
+    with metricas.fase('serializacao'):
+        return codificacao.figura(fig)
+
+
+def atualizar(valores, disparadas=None, snap=None):
+    """
+    Figuras de todos os gráficos registrados para os valores das entradas
+    (dict nome do parâmetro -> valor). Com `disparadas` (nomes das entradas
+    alteradas), gráficos que não dependem delas recebem None.
+    """
+    snap = snap or snapshot.atual()
+    contexto = Contexto(snap, valores.get('sexo_filtro', filtros.TODOS))
+
+    figuras = []
+    for grafico in graficos():
+        if disparadas is not None and not set(grafico.entradas) & set(disparadas):
+            figuras.append(None)
+            continue
+        argumentos = {nome: valores.get(nome) for nome in grafico.entradas}
+        payload = cache.obter_ou_calcular(
+            grafico.id,
+            entradas_cache(argumentos),
+            lambda: construir(grafico, contexto, argumentos),
+            versao=snap.versao,
+        )
+        with metricas.fase('serializacao'):
+            figuras.append(resposta(payload))
+    return figuras
+
+
+# Registro dos gráficos (a ordem de importação define a ordem dos Outputs)
+from graficos import distribuicao, sexo, correlacao, tipo_dor, matriz_correlacao  # noqa: E402,F401
@@ -0,0 +1,106 @@
+# Gráfico de correlação idade vs frequência cardíaca máxima
+#
+# O modo de renderização depende do número de pontos (veja dispersao.py):
+# marcadores SVG, WebGL (scattergl) ou grade de densidade calculada no
+# servidor. O modo em uso aparece no subtítulo do gráfico.
+
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+
+import dispersao
+import histograma
+from graficos import CORES_DIAGNOSTICO, figura_vazia, registrar
+
+TITULO = 'Idade vs Frequência Cardíaca Máxima'
+
+LABELS = {
+    'age': 'Idade (anos)',
+    'thalach': 'Freq. Cardíaca Máxima (bpm)',
+    'has_disease': 'Doença Cardíaca'
+}
+
+
+def _titulo(modo, pontos):
+    return f'{TITULO}<br><sup>Modo {dispersao.NOMES_MODOS[modo]} · {pontos} pontos</sup>'
+
+
+@registrar('grafico-correlacao', entradas=('sexo_filtro',))
+def construir(contexto, sexo_filtro):
+    """Gráfico de correlação idade vs frequência cardíaca"""
+    colunas = contexto.indice.df.columns
+
+    # Verificar se há dados e colunas necessárias
+    if contexto.total == 0 or 'age' not in colunas or 'thalach' not in colunas:
+        return figura_vazia('Dados de correlação não disponíveis')
+
+    modo = dispersao.modo(contexto.total)
+    if modo == dispersao.MODO_DENSIDADE:
+        fig = _densidade(contexto, sexo_filtro)
+        if fig is None:
+            return figura_vazia('Dados de correlação não disponíveis')
+    else:
+        df_plot = contexto.visao(['age', 'thalach', 'has_disease'])
+
+        # scatter plot (scattergl no modo WebGL)
+        fig = px.scatter(
+            df_plot,
+            x='age',
+            y='thalach',
+            color='has_disease',
+            labels=LABELS,
+            color_discrete_map=CORES_DIAGNOSTICO,
+            render_mode=modo
+        )
+
+    fig.update_layout(
+        title=_titulo(modo, contexto.total),
+        title_font_size=16,
+        xaxis_title=LABELS['age'],
+        yaxis_title=LABELS['thalach'],
+        xaxis_title_font_size=14,
+        yaxis_title_font_size=14
+    )
+    return fig
+
+
+def _densidade(contexto, sexo_filtro):
+    """Mapa de calor do total de pacientes e contornos por classe"""
+    grade = dispersao.grade(contexto.snap, sexo_filtro)
+    if grade is None:
+        return None
+
+    total = sum(grade.contagens.values()).astype(float)
+    # Células vazias ficam transparentes
+    total[total == 0] = np.nan
+
+    tracos = [
+        go.Heatmap(
+            x=grade.centros_x,
+            y=grade.centros_y,
+            z=total,
+            colorscale='Greys',
+            colorbar=dict(title='Pacientes'),
+            hovertemplate='Idade ≈ %{x:.0f}<br>FC máx. ≈ %{y:.0f}<br>Pacientes: %{z}<extra></extra>',
+            name='Total'
+        )
+    ]
+    for classe in histograma.CLASSES:
+        cor = CORES_DIAGNOSTICO[classe]
+        tracos.append(go.Contour(
+            x=grade.centros_x,
+            y=grade.centros_y,
+            z=grade.contagens[classe],
+            contours_coloring='lines',
+            colorscale=[[0, cor], [1, cor]],
+            line_width=1.5,
+            ncontours=8,
+            showscale=False,
+            showlegend=True,
+            name=f"{LABELS['has_disease']} = {classe}",
+            hoverinfo='skip'
+        ))
+
+    fig = go.Figure(tracos)
+    fig.update_layout(legend=dict(orientation='h', yanchor='bottom', y=1.02, x=0))
+    return fig
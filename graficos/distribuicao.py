@@ -0,0 +1,85 @@
+# Gráfico de distribuição da variável selecionada (histograma pré-agregado)
+
+import numpy as np
+import plotly.graph_objects as go
+
+import histograma
+import ingestao
+from graficos import CORES_DIAGNOSTICO, figura_vazia, registrar
+
+# Dicionário de labels para os eixos
+LABELS = {
+    'age': 'Idade (anos)',
+    'trestbps': 'Pressão Arterial em Repouso (mmHg)',
+    'chol': 'Colesterol (mg/dl)',
+    'thalach': 'Frequência Cardíaca Máxima (bpm)',
+    'oldpeak': 'Depressão ST'
+}
+
+
+@registrar('grafico-distribuicao', entradas=('variavel', 'sexo_filtro', 'regra_bins'))
+def construir(contexto, variavel, sexo_filtro, regra_bins=histograma.REGRA_FIXA):
+    """
+    Gráfico de distribuição da variável selecionada
+    Os bins são calculados no servidor (veja histograma.py) e o gráfico
+    recebe apenas as contagens por classe, não os valores brutos.
+    """
+    # Verificar se há dados para plotar
+    if contexto.total == 0:
+        # Retornar gráfico vazio se não houver dados
+        return figura_vazia('Nenhum dado disponível para os filtros selecionados')
+    
+    # Verificar se a variável existe no DataFrame
+    if variavel not in contexto.indice.df.columns:
+        return figura_vazia(f'Variável {variavel} não encontrada no dataset')
+    
+    try:
+        # Bordas compartilhadas e contagens por classe (em cache por snapshot)
+        hist = histograma.histograma(contexto.snap, variavel, sexo=sexo_filtro,
+                                     regra=regra_bins or histograma.REGRA_FIXA)
+        
+        if hist is None:
+            return figura_vazia('Nenhum dado válido disponível após limpeza')
+        
+        # Gráfico de barras pré-agregado: uma barra por bin e classe
+        fig = go.Figure([
+            go.Bar(
+                x=hist.centros,
+                y=hist.contagens[classe],
+                width=hist.larguras,
+                name=str(classe),
+                marker_color=CORES_DIAGNOSTICO[classe],
+                customdata=np.column_stack([hist.bordas[:-1], hist.bordas[1:]]),
+                hovertemplate='%{customdata[0]:.4g} – %{customdata[1]:.4g}<br>Frequência: %{y}'
+            )
+            for classe in histograma.CLASSES
+        ])
+        
+        # Média e desvio padrão (do dataset completo em snapshots ingeridos em blocos)
+        momentos = ingestao.estatisticas(contexto.snap, variavel, sexo=sexo_filtro)
+        
+        # Configurar layout
+        fig.update_layout(
+            title=f'Distribuição de {LABELS.get(variavel, variavel)}<br>'
+                  f'<sup>{_resumo_estatistico(momentos)}</sup>',
+            xaxis_title=LABELS.get(variavel, variavel),
+            yaxis_title='Frequência',
+            legend_title='Doença Cardíaca',
+            barmode='stack',
+            bargap=0,
+            title_font_size=16,
+            xaxis_title_font_size=14,
+            yaxis_title_font_size=14,
+            legend_title_font_size=12
+        )
+        
+    except Exception as e:
+        # Em caso de erro, retornar gráfico de erro
+        return figura_vazia(f'Erro ao criar gráfico: {str(e)}')
+    
+    return fig
+
+
+def _resumo_estatistico(momentos):
+    """Subtítulo com média, desvio padrão e número de pacientes"""
+    return f'Média {momentos.media:.1f} · DP {momentos.desvio:.1f} · {momentos.n} pacientes'
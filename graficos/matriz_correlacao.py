@@ -0,0 +1,52 @@
+# Mapa de calor da matriz de correlação das colunas numéricas
+#
+# A matriz vem de correlacoes.py (calculada uma vez por método, filtro de
+# sexo e versão do snapshot); aqui apenas vira a figura.
+
+import numpy as np
+import plotly.graph_objects as go
+
+import correlacoes
+from graficos import figura_vazia, registrar
+
+TITULO = 'Matriz de Correlação'
+
+
+@registrar('grafico-matriz-correlacao', entradas=('sexo_filtro', 'metodo_correlacao'))
+def construir(contexto, sexo_filtro, metodo_correlacao):
+    """Mapa de calor das correlações entre todas as colunas numéricas"""
+    # Valor vindo do navegador: qualquer método desconhecido vira Pearson
+    metodo = metodo_correlacao if metodo_correlacao in correlacoes.NOMES_METODOS else correlacoes.METODO_PEARSON
+    if contexto.total == 0:
+        return figura_vazia('Nenhum dado disponível')
+
+    matriz = correlacoes.matriz(contexto.snap, metodo, sexo_filtro)
+    if matriz is None:
+        return figura_vazia('Dados de correlação não disponíveis')
+
+    rotulos = [correlacoes.ROTULOS.get(coluna, coluna) for coluna in matriz.colunas]
+    # Duas casas bastam para a leitura (e reduzem a resposta)
+    valores = np.round(matriz.valores, 2)
+
+    fig = go.Figure(go.Heatmap(
+        x=rotulos,
+        y=rotulos,
+        z=valores,
+        zmin=-1,
+        zmax=1,
+        colorscale='RdBu',
+        reversescale=True,
+        texttemplate='%{z:.2f}',
+        textfont_size=9,
+        colorbar=dict(title='r'),
+        hovertemplate='%{y} x %{x}<br>r = %{z:.2f}<extra></extra>'
+    ))
+
+    origem = 'dataset completo' if matriz.completo else f'{matriz.linhas} pacientes'
+    fig.update_layout(
+        title=f'{TITULO} ({correlacoes.NOMES_METODOS[metodo]})<br><sup>{origem}</sup>',
+        title_font_size=16,
+        yaxis_autorange='reversed',
+        height=600
+    )
+    return fig
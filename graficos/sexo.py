@@ -0,0 +1,31 @@
+# Gráfico de pizza da distribuição por sexo
+
+import plotly.express as px
+
+import cubo
+import snapshot
+from graficos import figura_vazia, registrar
+
+
+@registrar('grafico-sexo', entradas=('sexo_filtro',))
+def construir(contexto, sexo_filtro):
+    """Gráfico de distribuição por sexo"""
+    # Contagens por sexo vindas do cubo categórico
+    df_plot = cubo.cubo(contexto.snap).tabela(['sex'], sex=sexo_filtro)
+    
+    if len(df_plot) == 0:
+        return figura_vazia('Nenhum dado disponível')
+    
+    df_plot['sex_label'] = df_plot['sex'].map(snapshot.MAPA_SEXO)
+    
+    # Criar gráfico de pizza
+    fig = px.pie(
+        df_plot, 
+        names='sex_label', 
+        values='count',
+        title='Distribuição por Sexo',
+        color_discrete_sequence=['#e74c3c', '#3498db']
+    )
+    
+    fig.update_layout(title_font_size=16)
+    return fig
@@ -0,0 +1,49 @@
+# Gráfico de barras dos tipos de dor no peito por diagnóstico
+
+import plotly.express as px
+
+import cubo
+import snapshot
+from graficos import CORES_DIAGNOSTICO, figura_vazia, registrar
+
+
+@registrar('grafico-tipo-dor', entradas=('sexo_filtro',))
+def construir(contexto, sexo_filtro):
+    """Gráfico de tipos de dor no peito"""
+    cubo_categorico = cubo.cubo(contexto.snap)
+    
+    if cubo_categorico.total(sex=sexo_filtro) == 0:
+        return figura_vazia('Nenhum dado disponível')
+    
+    # Preparar dados 
+    #cp label chest pain (contagens por cp x has_disease vindas do cubo)
+    try:
+        dados_agrupados = cubo_categorico.tabela(['cp', 'has_disease'], sex=sexo_filtro)
+        dados_agrupados.insert(0, 'cp_label', dados_agrupados.pop('cp').map(snapshot.MAPA_DOR))
+        
+        fig = px.bar(
+            dados_agrupados,
+            x='cp_label', 
+            y='count', 
+            color='has_disease',
+            title='Tipos de Dor no Peito',
+            labels={
+                'cp_label': 'Tipo de Dor', 
+                'count': 'Quantidade',
+                'has_disease': 'Doença Cardíaca'
+            },
+            color_discrete_map=CORES_DIAGNOSTICO
+        )
+        
+        fig.update_layout(
+            title_font_size=16, 
+            xaxis_tickangle=-45,
+            xaxis_title_font_size=14,
+            yaxis_title_font_size=14
+        )
+        
+    except Exception as e:
+        # Em caso de erro, retornar gráfico simples
+        return figura_vazia(f'Erro ao processar dados: {str(e)}')
+    
+    return fig
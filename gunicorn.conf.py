@@ -0,0 +1,67 @@
+# Configuração do gunicorn para o modo de produção (veja servidor.py)
+#
+# Os valores vêm de config.py e podem ser ajustados por variáveis de
+# ambiente (DASH_ENDERECO, DASH_WORKERS, DASH_THREADS, DASH_TIMEOUT,
+# DASH_PRELOAD, DASH_RECARGA_INTERVALO, DASH_RECARGA_BAIXAR).
+
+import gc
+import os
+import signal
+
+# 'config' é o nome de uma opção do gunicorn e não pode ser usado aqui
+import config as configuracao
+
+bind = configuracao.SERVIDOR_ENDERECO
+workers = configuracao.SERVIDOR_WORKERS
+threads = configuracao.SERVIDOR_THREADS
+worker_class = 'gthread' if configuracao.SERVIDOR_THREADS > 1 else 'sync'
+timeout = configuracao.SERVIDOR_TIMEOUT
+
+# Carrega o app (e o snapshot) no mestre; os workers herdam a memória
+preload_app = configuracao.SERVIDOR_PRELOAD
+
+
+def on_starting(server):
+    server.log.info(
+        "Iniciando dashboard: %s workers x %s threads em %s (preload=%s)",
+        workers, threads, bind, preload_app,
+    )
+
+
+def _trocar_workers(snap):
+    # SIGHUP: o gunicorn cria novos workers (forks do mestre, que já tem o
+    # snapshot novo preparado e aquecido) e encerra os antigos com calma
+    os.kill(os.getpid(), signal.SIGHUP)
+
+
+def when_ready(server):
+    server.log.info("Servidor pronto")
+    import recarga
+
+    if preload_app:
+        # O mestre prepara cada snapshot novo uma única vez e troca os
+        # workers; eles nunca montam as estruturas por conta própria. O
+        # aquecimento usa threads: processos filhos do mestre seriam
+        # recolhidos pelo tratamento de SIGCHLD do gunicorn
+        recarga.Recarregador(ao_publicar=_trocar_workers).iniciar()
+    elif configuracao.RECARGA_BAIXAR:
+        # Apenas o mestre baixa o dataset e grava as novas versões em disco;
+        # os workers percebem a troca do ponteiro ATUAL (veja post_fork)
+        recarga.Recarregador(publicar=False).iniciar()
+
+
+def pre_fork(server, worker):
+    # Objetos criados no mestre vão para a geração permanente do coletor de
+    # lixo: as varreduras nos workers não tocam (e não copiam) essas páginas
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    server.log.info("Worker %s iniciado", worker.pid)
+    if preload_app:
+        # A recarga é feita pelo mestre (veja when_ready)
+        return
+    # Sem preload, cada worker inicia o seu recarregador
+    import recarga
+
+    recarga.iniciar(baixar=False)
@@ -0,0 +1,132 @@
+# Histogramas calculados no servidor
+#
+# Em vez de enviar todos os valores brutos para o navegador (px.histogram),
+# o servidor calcula as bordas dos bins e as contagens por classe de
+# 'has_disease' com NumPy e devolve um gráfico de barras pré-agregado. O
+# tamanho da figura depende apenas do número de bins, não do número de linhas.
+
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+
+import filtros
+import metricas
+
+# Regras disponíveis para o cálculo das bordas dos bins
+REGRA_FIXA = 'fixa'
+REGRA_FD = 'freedman-diaconis'
+REGRA_QUANTIS = 'quantis'
+REGRAS = (REGRA_FIXA, REGRA_FD, REGRA_QUANTIS)
+
+NBINS_PADRAO = 20
+
+# Limite de bins para a regra de Freedman–Diaconis (dados com IQR muito
+# pequeno em relação à amplitude gerariam milhares de bins)
+MAX_BINS = 200
+
+CLASSES = (0, 1)
+
+
+@dataclass(frozen=True)
+class Histograma:
+    """Bordas compartilhadas e contagens por classe de 'has_disease'"""
+    bordas: np.ndarray
+    contagens: dict
+    total: int
+
+    @property
+    def centros(self):
+        return (self.bordas[:-1] + self.bordas[1:]) / 2
+
+    @property
+    def larguras(self):
+        return np.diff(self.bordas)
+
+
+def calcular_bordas(valores, regra=REGRA_FIXA, nbins=NBINS_PADRAO):
+    """Bordas dos bins para os valores (sem NaN) segundo a regra escolhida"""
+    if regra not in REGRAS:
+        raise ValueError(f'Regra de bins desconhecida: {regra}')
+
+    minimo, maximo = float(valores.min()), float(valores.max())
+    if minimo == maximo:
+        # Todos os valores iguais: um único bin centrado no valor
+        return np.array([minimo - 0.5, maximo + 0.5])
+
+    if regra == REGRA_QUANTIS:
+        bordas = np.unique(np.quantile(valores, np.linspace(0, 1, nbins + 1)))
+        if len(bordas) >= 2:
+            return bordas
+    elif regra == REGRA_FD:
+        q1, q3 = np.percentile(valores, [25, 75])
+        largura = 2 * (q3 - q1) * len(valores) ** (-1 / 3)
+        if largura > 0:
+            nbins = int(min(MAX_BINS, max(1, np.ceil((maximo - minimo) / largura))))
+
+    return np.linspace(minimo, maximo, nbins + 1)
+
+
+def calcular(indice, variavel, sexo=filtros.TODOS, regra=REGRA_FIXA, nbins=NBINS_PADRAO):
+    """Histograma da variável por classe de diagnóstico (sem cache)"""
+    valores = indice.coluna(variavel, sexo=sexo).astype(float, copy=False)
+    classes = indice.coluna('has_disease', sexo=sexo)
+
+    # Remover valores nulos da variável selecionada
+    validos = ~np.isnan(valores)
+    if not validos.all():
+        valores = valores[validos]
+        classes = classes[validos]
+
+    if len(valores) == 0:
+        return None
+
+    bordas = calcular_bordas(valores, regra, nbins)
+    contagens = {}
+    for classe in CLASSES:
+        contagem, _ = np.histogram(valores[classes == classe], bins=bordas)
+        contagem.flags.writeable = False
+        contagens[classe] = contagem
+    bordas.flags.writeable = False
+    return Histograma(bordas=bordas, contagens=contagens, total=int(len(valores)))
+
+
+class CacheHistogramas:
+    """Histogramas de um snapshot por (variável, sexo, regra, nbins)"""
+
+    def __init__(self, snap):
+        self.indice = filtros.indice(snap)
+        self._itens = {}
+        self._lock = threading.Lock()
+
+    def obter(self, variavel, sexo=filtros.TODOS, regra=REGRA_FIXA, nbins=NBINS_PADRAO):
+        chave = (variavel, filtros._chave(sexo), regra, nbins)
+        try:
+            return self._itens[chave]
+        except KeyError:
+            pass
+        with metricas.fase('agregacao'):
+            histograma = calcular(self.indice, variavel, sexo, regra, nbins)
+        with self._lock:
+            # O espaço de entradas é finito (variáveis x filtros x regras)
+            return self._itens.setdefault(chave, histograma)
+
+
+def nbins_fixos(snap):
+    """Número de bins da regra fixa no snapshot (o do resumo da ingestão, se houver)"""
+    import ingestao
+
+    return ingestao.NBINS_FIXOS if ingestao.resumo(snap) is not None else NBINS_PADRAO
+
+
+def histograma(snap, variavel, sexo=filtros.TODOS, regra=REGRA_FIXA, nbins=NBINS_PADRAO):
+    """Histograma em cache para o snapshot"""
+    if regra == REGRA_FIXA:
+        # Snapshot de uma ingestão em blocos: bins fixos sobre o dataset
+        # completo, calculados durante a leitura (veja ingestao.py)
+        import ingestao
+
+        resumo = ingestao.resumo(snap)
+        if resumo is not None and variavel in resumo.contagens:
+            return resumo.histograma(variavel, sexo)
+    return snap.derivado('histogramas', CacheHistogramas).obter(variavel, sexo, regra, nbins)
@@ -0,0 +1,477 @@
+# Ingestão em blocos de fontes maiores que a memória
+#
+# Arquivos CSV ou Parquet com as colunas do dataset UCI (features + target)
+# são lidos em blocos por uma cadeia de geradores. Cada bloco recebe as
+# mesmas derivações do snapshot (patient_id, has_disease e rótulos) e
+# atualiza agregados em streaming:
+#
+#   cubo categórico     contagens por combinação de categorias (cubo.py)
+#   histogramas         bordas fixas por variável, por sexo e diagnóstico
+#   momentos            média e variância online (Welford/Chan) por sexo
+#   comomentos          co-momentos de todas as colunas numéricas, por par
+#                       e por sexo (matriz de correlação, veja correlacoes.py)
+#   amostra             reservatório uniforme de tamanho fixo
+#
+# Só o bloco atual, a amostra e os agregados ficam em memória. O resultado
+# é gravado como um snapshot comum com as linhas da amostra (tabela,
+# detalhes e dispersão) e o resumo do dataset completo em `resumo.npz`:
+# os KPIs, a pizza, os tipos de dor, o histograma com bins fixos e as
+# estatísticas passam a refletir todas as linhas da fonte.
+#
+#   python ingestao.py dados.csv                       # grava e marca como atual
+#   python ingestao.py dados.parquet --amostra 100000 --destino /tmp/grande
+
+import argparse
+import io
+import json
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import config
+import cubo
+import esquema
+import filtros
+import histograma
+import snapshot
+from sintetico import COLUNAS_FEATURES
+
+ARQUIVO_RESUMO = 'resumo.npz'
+# (2: co-momentos das colunas de COLUNAS_COMOMENTOS)
+FORMATO_RESUMO = 2
+FORMATOS_RESUMO_LEGIVEIS = (1, 2)
+
+# Linhas lidas da fonte por vez
+TAMANHO_BLOCO = 250_000
+
+# Nomes alternativos aceitos na fonte (o arquivo original do UCI usa 'num')
+ALIASES = {'num': 'target'}
+
+# Faixas fixas dos histogramas: valores fora delas caem no bin da ponta
+FAIXAS = {
+    'age': (0, 100),
+    'trestbps': (60, 240),
+    'chol': (100, 600),
+    'thalach': (60, 220),
+    'oldpeak': (0, 7),
+}
+NBINS_FIXOS = 50
+
+# Colunas numéricas dos co-momentos (matriz de correlação)
+COLUNAS_COMOMENTOS = [*COLUNAS_FEATURES, 'has_disease']
+
+# Grupos dos agregados: códigos de 'sex' e uma posição para os demais
+GRUPOS = tuple(esquema.MAPA_SEXO) + (None,)
+
+
+class FonteInvalida(ValueError):
+    """Arquivo de origem sem as colunas esperadas ou em formato desconhecido"""
+
+
+# --- Leitura em blocos ---
+
+def ler_blocos(fonte, tamanho_bloco=TAMANHO_BLOCO):
+    """DataFrames de até `tamanho_bloco` linhas lidos de um CSV ou Parquet"""
+    fonte = Path(fonte)
+    sufixos = fonte.suffixes
+    if '.parquet' in sufixos or '.pq' in sufixos:
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise FonteInvalida('Leitura de Parquet requer o pacote pyarrow (pip install pyarrow)')
+        arquivo = pq.ParquetFile(fonte)
+        for lote in arquivo.iter_batches(batch_size=tamanho_bloco):
+            yield lote.to_pandas()
+    elif '.csv' in sufixos:
+        # '?' marca valores ausentes nos arquivos do UCI
+        yield from pd.read_csv(fonte, chunksize=tamanho_bloco, na_values=['?'])
+    else:
+        raise FonteInvalida(f'Formato não suportado: {fonte.name} (use .csv ou .parquet)')
+
+
+def derivar_blocos(blocos):
+    """Aplica aos blocos as mesmas derivações do snapshot, com IDs contínuos"""
+    proximo_id = 1
+    for bloco in blocos:
+        bloco = bloco.rename(columns=ALIASES)
+        faltando = [c for c in (*COLUNAS_FEATURES, 'target') if c not in bloco.columns]
+        if faltando:
+            raise FonteInvalida(f"Colunas ausentes na fonte: {', '.join(faltando)}")
+        bloco = bloco[[*COLUNAS_FEATURES, 'target']].reset_index(drop=True)
+        snapshot.derivar_colunas(bloco, primeiro_id=proximo_id)
+        proximo_id += len(bloco)
+        yield bloco
+
+
+# --- Agregados em streaming ---
+
+@dataclass
+class Momentos:
+    """Contagem, média e soma dos quadrados dos desvios (M2), combináveis"""
+    n: int = 0
+    media: float = 0.0
+    m2: float = 0.0
+
+    def combinar(self, n, media, m2):
+        """Junta os momentos de outro conjunto (fórmula de Chan et al.)"""
+        if n == 0:
+            return self
+        total = self.n + n
+        delta = media - self.media
+        self.media += delta * n / total
+        self.m2 += m2 + delta * delta * self.n * n / total
+        self.n = total
+        return self
+
+    def acumular(self, valores):
+        """Soma um bloco de valores (NaN são ignorados)"""
+        valores = np.asarray(valores, dtype=np.float64)
+        valores = valores[~np.isnan(valores)]
+        if len(valores) == 0:
+            return self
+        media = float(valores.mean())
+        return self.combinar(len(valores), media, float(((valores - media) ** 2).sum()))
+
+    def __add__(self, outro):
+        return Momentos(self.n, self.media, self.m2).combinar(outro.n, outro.media, outro.m2)
+
+    @property
+    def variancia(self):
+        """Variância amostral (n - 1), ou NaN com menos de dois valores"""
+        return self.m2 / (self.n - 1) if self.n > 1 else float('nan')
+
+    @property
+    def desvio(self):
+        return float(np.sqrt(self.variancia))
+
+
+@dataclass
+class Comomentos:
+    """
+    Momentos conjuntos de k colunas, combináveis como Momentos. Cada par
+    (i, j) considera só as linhas com os dois valores presentes:
+    n[i, j] linhas, media[i, j] e m2[i, j] da coluna i nessas linhas e o
+    co-momento c[i, j] = soma((x_i - média_i) * (x_j - média_j)).
+    """
+    n: np.ndarray = None
+    media: np.ndarray = None
+    m2: np.ndarray = None
+    c: np.ndarray = None
+
+    def combinar(self, outro):
+        """Junta os co-momentos de outro conjunto (Chan et al., por par)"""
+        if outro.n is None:
+            return self
+        if self.n is None:
+            self.n, self.media, self.m2, self.c = (
+                outro.n.copy(), outro.media.copy(), outro.m2.copy(), outro.c.copy()
+            )
+            return self
+        total = self.n + outro.n
+        with np.errstate(invalid='ignore', divide='ignore'):
+            peso = np.where(total > 0, outro.n / total, 0.0)
+            cruzado = np.where(total > 0, self.n * outro.n / total, 0.0)
+        delta = outro.media - self.media
+        self.media += delta * peso
+        self.m2 += outro.m2 + delta * delta * cruzado
+        # delta.T[i, j] é a diferença das médias da coluna j no par (i, j)
+        self.c += outro.c + delta * delta.T * cruzado
+        self.n = total
+        return self
+
+    def acumular(self, matriz):
+        """Soma um bloco (linhas x k colunas, float; NaN = ausente)"""
+        matriz = np.asarray(matriz, dtype=np.float64)
+        presentes = ~np.isnan(matriz)
+        v = presentes.astype(np.float64)
+        # Deslocar pela média do bloco reduz o cancelamento nas somas
+        contagens = v.sum(axis=0)
+        soma_colunas = np.where(presentes, matriz, 0.0).sum(axis=0)
+        deslocamento = np.divide(soma_colunas, contagens, out=np.zeros_like(soma_colunas), where=contagens > 0)
+        x = np.where(presentes, matriz - deslocamento, 0.0)
+
+        n = v.T @ v
+        soma = x.T @ v
+        with np.errstate(invalid='ignore', divide='ignore'):
+            media_local = np.where(n > 0, soma / n, 0.0)
+        bloco = Comomentos(
+            n=n,
+            media=media_local + deslocamento[:, None],
+            m2=(x * x).T @ v - soma * media_local,
+            c=x.T @ x - soma * media_local.T,
+        )
+        return self.combinar(bloco)
+
+    def __add__(self, outro):
+        return Comomentos().combinar(self).combinar(outro)
+
+    def correlacao(self):
+        """Matriz de correlação de Pearson (NaN onde não há variação ou linhas)"""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            r = self.c / np.sqrt(self.m2 * self.m2.T)
+        r = np.clip(r, -1.0, 1.0)
+        np.fill_diagonal(r, np.where(np.diag(self.m2) > 0, 1.0, np.nan))
+        return r
+
+
+def _grupos(bloco):
+    """Índice do grupo (posição em GRUPOS) de cada linha do bloco"""
+    sexo = bloco['sex'].to_numpy(dtype=np.float64, na_value=np.nan)
+    indices = np.full(len(bloco), len(GRUPOS) - 1, dtype=np.int8)
+    for i, codigo in enumerate(GRUPOS[:-1]):
+        indices[sexo == codigo] = i
+    return indices
+
+
+def _selecionar_grupos(sexo):
+    if sexo is None or sexo == filtros.TODOS:
+        return list(range(len(GRUPOS)))
+    chave = filtros._chave(sexo)
+    return [GRUPOS.index(chave)] if chave in GRUPOS[:-1] else []
+
+
+class Resumo:
+    """Agregados do dataset completo, atualizados bloco a bloco"""
+
+    def __init__(self):
+        self.linhas = 0
+        self.cubo = cubo.CuboCategorico()
+        self.bordas = {
+            nome: np.linspace(inicio, fim, NBINS_FIXOS + 1) for nome, (inicio, fim) in FAIXAS.items()
+        }
+        # contagens[coluna]: grupo x classe de diagnóstico x bin
+        self.contagens = {
+            nome: np.zeros((len(GRUPOS), len(histograma.CLASSES), NBINS_FIXOS), dtype=np.int64)
+            for nome in FAIXAS
+        }
+        self._momentos = {(nome, g): Momentos() for nome in FAIXAS for g in range(len(GRUPOS))}
+        self._comomentos = {g: Comomentos() for g in range(len(GRUPOS))}
+
+    def acumular(self, bloco):
+        self.linhas += len(bloco)
+        self.cubo.acumular(bloco)
+        grupos = _grupos(bloco)
+        classes = bloco['has_disease'].to_numpy()
+        for nome, bordas in self.bordas.items():
+            valores = bloco[nome].to_numpy(dtype=np.float64, na_value=np.nan)
+            validos = ~np.isnan(valores)
+            # Bin de cada valor; fora da faixa vai para o bin da ponta
+            bins = np.clip(np.searchsorted(bordas, valores[validos], side='right') - 1, 0, NBINS_FIXOS - 1)
+            celulas = np.ravel_multi_index((grupos[validos], classes[validos], bins), self.contagens[nome].shape)
+            self.contagens[nome] += np.bincount(
+                celulas, minlength=self.contagens[nome].size
+            ).reshape(self.contagens[nome].shape)
+            for g in range(len(GRUPOS)):
+                self._momentos[(nome, g)].acumular(valores[grupos == g])
+
+        matriz = np.column_stack([
+            bloco[nome].to_numpy(dtype=np.float64, na_value=np.nan) for nome in COLUNAS_COMOMENTOS
+        ])
+        for g in range(len(GRUPOS)):
+            self._comomentos[g].acumular(matriz[grupos == g])
+        return self
+
+    def momentos(self, coluna, sexo=filtros.TODOS):
+        """Momentos da coluna nas linhas do filtro de sexo"""
+        total = Momentos()
+        for g in _selecionar_grupos(sexo):
+            total = total + self._momentos[(coluna, g)]
+        return total
+
+    def comomentos(self, sexo=filtros.TODOS):
+        """
+        Co-momentos de COLUNAS_COMOMENTOS nas linhas do filtro de sexo, ou
+        None em resumos gravados antes deles (formato 1)
+        """
+        if self._comomentos is None:
+            return None
+        total = Comomentos()
+        for g in _selecionar_grupos(sexo):
+            total = total + self._comomentos[g]
+        return total if total.n is not None else None
+
+    def histograma(self, coluna, sexo=filtros.TODOS):
+        """Histograma de bordas fixas (histograma.Histograma) ou None se vazio"""
+        contagens = self.contagens[coluna][_selecionar_grupos(sexo)].sum(axis=0)
+        por_bin = contagens.sum(axis=0)
+        ocupados = np.flatnonzero(por_bin)
+        if len(ocupados) == 0:
+            return None
+        # Apenas o trecho entre o primeiro e o último bin com valores
+        inicio, fim = ocupados[0], ocupados[-1] + 1
+        bordas = self.bordas[coluna][inicio:fim + 1].copy()
+        bordas.flags.writeable = False
+        por_classe = {}
+        for i, classe in enumerate(histograma.CLASSES):
+            contagem = contagens[i, inicio:fim].copy()
+            contagem.flags.writeable = False
+            por_classe[classe] = contagem
+        return histograma.Histograma(bordas=bordas, contagens=por_classe, total=int(por_bin.sum()))
+
+    # --- Persistência ---
+
+    def para_bytes(self):
+        colunas = list(FAIXAS)
+        momentos = np.array([
+            [[m.n, m.media, m.m2] for m in (self._momentos[(nome, g)] for g in range(len(GRUPOS)))]
+            for nome in colunas
+        ], dtype=np.float64)
+        meta = {
+            'formato': FORMATO_RESUMO,
+            'linhas': self.linhas,
+            'colunas': colunas,
+            'cubo_dimensoes': list(self.cubo.dimensoes),
+            'colunas_comomentos': COLUNAS_COMOMENTOS,
+        }
+        k = len(COLUNAS_COMOMENTOS)
+        # grupo x (n, media, m2, c) x k x k
+        comomentos = np.stack([
+            np.stack([m.n, m.media, m.m2, m.c]) if m.n is not None else np.zeros((4, k, k))
+            for m in (self._comomentos[g] for g in range(len(GRUPOS)))
+        ])
+        saida = io.BytesIO()
+        np.savez_compressed(
+            saida,
+            meta=np.array(json.dumps(meta)),
+            cubo=self.cubo.contagens,
+            bordas=np.stack([self.bordas[nome] for nome in colunas]),
+            contagens=np.stack([self.contagens[nome] for nome in colunas]),
+            momentos=momentos,
+            comomentos=comomentos,
+        )
+        return saida.getvalue()
+
+    @classmethod
+    def de_arquivo(cls, caminho):
+        with np.load(caminho, allow_pickle=False) as dados:
+            meta = json.loads(str(dados['meta']))
+            if meta.get('formato') not in FORMATOS_RESUMO_LEGIVEIS:
+                raise snapshot.SnapshotCorrompido(f"Resumo em formato desconhecido: {meta.get('formato')}")
+            resumo = cls()
+            if meta['cubo_dimensoes'] != list(resumo.cubo.dimensoes):
+                raise snapshot.SnapshotCorrompido('Resumo com dimensões de cubo diferentes das atuais')
+            resumo.linhas = meta['linhas']
+            resumo.cubo.contagens = dados['cubo']
+            resumo.bordas = dict(zip(meta['colunas'], dados['bordas']))
+            resumo.contagens = dict(zip(meta['colunas'], dados['contagens']))
+            resumo._momentos = {
+                (nome, g): Momentos(int(n), float(media), float(m2))
+                for nome, linhas in zip(meta['colunas'], dados['momentos'])
+                for g, (n, media, m2) in enumerate(linhas)
+            }
+            if meta.get('colunas_comomentos') == COLUNAS_COMOMENTOS:
+                resumo._comomentos = {
+                    g: Comomentos(*(arr.copy() for arr in grupo)) if grupo[0].any() else Comomentos()
+                    for g, grupo in enumerate(dados['comomentos'])
+                }
+            else:
+                # Formato 1 (ou outras colunas): correlação calculada na amostra
+                resumo._comomentos = None
+        for arr in (resumo.cubo.contagens, *resumo.bordas.values(), *resumo.contagens.values()):
+            arr.flags.writeable = False
+        return resumo
+
+
+class Amostra:
+    """
+    Amostra uniforme (sem reposição) de no máximo `tamanho` linhas: cada
+    linha recebe uma chave aleatória e ficam as de menor chave
+    """
+
+    def __init__(self, tamanho, semente=0):
+        self.tamanho = tamanho
+        self._rng = np.random.default_rng(semente)
+        self._chaves = np.empty(0)
+        self._linhas = None
+
+    def acumular(self, bloco):
+        chaves = np.concatenate([self._chaves, self._rng.random(len(bloco))])
+        linhas = bloco if self._linhas is None else pd.concat([self._linhas, bloco], ignore_index=True)
+        if len(chaves) > self.tamanho:
+            manter = np.argpartition(chaves, self.tamanho - 1)[:self.tamanho]
+            chaves = chaves[manter]
+            linhas = linhas.take(manter).reset_index(drop=True)
+        self._chaves, self._linhas = chaves, linhas
+        return self
+
+    def dataframe(self):
+        """Linhas da amostra na ordem do patient_id"""
+        if self._linhas is None:
+            return None
+        return self._linhas.sort_values('patient_id', ignore_index=True)
+
+
+# --- Pipeline ---
+
+def ingerir(fonte, raiz=None, tamanho_bloco=TAMANHO_BLOCO, tamanho_amostra=None, semente=0):
+    """Lê a fonte em blocos e grava o snapshot da amostra com o resumo completo"""
+    resumo = Resumo()
+    amostra = Amostra(tamanho_amostra or config.INGESTAO_AMOSTRA, semente)
+    for bloco in derivar_blocos(ler_blocos(fonte, tamanho_bloco)):
+        resumo.acumular(bloco)
+        amostra.acumular(bloco)
+
+    df = amostra.dataframe()
+    if df is None:
+        raise FonteInvalida(f'Nenhuma linha em {fonte}')
+    origem = {
+        'tipo': 'ingestao',
+        'fonte': str(fonte),
+        'linhas': resumo.linhas,
+        'amostra': len(df),
+        'semente': int(semente),
+    }
+    return snapshot.salvar(df, raiz=raiz, origem=origem, extras={ARQUIVO_RESUMO: resumo.para_bytes()})
+
+
+def _carregar_resumo(snap):
+    if ARQUIVO_RESUMO not in snap.manifesto.get('extras', {}):
+        return None
+    return Resumo.de_arquivo(snap.caminho / ARQUIVO_RESUMO)
+
+
+def resumo(snap):
+    """Resumo do dataset completo, ou None se o snapshot não veio de uma ingestão"""
+    return snap.derivado('resumo_ingestao', _carregar_resumo)
+
+
+def estatisticas(snap, coluna, sexo=filtros.TODOS):
+    """Momentos (média e variância) da coluna, do resumo quando houver"""
+    resumo_snap = resumo(snap)
+    if resumo_snap is not None and coluna in FAIXAS:
+        return resumo_snap.momentos(coluna, sexo)
+    cache = snap.derivado('momentos', lambda s: {})
+    chave = (coluna, filtros._chave(sexo))
+    if chave not in cache:
+        cache[chave] = Momentos().acumular(filtros.indice(snap).coluna(coluna, sexo=sexo))
+    return cache[chave]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Ingestão em blocos de um CSV ou Parquet')
+    parser.add_argument('fonte', help='arquivo .csv ou .parquet com features + target')
+    parser.add_argument('--destino', help='diretório de snapshots (padrão: config.DIRETORIO_CACHE)')
+    parser.add_argument('--amostra', type=int, help='linhas mantidas para a tabela')
+    parser.add_argument('--bloco', type=int, default=TAMANHO_BLOCO, help='linhas lidas por vez')
+    parser.add_argument('--semente', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    try:
+        manifesto = ingerir(args.fonte, raiz=args.destino, tamanho_bloco=args.bloco,
+                            tamanho_amostra=args.amostra, semente=args.semente)
+    except (FonteInvalida, esquema.EsquemaInvalido, FileNotFoundError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    origem = manifesto['origem']
+    print(f"✅ Snapshot {manifesto['versao']}: {origem['linhas']} linhas resumidas, "
+          f"amostra de {origem['amostra']} ({time.perf_counter() - inicio:.1f}s)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
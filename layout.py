@@ -0,0 +1,356 @@
+# Layout do dashboard (como ele se parece)
+#
+# O layout é uma função: o Dash a chama a cada carregamento da página, então
+# os cards de KPI e os dados do modo clientside sempre refletem o snapshot
+# em uso, e nada é montado na importação do app.
+
+import dash_bootstrap_components as dbc
+from dash import dcc, html, dash_table
+from dash.dash_table import FormatTemplate
+
+import correlacoes
+import cubo
+import exportacao
+import histograma
+import ingestao
+import modo_cliente
+import snapshot
+from pacientes import COLUNA_ID
+
+
+def criar_layout(modo_graficos):
+    """Função de layout do app para o modo de gráficos escolhido"""
+
+    def layout():
+        snap = snapshot.atual()
+        df = snap.df
+
+        # Contagens categóricas pré-agregadas (KPIs, pizza e tipos de dor)
+        cubo_categorico = cubo.cubo(snap)
+        total_registros = cubo_categorico.total()
+        total_com_doenca = cubo_categorico.total(has_disease=1)
+        idade = ingestao.estatisticas(snap, 'age')
+        # Variáveis clínicas: o ID persistente do paciente não conta
+        variaveis = sum(1 for coluna in df.columns if coluna != COLUNA_ID)
+        # O app iniciado no modo cliente volta ao servidor para um snapshot
+        # recarregado acima do limite (veja modo_cliente.py)
+        modo_pagina = (modo_cliente.modo(snap) if modo_graficos == modo_cliente.MODO_CLIENTE
+                       else modo_graficos)
+        # No modo clientside o histograma é montado no navegador, com NBINS_PADRAO
+        nbins = (histograma.NBINS_PADRAO if modo_pagina == modo_cliente.MODO_CLIENTE
+                 else histograma.nbins_fixos(snap))
+
+        # Layout
+        return dbc.Container([
+            dbc.Row([
+                dbc.Col([
+                    html.H1("🫀 Análise de Doenças Cardíacas", 
+                            className="text-center mb-2 text-primary"),
+                    html.P("Dashboard interativo para análise do dataset de doenças cardíacas do UCI ML Repository",
+                           className="text-center text-muted lead")
+                ])
+            ], className="mb-4"),
+
+            # Informações do dataset com Cards Bootstrap
+            dbc.Row([
+                dbc.Col([
+                    html.H3("📊 Informações do Dataset", className="text-primary mb-3"),
+                    dbc.Row([
+                        dbc.Col([
+                            dbc.Card([
+                                dbc.CardBody([
+                                    html.H4(f"{total_registros}", className="text-info mb-0"),
+                                    html.P("Total de Registros", className="mb-0 text-muted"),
+                                    html.Small(f"Idade média {idade.media:.1f} ± {idade.desvio:.1f} anos",
+                                               className="text-muted")
+                                ])
+                            ], className="text-center h-100")
+                        ], width=3),
+
+                        dbc.Col([
+                            dbc.Card([
+                                dbc.CardBody([
+                                    html.H4(f"{variaveis}", className="text-danger mb-0"),
+                                    html.P("Variáveis", className="mb-0 text-muted")
+                                ])
+                            ], className="text-center h-100")
+                        ], width=3),
+
+                        dbc.Col([
+                            dbc.Card([
+                                dbc.CardBody([
+                                    html.H4(f"{total_com_doenca}", className="text-warning mb-0"),
+                                    html.P("Com Doença Cardíaca", className="mb-0 text-muted")
+                                ])
+                            ], className="text-center h-100")
+                        ], width=3),
+
+                        dbc.Col([
+                            dbc.Card([
+                                dbc.CardBody([
+                                    html.H4(f"{total_registros - total_com_doenca}", className="text-success mb-0"),
+                                    html.P("Sem Doença Cardíaca", className="mb-0 text-muted")
+                                ])
+                            ], className="text-center h-100")
+                        ], width=3)
+                    ], className="g-3")
+                ])
+            ], className="mb-4"),
+
+            # Controles com Card Bootstrap
+            dbc.Row([
+                dbc.Col([
+                    dbc.Card([
+                        dbc.CardHeader(html.H4("🎛️ Controles", className="mb-0")),
+                        dbc.CardBody([
+                            dbc.Row([
+                                dbc.Col([
+                                    dbc.Label("Selecione uma variável para análise:", className="fw-bold"),
+                                    dcc.Dropdown(
+                                        id='variavel-dropdown',
+                                        options=[
+                                            {'label': 'Idade', 'value': 'age'},
+                                            {'label': 'Pressão Arterial em Repouso', 'value': 'trestbps'},
+                                            {'label': 'Colesterol', 'value': 'chol'},
+                                            {'label': 'Frequência Cardíaca Máxima', 'value': 'thalach'},
+                                            {'label': 'Depressão ST', 'value': 'oldpeak'}
+                                        ],
+                                        value='age',
+                                        className="mt-2"
+                                    ),
+                                    dbc.Label("Regra dos bins do histograma:", className="fw-bold mt-3"),
+                                    dbc.RadioItems(
+                                        id='regra-bins-radio',
+                                        options=[
+                                            {'label': f'{nbins} bins fixos', 'value': histograma.REGRA_FIXA},
+                                            {'label': 'Freedman–Diaconis', 'value': histograma.REGRA_FD},
+                                            {'label': 'Quantis', 'value': histograma.REGRA_QUANTIS}
+                                        ],
+                                        value=histograma.REGRA_FIXA,
+                                        inline=True,
+                                        className="mt-2"
+                                    )
+                                ], width=6),
+
+                                dbc.Col([
+                                    dbc.Label("Filtrar por sexo:", className="fw-bold"),
+                                    dbc.RadioItems(
+                                        id='sexo-radio',
+                                        options=[
+                                            {'label': 'Todos', 'value': 'all'},
+                                            {'label': 'Masculino', 'value': 1},
+                                            {'label': 'Feminino', 'value': 0}
+                                        ],
+                                        value='all',
+                                        className="mt-2"
+                                    )
+                                ], width=6)
+                            ])
+                        ])
+                    ])
+                ])
+            ], className="mb-4"),
+
+            # Dados para o modo clientside (enviados uma única vez com o layout)
+            dcc.Store(
+                id='dados-cliente',
+                data=modo_cliente.payload_snapshot(snap) if modo_pagina == modo_cliente.MODO_CLIENTE else None
+            ),
+            # Controles encaminhados ao servidor quando 'dados-cliente' vem vazio
+            dcc.Store(id='pedido-graficos'),
+
+            # Gráficos com sistema de Grid Bootstrap
+            dbc.Row([
+                dbc.Col([
+                    html.H3("📈 Visualizações", className="text-primary mb-3"),
+                ])
+            ]),
+
+
+            dbc.Row([
+                dbc.Col([
+                    dbc.Card([
+                        dbc.CardBody([
+                            dcc.Graph(id='grafico-distribuicao')
+                        ])
+                    ])
+                ], width=6),
+
+                dbc.Col([
+                    dbc.Card([
+                        dbc.CardBody([
+                            dcc.Graph(id='grafico-sexo')
+                        ])
+                    ])
+                ], width=6)
+            ], className="mb-4"),
+
+            # Segunda linha de gráficos
+            dbc.Row([
+                dbc.Col([
+                    dbc.Card([
+                        dbc.CardBody([
+                            dcc.Graph(id='grafico-correlacao')
+                        ])
+                    ])
+                ], width=6),
+
+                dbc.Col([
+                    dbc.Card([
+                        dbc.CardBody([
+                            dcc.Graph(id='grafico-tipo-dor')
+                        ])
+                    ])
+                ], width=6)
+            ], className="mb-4"),
+
+            # Matriz de correlação de todas as colunas numéricas (correlacoes.py)
+            dbc.Row([
+                dbc.Col([
+                    dbc.Card([
+                        dbc.CardBody([
+                            dbc.Label("Método da correlação:", className="fw-bold"),
+                            dbc.RadioItems(
+                                id='metodo-correlacao-radio',
+                                options=[
+                                    {'label': nome, 'value': metodo}
+                                    for metodo, nome in correlacoes.NOMES_METODOS.items()
+                                ],
+                                value=correlacoes.METODO_PEARSON,
+                                inline=True,
+                                className="mb-2"
+                            ),
+                            dcc.Graph(id='grafico-matriz-correlacao')
+                        ])
+                    ])
+                ], width=12)
+            ], className="mb-4"),
+
+            # Seção da Tabela Interativa
+            dbc.Row([
+                dbc.Col([
+                    dbc.Card([
+                        dbc.CardHeader([
+                            html.H4("📋 Tabela de Dados Interativa", className="mb-0"),
+                            html.P("Clique em uma linha para ver detalhes do paciente", className="text-muted mb-0 mt-1")
+                        ]),
+                        dbc.CardBody([
+                            # Filtros para a tabela
+                            dbc.Row([
+                                dbc.Col([
+                                    dbc.Label("Filtrar por diagnóstico:", className="fw-bold"),
+                                    dcc.Dropdown(
+                                        id='filtro-diagnostico',
+                                        options=[
+                                            {'label': 'Todos os pacientes', 'value': 'all'},
+                                            {'label': 'Sem doença cardíaca', 'value': 0},
+                                            {'label': 'Com doença cardíaca', 'value': 1}
+                                        ],
+                                        value='all',
+                                        className="mb-3"
+                                    )
+                                ], width=6),
+                                dbc.Col([
+                                    dbc.Label("Número de registros:", className="fw-bold"),
+                                    dcc.Dropdown(
+                                        id='num-registros',
+                                        options=[
+                                            {'label': '10 registros', 'value': 10},
+                                            {'label': '25 registros', 'value': 25},
+                                            {'label': '50 registros', 'value': 50},
+                                            {'label': '100 registros', 'value': 100}
+                                        ],
+                                        value=25,
+                                        className="mb-3"
+                                    )
+                                ], width=6)
+                            ]),
+
+                            # Download das linhas dos filtros de diagnóstico e sexo (exportacao.py)
+                            html.Div([
+                                html.Span("Exportar pacientes filtrados: ", className="fw-bold"),
+                                html.A("CSV", id='link-exportar-csv',
+                                       href=exportacao.href(exportacao.FORMATO_CSV), className="me-2"),
+                                html.A("Parquet", id='link-exportar-parquet',
+                                       href=exportacao.href(exportacao.FORMATO_PARQUET))
+                            ], className="mb-3"),
+
+                            # Tabela
+                            dash_table.DataTable(
+                                id='tabela-dados',
+                                columns=[
+                                    {'name': 'ID', 'id': 'id', 'type': 'numeric'},
+                                    {'name': 'Idade', 'id': 'age', 'type': 'numeric'},
+                                    {'name': 'Sexo', 'id': 'sex_label', 'type': 'text'},
+                                    {'name': 'Tipo de Dor', 'id': 'cp_label', 'type': 'text'},
+                                    {'name': 'Pressão Arterial', 'id': 'trestbps', 'type': 'numeric'},
+                                    {'name': 'Colesterol', 'id': 'chol', 'type': 'numeric'},
+                                    {'name': 'Freq. Card. Máx.', 'id': 'thalach', 'type': 'numeric'},
+                                    # Probabilidade do modelo de risco (risco.py)
+                                    {'name': 'Risco (modelo)', 'id': 'risco', 'type': 'numeric',
+                                     'format': FormatTemplate.percentage(1)},
+                                    {'name': 'Diagnóstico', 'id': 'diagnostico_label', 'type': 'text'}
+                                ],
+                                data=[],
+                                # Paginação, ordenação e filtro feitos no servidor (tabela.py)
+                                page_current=0,
+                                page_size=25,
+                                page_count=0,
+                                page_action="custom",
+                                sort_action="custom",
+                                sort_mode="single",
+                                sort_by=[],
+                                filter_action="custom",
+                                filter_query='',
+                                row_selectable="single",
+                                selected_rows=[],
+                                style_cell={
+                                    'textAlign': 'left',
+                                    'padding': '10px',
+                                    'fontFamily': 'Arial, sans-serif'
+                                },
+                                style_header={
+                                    'backgroundColor': '#007bff',
+                                    'color': 'white',
+                                    'fontWeight': 'bold',
+                                    'textAlign': 'center'
+                                },
+                                style_data_conditional=[
+                                    {
+                                        'if': {'filter_query': '{diagnostico_label} = "Com Doença"'},
+                                        'backgroundColor': '#ffebee',
+                                        'color': 'black',
+                                    },
+                                    {
+                                        'if': {'filter_query': '{diagnostico_label} = "Sem Doença"'},
+                                        'backgroundColor': '#e8f5e8',
+                                        'color': 'black',
+                                    }
+                                ],
+                                style_data={
+                                    'border': '1px solid #dee2e6'
+                                }
+                            ),
+                            html.Small(id='tabela-total', className="text-muted")
+                        ])
+                    ])
+                ])
+            ], className="mb-4"),
+
+            # Seção de Detalhes do Paciente Selecionado
+            dbc.Row([
+                dbc.Col([
+                    dbc.Card([
+                        dbc.CardHeader(html.H4("👤 Detalhes do Paciente Selecionado", className="mb-0")),
+                        dbc.CardBody([
+                            html.Div(id='detalhes-paciente', children=[
+                                dbc.Alert("Selecione uma linha na tabela acima para ver os detalhes do paciente.", 
+                                        color="info", className="text-center")
+                            ])
+                        ])
+                    ])
+                ])
+            ])
+        ], fluid=True, className="px-4")
+
+    return layout
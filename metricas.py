@@ -0,0 +1,407 @@
+# Instrumentação dos callbacks e rota /metrics (formato texto do Prometheus)
+#
+# `instrumentar(app)` deve ser chamado logo após a criação do app: todo
+# callback registrado depois disso com @app.callback passa a ser medido.
+# Cada chamada registra o tempo total e o tempo exclusivo de cada fase,
+# marcada no código com `with metricas.fase(...)`:
+#
+#   filtro        máscaras e posições das linhas selecionadas
+#   agregacao     histogramas, contagens do cubo e ordenação da tabela
+#   figura        montagem da resposta (figura do Plotly ou componentes)
+#   serializacao  codificação em JSON (nossa e a feita pelo Dash)
+#
+# O tempo fora dessas fases aparece como 'outros'. O tamanho da resposta é
+# medido no after_request do Flask, antes da compressão (veja
+# codificacao.instalar) e os acertos do cache de figuras vêm de
+# cache_figuras.cache. As métricas são por processo.
+#
+# Também há um perfilador por amostragem que pode ser ligado em tempo de
+# execução para um único callback (config.METRICAS_PERFIL):
+#
+#   curl -X POST localhost:8050/metrics/perfil/update_tabela    # inicia
+#   curl localhost:8050/metrics/perfil                          # pilhas
+#   curl -X DELETE localhost:8050/metrics/perfil                # para
+#
+# As pilhas saem no formato "collapsed" (uma por linha, com a contagem),
+# aceito por flamegraph.pl e speedscope.
+
+import contextvars
+import functools
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+
+import config
+
+FASES = ('filtro', 'agregacao', 'figura', 'serializacao')
+FASE_OUTROS = 'outros'
+
+# Limites dos buckets dos histogramas
+BUCKETS_SEGUNDOS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BUCKETS_BYTES = tuple(2 ** k for k in range(8, 27, 2))  # 256 B .. 64 MB
+
+ROTA_METRICAS = '/metrics'
+ROTA_PERFIL = '/metrics/perfil'
+
+# Intervalo e profundidade máxima das amostras do perfilador
+INTERVALO_AMOSTRAGEM = 0.005
+PROFUNDIDADE_MAXIMA = 64
+
+_medicao_atual = contextvars.ContextVar('medicao_atual', default=None)
+
+
+# --- Histogramas e contadores ---
+
+class Histograma:
+    """Histograma cumulativo no estilo do Prometheus, com rótulos"""
+
+    def __init__(self, nome, ajuda, rotulos, buckets):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observar(self, valor, *rotulos):
+        with self._lock:
+            serie = self._series.get(rotulos)
+            if serie is None:
+                serie = self._series[rotulos] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            serie[0][bisect_left(self.buckets, valor)] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def exportar(self):
+        linhas = [f'# HELP {self.nome} {self.ajuda}', f'# TYPE {self.nome} histogram']
+        with self._lock:
+            series = {r: (list(c), s, n) for r, (c, s, n) in self._series.items()}
+        for rotulos, (contagens, soma, total) in sorted(series.items()):
+            acumulado = 0
+            for limite, contagem in zip((*self.buckets, '+Inf'), contagens):
+                acumulado += contagem
+                le = limite if limite == '+Inf' else repr(float(limite))
+                linhas.append(f'{self.nome}_bucket{_rotulos(self.rotulos, rotulos, le=le)} {acumulado}')
+            linhas.append(f'{self.nome}_sum{_rotulos(self.rotulos, rotulos)} {soma!r}')
+            linhas.append(f'{self.nome}_count{_rotulos(self.rotulos, rotulos)} {total}')
+        return linhas
+
+
+class Contador:
+    """Contador monotônico com rótulos"""
+
+    def __init__(self, nome, ajuda, rotulos):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self._valores = Counter()
+        self._lock = threading.Lock()
+
+    def incrementar(self, *rotulos, valor=1):
+        with self._lock:
+            self._valores[rotulos] += valor
+
+    def exportar(self):
+        linhas = [f'# HELP {self.nome} {self.ajuda}', f'# TYPE {self.nome} counter']
+        with self._lock:
+            valores = dict(self._valores)
+        for rotulos, valor in sorted(valores.items()):
+            linhas.append(f'{self.nome}{_rotulos(self.rotulos, rotulos)} {valor}')
+        return linhas
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _rotulos(nomes, valores, **extras):
+    pares = [*zip(nomes, valores), *extras.items()]
+    if not pares:
+        return ''
+    return '{' + ','.join(f'{nome}="{_escapar(valor)}"' for nome, valor in pares) + '}'
+
+
+DURACAO = Histograma(
+    'dash_callback_duracao_segundos', 'Tempo total de cada chamada de callback',
+    ('callback',), BUCKETS_SEGUNDOS,
+)
+DURACAO_FASE = Histograma(
+    'dash_callback_fase_segundos', 'Tempo exclusivo de cada fase da chamada',
+    ('callback', 'fase'), BUCKETS_SEGUNDOS,
+)
+TAMANHO_RESPOSTA = Histograma(
+    'dash_callback_resposta_bytes', 'Tamanho do corpo da resposta do callback',
+    ('callback',), BUCKETS_BYTES,
+)
+ERROS = Contador('dash_callback_erros_total', 'Chamadas que terminaram em exceção', ('callback',))
+RECARGAS = Contador(
+    'dash_snapshot_recargas_total', 'Verificações do recarregador que trocaram (ou falharam ao trocar) o snapshot',
+    ('resultado',),
+)
+
+
+# --- Medição por chamada ---
+
+class Medicao:
+    """Tempos por fase de uma chamada de callback"""
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.inicio = time.perf_counter()
+        self.fim = None
+        self.fases = dict.fromkeys(FASES, 0.0)
+        # Pilha de [fase, início, tempo das fases internas]
+        self._pilha = []
+
+    def entrar(self, nome):
+        self._pilha.append([nome, time.perf_counter(), 0.0])
+
+    def sair(self):
+        nome, inicio, internas = self._pilha.pop()
+        decorrido = time.perf_counter() - inicio
+        # Cada fase conta só o próprio tempo; o das internas já foi contado
+        self.fases[nome] += decorrido - internas
+        if self._pilha:
+            self._pilha[-1][2] += decorrido
+
+    def registrar(self, fim=None, tamanho=None):
+        total = (fim or time.perf_counter()) - self.inicio
+        DURACAO.observar(total, self.callback)
+        for nome, segundos in self.fases.items():
+            DURACAO_FASE.observar(segundos, self.callback, nome)
+        DURACAO_FASE.observar(max(0.0, total - sum(self.fases.values())), self.callback, FASE_OUTROS)
+        if tamanho is not None:
+            TAMANHO_RESPOSTA.observar(tamanho, self.callback)
+
+
+class _Fase:
+    __slots__ = ('nome', 'medicao')
+
+    def __init__(self, nome):
+        self.nome = nome
+        self.medicao = None
+
+    def __enter__(self):
+        self.medicao = _medicao_atual.get()
+        if self.medicao is not None:
+            self.medicao.entrar(self.nome)
+        return self
+
+    def __exit__(self, *exc):
+        if self.medicao is not None:
+            self.medicao.sair()
+        return False
+
+
+def fase(nome):
+    """Marca um trecho como pertencente a uma fase (sem custo fora de callbacks)"""
+    if nome not in FASES:
+        raise ValueError(f'Fase desconhecida: {nome}')
+    return _Fase(nome)
+
+
+def medir(nome):
+    """Decorador que mede as chamadas do callback `nome`"""
+    # Importados aqui: filtros, cubo etc. usam `fase` sem depender do Flask/Dash
+    import flask
+    from dash.exceptions import PreventUpdate
+
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            medicao = Medicao(nome)
+            token = _medicao_atual.set(medicao)
+            perfilador.entrar(nome)
+            try:
+                return funcao(*args, **kwargs)
+            except PreventUpdate:
+                raise
+            except Exception:
+                ERROS.incrementar(nome)
+                raise
+            finally:
+                perfilador.sair(nome)
+                _medicao_atual.reset(token)
+                medicao.fim = time.perf_counter()
+                if flask.has_request_context():
+                    # O Dash ainda serializa a resposta: o registro é feito
+                    # no after_request, com o tamanho do corpo
+                    flask.g.metricas_medicao = medicao
+                else:
+                    medicao.registrar(medicao.fim)
+        return envoltorio
+    return decorador
+
+
+def _apos_requisicao(resposta):
+    import flask
+
+    medicao = flask.g.pop('metricas_medicao', None)
+    if medicao is None:
+        return resposta
+    # Do retorno do callback até aqui: validação e JSON do próprio Dash
+    agora = time.perf_counter()
+    medicao.fases['serializacao'] += agora - medicao.fim
+    tamanho = None if resposta.direct_passthrough else resposta.calculate_content_length()
+    medicao.registrar(agora, tamanho)
+    return resposta
+
+
+# --- Perfilador por amostragem ---
+
+class Perfilador:
+    """
+    Amostra as pilhas das threads que estão executando um callback
+    escolhido (sys._current_frames) e acumula as pilhas no formato
+    "collapsed". Enquanto desligado, o custo por chamada é uma comparação.
+    """
+
+    def __init__(self, intervalo=INTERVALO_AMOSTRAGEM):
+        self.intervalo = intervalo
+        self.alvo = None
+        self.amostras = Counter()
+        self._threads = set()
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._thread = None
+
+    def entrar(self, callback):
+        if callback == self.alvo:
+            with self._lock:
+                self._threads.add(threading.get_ident())
+
+    def sair(self, callback):
+        if callback == self.alvo:
+            with self._lock:
+                self._threads.discard(threading.get_ident())
+
+    def iniciar(self, callback):
+        """Passa a amostrar o callback indicado (descarta amostras anteriores)"""
+        self.parar()
+        with self._lock:
+            self.alvo = callback
+            self.amostras = Counter()
+            self._threads = set()
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._executar, name='perfilador', daemon=True)
+        self._thread.start()
+
+    def parar(self):
+        self.alvo = None
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _executar(self):
+        while not self._parar.wait(self.intervalo):
+            with self._lock:
+                threads = tuple(self._threads)
+            if not threads:
+                continue
+            quadros = sys._current_frames()
+            for ident in threads:
+                quadro = quadros.get(ident)
+                if quadro is not None:
+                    pilha = _pilha(quadro)
+                    with self._lock:
+                        self.amostras[pilha] += 1
+
+    def relatorio(self):
+        """Pilhas acumuladas, uma por linha: 'f1;f2;f3 contagem'"""
+        with self._lock:
+            amostras = self.amostras.most_common()
+        return '\n'.join(f'{pilha} {contagem}' for pilha, contagem in amostras) + '\n'
+
+
+def _pilha(quadro):
+    funcoes = []
+    while quadro is not None and len(funcoes) < PROFUNDIDADE_MAXIMA:
+        codigo = quadro.f_code
+        funcoes.append(f'{codigo.co_name} ({codigo.co_filename}:{quadro.f_lineno})')
+        quadro = quadro.f_back
+    return ';'.join(reversed(funcoes))
+
+
+perfilador = Perfilador()
+
+
+# --- Integração com o app ---
+
+def exportar():
+    """Todas as métricas no formato texto do Prometheus"""
+    import snapshot
+    from cache_figuras import cache
+
+    linhas = []
+    for metrica in (DURACAO, DURACAO_FASE, TAMANHO_RESPOSTA, ERROS, RECARGAS):
+        linhas.extend(metrica.exportar())
+
+    snap = snapshot.atual()
+    linhas.append('# HELP dash_snapshot_linhas Linhas do snapshot em uso, por versão')
+    linhas.append('# TYPE dash_snapshot_linhas gauge')
+    linhas.append(f'dash_snapshot_linhas{_rotulos(("versao",), (snap.versao,))} {len(snap.df)}')
+
+    estatisticas = cache.estatisticas()
+    linhas.append('# HELP dash_cache_figuras_total Consultas ao cache de figuras por resultado')
+    linhas.append('# TYPE dash_cache_figuras_total counter')
+    for nome, contadores in sorted(estatisticas['callbacks'].items()):
+        for resultado, valor in sorted(contadores.items()):
+            linhas.append(f'dash_cache_figuras_total{_rotulos(("callback", "resultado"), (nome, resultado))} {valor}')
+    if 'bytes' in estatisticas:
+        linhas.append('# HELP dash_cache_figuras_bytes Bytes ocupados pelo cache de figuras')
+        linhas.append('# TYPE dash_cache_figuras_bytes gauge')
+        linhas.append(f"dash_cache_figuras_bytes {estatisticas['bytes']}")
+        linhas.append('# HELP dash_cache_figuras_itens Itens no cache de figuras')
+        linhas.append('# TYPE dash_cache_figuras_itens gauge')
+        linhas.append(f"dash_cache_figuras_itens {estatisticas['itens']}")
+    return '\n'.join(linhas) + '\n'
+
+
+def _rota_metricas():
+    import flask
+
+    return flask.Response(exportar(), mimetype='text/plain; version=0.0.4')
+
+
+def _rota_perfil(callback=None):
+    import flask
+
+    if flask.request.method == 'POST':
+        perfilador.iniciar(callback)
+        return flask.Response(f'Perfilador ativo para {callback}\n', mimetype='text/plain')
+    if flask.request.method == 'DELETE':
+        perfilador.parar()
+    return flask.Response(perfilador.relatorio(), mimetype='text/plain')
+
+
+def instrumentar(app):
+    """
+    Mede todos os callbacks registrados com @app.callback a partir de agora
+    e adiciona as rotas de métricas ao servidor Flask do app.
+    """
+    if not config.METRICAS:
+        return app
+
+    registrar_callback = app.callback
+
+    @functools.wraps(registrar_callback)
+    def callback(*args, **kwargs):
+        decorador = registrar_callback(*args, **kwargs)
+
+        def registrar(funcao):
+            decorador(medir(funcao.__name__)(funcao))
+            # Como no Dash: o nome no módulo continua sendo a função original
+            return funcao
+        return registrar
+
+    app.callback = callback
+    app.server.after_request(_apos_requisicao)
+    app.server.add_url_rule(ROTA_METRICAS, 'metricas', _rota_metricas)
+    if config.METRICAS_PERFIL:
+        app.server.add_url_rule(ROTA_PERFIL, 'perfil', _rota_perfil, methods=['GET', 'DELETE'])
+        app.server.add_url_rule(f'{ROTA_PERFIL}/<callback>', 'perfil_callback', _rota_perfil,
+                                methods=['POST'])
+    return app
@@ -0,0 +1,161 @@
+# Modo de gráficos no navegador
+#
+# Quando o dataset é pequeno o suficiente, as colunas usadas pelos gráficos
+# são enviadas uma única vez em um dcc.Store, codificadas como arrays
+# tipados em base64 ({dtype, bdata}). O filtro por sexo, os bins do
+# histograma e as contagens passam a ser feitos por um callback clientside
+# (assets/graficos_cliente.js), sem nenhuma requisição ao servidor. As
+# matrizes de correlação (pequenas, k x k) vão prontas no payload.
+#
+# Acima do limite configurado (config.LIMITE_MODO_CLIENTE_MB) o dashboard
+# continua usando o callback do servidor (pacote graficos). Um app iniciado
+# no modo cliente confere o limite a cada carregamento da página: se o
+# snapshot recarregado passar dele, o dcc.Store vai vazio e o JS encaminha
+# os controles ao servidor pelo dcc.Store 'pedido-graficos'.
+
+import base64
+
+import numpy as np
+import plotly.io as pio
+
+import config
+import correlacoes
+import dispersao
+import filtros
+import graficos
+import histograma
+import snapshot
+from graficos.distribuicao import LABELS
+
+MODO_CLIENTE = 'cliente'
+MODO_SERVIDOR = 'servidor'
+
+# Gráficos implementados em assets/graficos_cliente.js, na ordem de retorno
+GRAFICOS_CLIENTE = (
+    'grafico-distribuicao',
+    'grafico-sexo',
+    'grafico-correlacao',
+    'grafico-tipo-dor',
+    'grafico-matriz-correlacao',
+)
+
+# Colunas enviadas ao navegador e o dtype usado na codificação
+COLUNAS_CONTINUAS = ('age', 'trestbps', 'chol', 'thalach', 'oldpeak')
+COLUNAS_CODIGOS = ('sex', 'cp', 'has_disease')
+
+# Namespace e função do callback clientside
+NAMESPACE_JS = 'graficos'
+FUNCAO_JS = 'atualizar'
+
+
+def _codificar(arr):
+    arr = np.ascontiguousarray(arr)
+    return {
+        'dtype': arr.dtype.str.lstrip('<>|='),
+        'bdata': base64.b64encode(arr.tobytes()).decode('ascii'),
+    }
+
+
+def _continua(serie):
+    # float32 quando não há perda de precisão; senão float64, para que os
+    # bins calculados no navegador coincidam com os do servidor
+    arr = serie.to_numpy(dtype=np.float64, na_value=np.nan)
+    reduzido = arr.astype(np.float32)
+    if np.array_equal(reduzido, arr, equal_nan=True):
+        return reduzido
+    return arr
+
+
+def _codigos(serie):
+    # Códigos inteiros pequenos; ausentes viram -1
+    return serie.fillna(-1).to_numpy().astype(np.int8)
+
+
+def _correlacoes(snap):
+    """Matrizes de correlação por método e sexo ('all', '0', '1'), como no servidor"""
+    saida = {}
+    for metodo, nome in correlacoes.NOMES_METODOS.items():
+        por_sexo = {}
+        for sexo in (filtros.TODOS, 0, 1):
+            matriz = correlacoes.matriz(snap, metodo, sexo)
+            if matriz is None:
+                continue
+            valores = np.round(matriz.valores, 2)
+            por_sexo[str(sexo)] = {
+                'rotulos': [correlacoes.ROTULOS.get(c, c) for c in matriz.colunas],
+                # NaN (coluna sem variação) vira null
+                'valores': [[None if np.isnan(v) else float(v) for v in linha] for linha in valores],
+                'linhas': matriz.linhas,
+                'completo': matriz.completo,
+            }
+        saida[metodo] = {'nome': nome, 'sexo': por_sexo}
+    return saida
+
+
+def bytes_por_linha():
+    """
+    Limite superior do payload por linha (colunas contínuas em float64),
+    já considerando a expansão do base64
+    """
+    bruto = 8 * len(COLUNAS_CONTINUAS) + len(COLUNAS_CODIGOS)
+    return bruto * 4 / 3
+
+
+def tamanho_estimado(snap):
+    """Bytes estimados do dcc.Store para o snapshot"""
+    return int(len(snap.df) * bytes_por_linha())
+
+
+def modo(snap, modo_configurado=None, limite_mb=None):
+    """Modo efetivo dos gráficos: 'cliente' ou 'servidor'"""
+    modo_configurado = modo_configurado or config.MODO_GRAFICOS
+    if modo_configurado in (MODO_CLIENTE, MODO_SERVIDOR):
+        escolhido = modo_configurado
+    elif modo_configurado == 'auto':
+        limite = (limite_mb if limite_mb is not None else config.LIMITE_MODO_CLIENTE_MB) * 1024 * 1024
+        escolhido = MODO_CLIENTE if tamanho_estimado(snap) <= limite else MODO_SERVIDOR
+    else:
+        raise ValueError(f'Modo de gráficos desconhecido: {modo_configurado}')
+
+    # O JS só sabe montar os gráficos listados; qualquer outro exige o servidor
+    registrados = tuple(g.id for g in graficos.graficos())
+    if escolhido == MODO_CLIENTE and registrados != GRAFICOS_CLIENTE:
+        print("⚠️ Há gráficos sem implementação clientside; usando o modo servidor.")
+        escolhido = MODO_SERVIDOR
+    return escolhido
+
+
+def payload(snap):
+    """Dados do dcc.Store: colunas codificadas e metadados dos gráficos"""
+    df = snap.df
+    colunas = {}
+    for nome in COLUNAS_CONTINUAS:
+        colunas[nome] = _codificar(_continua(df[nome]))
+    for nome in COLUNAS_CODIGOS:
+        colunas[nome] = _codificar(_codigos(df[nome]))
+
+    return {
+        'versao': snap.versao,
+        'linhas': int(len(df)),
+        'colunas': colunas,
+        'labels': LABELS,
+        'sexo': {str(k): v for k, v in snapshot.MAPA_SEXO.items()},
+        'dor': {str(k): v for k, v in snapshot.MAPA_DOR.items()},
+        'cores': {str(k): v for k, v in graficos.CORES_DIAGNOSTICO.items()},
+        'nbins': histograma.NBINS_PADRAO,
+        'max_bins': histograma.MAX_BINS,
+        'dispersao': {
+            'limite_webgl': config.DISPERSAO_LIMITE_WEBGL,
+            'limite_densidade': config.DISPERSAO_LIMITE_DENSIDADE,
+            'nbins': dispersao.NBINS_GRADE,
+            'nomes': dispersao.NOMES_MODOS,
+        },
+        'correlacoes': _correlacoes(snap),
+        # Mesmo template dos gráficos gerados pelo Plotly no servidor
+        'template': pio.templates[pio.templates.default].to_plotly_json(),
+    }
+
+
+def payload_snapshot(snap):
+    """Payload em cache por versão do snapshot"""
+    return snap.derivado('payload_cliente', payload)
@@ -0,0 +1,59 @@
+# Consulta de pacientes por ID em tempo constante
+#
+# Cada linha do snapshot tem um 'patient_id' persistente, gravado junto com
+# os dados (veja snapshot.derivar_colunas). Quando os IDs são a sequência
+# 1..n, a posição é calculada diretamente (id - 1); caso contrário é usado
+# um índice hash (pd.Index). Em ambos os casos uma consulta não percorre as
+# colunas do dataset.
+
+import numpy as np
+import pandas as pd
+
+COLUNA_ID = 'patient_id'
+
+
+class IndicePacientes:
+    """Mapeamento patient_id -> posição da linha no snapshot"""
+
+    def __init__(self, df):
+        self.df = df
+        self.ids = df[COLUNA_ID].to_numpy()
+        n = len(self.ids)
+        # IDs sequenciais dispensam a tabela hash
+        self.sequencial = bool(n == 0 or (
+            self.ids[0] == 1 and self.ids[-1] == n and np.all(np.diff(self.ids) == 1)
+        ))
+        self._hash = None if self.sequencial else pd.Index(self.ids)
+
+    def posicao(self, paciente_id):
+        """Posição da linha do paciente, ou None se o ID não existir"""
+        try:
+            paciente_id = int(paciente_id)
+        except (TypeError, ValueError):
+            return None
+
+        if self.sequencial:
+            posicao = paciente_id - 1
+            return posicao if 0 <= posicao < len(self.ids) else None
+
+        try:
+            posicao = self._hash.get_loc(paciente_id)
+        except KeyError:
+            return None
+        # IDs duplicados não devem ocorrer; por segurança usa o primeiro
+        if not isinstance(posicao, (int, np.integer)):
+            posicao = int(np.flatnonzero(np.asarray(posicao))[0]) if isinstance(posicao, np.ndarray) \
+                else posicao.start
+        return int(posicao)
+
+    def linha(self, paciente_id):
+        """Dados do paciente como dicionário (coluna -> valor), ou None"""
+        posicao = self.posicao(paciente_id)
+        if posicao is None:
+            return None
+        return {coluna: self.df[coluna].iat[posicao] for coluna in self.df.columns}
+
+
+def indice(snap):
+    """Índice de pacientes do snapshot (construído uma vez por versão)"""
+    return snap.derivado('pacientes', lambda s: IndicePacientes(s.df))
@@ -0,0 +1,143 @@
+# Recarga do dataset sem reiniciar o servidor
+#
+# Um thread em segundo plano verifica periodicamente o ponteiro ATUAL do
+# diretório de snapshots (gravado por `python snapshot.py atualizar`,
+# `python sintetico.py` ou pelo próprio recarregador com
+# config.RECARGA_BAIXAR). Quando a versão muda, o novo snapshot é mapeado e
+# suas estruturas derivadas (máscaras, cubo, índices da tabela e dos
+# pacientes) são montadas fora do caminho das requisições; só então ele é
+# publicado com snapshot.publicar, uma troca atômica de referência.
+#
+# Cada callback obtém o snapshot uma única vez e usa essa mesma versão do
+# começo ao fim, então requisições em andamento nunca misturam versões. Os
+# caches são indexados pela versão (Snapshot.derivado, cache_figuras), o que
+# invalida apenas o que pertence às versões antigas.
+#
+# No gunicorn com preload (veja gunicorn.conf.py) o recarregador roda só no
+# processo mestre: ele monta e aquece o novo snapshot uma única vez e pede ao
+# próprio gunicorn (SIGHUP) novos workers, que herdam essas páginas por
+# copy-on-write como no início; os workers antigos terminam as requisições em
+# andamento e saem. Sem preload, cada worker tem o seu recarregador.
+#
+# O modo dos gráficos (cliente ou servidor, modo_cliente.py) é escolhido ao
+# criar o app: os callbacks já estão registrados. Um app no modo cliente
+# passa a calcular os gráficos no servidor se um snapshot novo passar de
+# config.LIMITE_MODO_CLIENTE_MB (o limite é conferido a cada carregamento da
+# página); o caminho inverso, do servidor para o cliente, só vale após
+# reiniciar, e um aviso no log indica isso.
+
+import sys
+import threading
+import time
+
+import config
+import metricas
+import snapshot
+
+
+class Recarregador:
+    """
+    Verifica a cada `intervalo` segundos se há um novo snapshot e o publica.
+
+    baixar=True baixa o dataset do UCI antes de cada verificação (uma nova
+    versão só é gravada se o conteúdo mudar); publicar=False apenas grava em
+    disco, sem trocar o snapshot deste processo. `ao_publicar(snap)` é chamado
+    depois de cada publicação; `processos` é repassado ao aquecimento.
+    """
+
+    def __init__(self, intervalo=None, baixar=None, publicar=True, preparar=None, raiz=None,
+                 ao_publicar=None, processos=1):
+        self.intervalo = config.RECARGA_INTERVALO if intervalo is None else intervalo
+        self.baixar = config.RECARGA_BAIXAR if baixar is None else baixar
+        self.publicar = publicar
+        self.raiz = raiz
+        self.ao_publicar = ao_publicar
+        self.processos = processos
+        self._preparar = preparar
+        self._modo_graficos = None
+        self._parar = threading.Event()
+        self._thread = None
+
+    def preparar(self, snap):
+        """Monta as estruturas derivadas antes de o snapshot ser publicado"""
+        if self._preparar is not None:
+            return self._preparar(snap)
+        import servidor
+
+        return servidor.preparar(snap)
+
+    def verificar(self):
+        """Uma verificação: devolve o snapshot publicado, ou None se nada mudou"""
+        if self.baixar:
+            snapshot.carregar(offline=False, atualizar=True, raiz=self.raiz)
+        if not self.publicar:
+            return None
+
+        versao = snapshot.versao_atual(self.raiz)
+        if versao is None or versao == snapshot.atual().versao:
+            return None
+
+        import modo_cliente
+
+        if self._modo_graficos is None:
+            # Modo do app em execução, escolhido com o snapshot inicial
+            self._modo_graficos = modo_cliente.modo(snapshot.atual())
+
+        inicio = time.perf_counter()
+        snap = self.preparar(snapshot.ler(versao, raiz=self.raiz))
+        if config.AQUECIMENTO:
+            # Com processos=1, em threads (no worker, que já atende
+            # requisições, e no mestre do gunicorn)
+            import aquecimento
+            aquecimento.aquecer(snap, processos=self.processos)
+        anterior = snapshot.publicar(snap)
+        metricas.RECARGAS.incrementar('ok')
+        print(f"🔄 Snapshot {anterior.versao if anterior else '-'} -> {snap.versao} "
+              f"({len(snap.df)} linhas) publicado em {time.perf_counter() - inicio:.1f}s")
+
+        modo_novo = modo_cliente.modo(snap)
+        if modo_novo != self._modo_graficos:
+            if modo_novo == modo_cliente.MODO_SERVIDOR:
+                print(f"⚠️ O snapshot {snap.versao} passa do limite do modo cliente: os gráficos "
+                      f"das novas páginas são calculados no servidor", file=sys.stderr)
+            else:
+                print(f"⚠️ O snapshot {snap.versao} pede o modo de gráficos '{modo_novo}', mas o app "
+                      f"segue em '{self._modo_graficos}' até ser reiniciado", file=sys.stderr)
+        if self.ao_publicar is not None:
+            self.ao_publicar(snap)
+        return snap
+
+    def _executar(self):
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.verificar()
+            except Exception as e:
+                # Um snapshot novo com problema não derruba o servidor:
+                # seguimos com o atual e tentamos de novo no próximo ciclo
+                metricas.RECARGAS.incrementar('erro')
+                print(f"⚠️ Falha ao recarregar o snapshot ({e}); mantendo {snapshot.atual().versao}",
+                      file=sys.stderr)
+
+    def iniciar(self):
+        if self.intervalo <= 0 or self._thread is not None:
+            return self
+        self._thread = threading.Thread(target=self._executar, name='recarga-snapshot', daemon=True)
+        self._thread.start()
+        return self
+
+    def parar(self):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+_recarregador = None
+
+
+def iniciar(**kwargs):
+    """Inicia o recarregador do processo (apenas um por processo)"""
+    global _recarregador
+    if _recarregador is None:
+        _recarregador = Recarregador(**kwargs).iniciar()
+    return _recarregador
@@ -0,0 +1,419 @@
+# Modelo de risco de doença cardíaca (scikit-learn)
+#
+# Um classificador (imputação da mediana, padronização e regressão
+# logística) é treinado nas colunas de features do snapshot para prever
+# 'has_disease', ou carregado de um arquivo joblib (config.RISCO_MODELO).
+# Todos os pacientes são pontuados em um único passo vetorizado, em blocos,
+# quando o snapshot é preparado: a probabilidade vira a coluna 'risco' da
+# tabela e do painel de detalhes, sem inferência por clique.
+#
+# O modelo e as probabilidades são gravados ao lado do snapshot e mapeados
+# em memória nas cargas seguintes (compartilhados pelos workers):
+#
+#   dados_cache/heart-disease/risco/<versão do snapshot>-<modelo>/
+#   ├── modelo.joblib
+#   ├── risco.npy
+#   └── info.json          # colunas, linhas de treino, tempos
+#
+# Registros novos são pontuados em lote pela rota POST /risco (CSV com as
+# colunas de features; a resposta é o mesmo CSV com a coluna 'risco') ou
+# pela linha de comando:
+#
+#   python risco.py treinar                  # treina e pontua o snapshot em uso
+#   python risco.py pontuar novos.csv saida.csv
+#
+# O treino acontece uma vez por versão: no gunicorn o mestre prepara o
+# snapshot antes do fork (servidor.preparar) e, quando vários processos
+# preparam a mesma versão, uma trava de arquivo deixa apenas um treinar; os
+# demais esperam e leem o resultado gravado.
+#
+# O scikit-learn é opcional: sem ele o dashboard funciona sem a coluna.
+
+import argparse
+import contextlib
+import hashlib
+import io
+import itertools
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import config
+from sintetico import COLUNAS_FEATURES
+
+ROTA_RISCO = '/risco'
+
+COLUNA_RISCO = 'risco'
+COLUNA_ALVO = 'has_disease'
+
+# Linhas por bloco de pontuação (limita a memória temporária do predict_proba)
+TAMANHO_BLOCO = 65_536
+
+DIRETORIO = 'risco'
+ORIGEM_TREINADO = 'treinado'
+
+
+class ModeloIndisponivel(RuntimeError):
+    """scikit-learn ausente, modelo desligado ou sem colunas para treinar"""
+
+
+@dataclass
+class ModeloRisco:
+    """Classificador e probabilidades de todas as linhas de um snapshot"""
+    modelo: object
+    colunas: list
+    risco: np.ndarray
+    info: dict
+
+    def pontuar(self, df, tamanho_bloco=TAMANHO_BLOCO):
+        """Probabilidades de doença para as linhas de `df` (em lote)"""
+        return pontuar(self.modelo, df, self.colunas, tamanho_bloco=tamanho_bloco)
+
+
+def _sklearn():
+    try:
+        import sklearn
+    except ImportError:
+        return None
+    return sklearn
+
+
+def _exigir_sklearn():
+    if _sklearn() is None:
+        raise ModeloIndisponivel('O modelo de risco requer o pacote scikit-learn (pip install scikit-learn)')
+
+
+def colunas_modelo(df):
+    """Features presentes em `df`, na ordem de sintetico.COLUNAS_FEATURES"""
+    return [coluna for coluna in COLUNAS_FEATURES if coluna in df.columns]
+
+
+def _matriz(df, colunas, inicio=0, fim=None):
+    """Bloco de features como float32 contíguo (NaN para ausentes)"""
+    return np.column_stack([
+        df[coluna].to_numpy()[inicio:fim].astype(np.float32, copy=False) for coluna in colunas
+    ])
+
+
+def treinar(df, amostra=None, semente=0):
+    """
+    Classificador treinado em até `amostra` linhas de `df` (sorteadas sem
+    reposição; padrão: config.RISCO_AMOSTRA_TREINO).
+    """
+    _exigir_sklearn()
+    from sklearn.impute import SimpleImputer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    amostra = config.RISCO_AMOSTRA_TREINO if amostra is None else amostra
+    colunas = colunas_modelo(df)
+    if not colunas or COLUNA_ALVO not in df.columns:
+        raise ModeloIndisponivel('O snapshot não tem as colunas de features e has_disease')
+
+    posicoes = np.arange(len(df))
+    if 0 < amostra < len(df):
+        posicoes = np.sort(np.random.default_rng(semente).choice(len(df), amostra, replace=False))
+    x = _matriz(df, colunas)[posicoes]
+    y = df[COLUNA_ALVO].to_numpy()[posicoes]
+    if len(np.unique(y)) < 2:
+        raise ModeloIndisponivel('has_disease precisa ter as duas classes para treinar o modelo')
+
+    modelo = make_pipeline(
+        SimpleImputer(strategy='median'),
+        StandardScaler(),
+        LogisticRegression(max_iter=1000),
+    )
+    modelo.fit(x, y)
+    # Colunas usadas no treino, conferidas ao pontuar novos registros
+    modelo.colunas_risco_ = colunas
+    return modelo
+
+
+def pontuar(modelo, df, colunas=None, tamanho_bloco=TAMANHO_BLOCO, saida=None):
+    """
+    Probabilidade da classe 1 para todas as linhas de `df`, em blocos de
+    `tamanho_bloco` linhas (float32). `saida` pode ser um array (ou memmap)
+    já alocado com len(df) posições.
+    """
+    colunas = colunas or getattr(modelo, 'colunas_risco_', None) or COLUNAS_FEATURES
+    faltando = [coluna for coluna in colunas if coluna not in df.columns]
+    if faltando:
+        raise ValueError(f"Colunas ausentes para o modelo de risco: {', '.join(faltando)}")
+
+    if saida is None:
+        saida = np.empty(len(df), dtype=np.float32)
+    classe = list(modelo.classes_).index(1)
+    for inicio in range(0, len(df), tamanho_bloco):
+        fim = min(inicio + tamanho_bloco, len(df))
+        saida[inicio:fim] = modelo.predict_proba(_matriz(df, colunas, inicio, fim))[:, classe]
+    return saida
+
+
+# --- Persistência por snapshot ---
+
+def _origem_modelo():
+    """'treinado' ou o hash do arquivo de config.RISCO_MODELO"""
+    if not config.RISCO_MODELO:
+        return ORIGEM_TREINADO
+    h = hashlib.sha256()
+    with open(config.RISCO_MODELO, 'rb') as f:
+        for bloco in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloco)
+    return h.hexdigest()[:12]
+
+
+def _diretorio(snap, origem):
+    return Path(snap.caminho).parent / DIRETORIO / f'{snap.versao}-{origem}'
+
+
+def _ler(caminho, linhas):
+    import joblib
+
+    with open(caminho / 'info.json', encoding='utf-8') as f:
+        info = json.load(f)
+    risco = np.load(caminho / 'risco.npy', mmap_mode='r', allow_pickle=False)
+    if len(risco) != linhas:
+        raise ValueError(f'risco.npy tem {len(risco)} linhas, esperadas {linhas}')
+    modelo = joblib.load(caminho / 'modelo.joblib')
+    return ModeloRisco(modelo=modelo, colunas=info['colunas'], risco=risco, info=info)
+
+
+@contextlib.contextmanager
+def _trava(caminho):
+    """Trava exclusiva entre processos para gravar `caminho` (fcntl, onde houver)"""
+    try:
+        import fcntl
+    except ImportError:
+        # Sem fcntl (Windows): a troca atômica em _gravar ainda evita corrupção
+        yield
+        return
+    with open(caminho.parent / f'.{caminho.name}.lock', 'w') as arquivo:
+        fcntl.flock(arquivo, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(arquivo, fcntl.LOCK_UN)
+
+
+def _ler_gravado(caminho, linhas):
+    """Resultado já gravado em `caminho`, ou None (removendo um inválido)"""
+    if not (caminho / 'info.json').exists():
+        return None
+    try:
+        return _ler(caminho, linhas)
+    except Exception as e:
+        print(f"⚠️ Modelo de risco gravado em {caminho} inválido ({e}); recalculando")
+        shutil.rmtree(caminho, ignore_errors=True)
+        return None
+
+
+def _gravar(snap, origem, caminho):
+    """Treina (ou carrega) o modelo, pontua o snapshot e grava em `caminho`"""
+    import joblib
+
+    inicio = time.perf_counter()
+    if origem == ORIGEM_TREINADO:
+        modelo = treinar(snap.df)
+    else:
+        modelo = joblib.load(config.RISCO_MODELO)
+    colunas = getattr(modelo, 'colunas_risco_', None) or colunas_modelo(snap.df)
+    segundos_treino = time.perf_counter() - inicio
+
+    # Grava em diretório temporário e renomeia no final (como o snapshot)
+    tmp = Path(tempfile.mkdtemp(prefix='.tmp-', dir=caminho.parent))
+    try:
+        inicio = time.perf_counter()
+        risco = np.lib.format.open_memmap(tmp / 'risco.npy', mode='w+', dtype=np.float32,
+                                          shape=(len(snap.df),))
+        pontuar(modelo, snap.df, colunas, saida=risco)
+        risco.flush()
+        del risco
+        segundos_pontuacao = time.perf_counter() - inicio
+
+        joblib.dump(modelo, tmp / 'modelo.joblib')
+        info = {
+            'origem': origem,
+            'colunas': colunas,
+            'linhas': len(snap.df),
+            'linhas_treino': min(len(snap.df), config.RISCO_AMOSTRA_TREINO or len(snap.df))
+            if origem == ORIGEM_TREINADO else None,
+            'segundos_treino': round(segundos_treino, 3),
+            'segundos_pontuacao': round(segundos_pontuacao, 3),
+            'criado_em': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        }
+        with open(tmp / 'info.json', 'w', encoding='utf-8') as f:
+            json.dump(info, f, ensure_ascii=False, indent=2)
+
+        try:
+            os.replace(tmp, caminho)
+        except OSError:
+            # Outro processo gravou a mesma versão antes (sem a trava, ex.:
+            # Windows ou outra máquina no mesmo volume): vale o que já está lá
+            if not (caminho / 'info.json').exists():
+                raise
+            shutil.rmtree(tmp, ignore_errors=True)
+            return
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    print(f"🩺 Modelo de risco ({origem}): treino {segundos_treino:.1f}s, "
+          f"{len(snap.df)} linhas pontuadas em {segundos_pontuacao:.1f}s")
+
+
+def construir(snap):
+    """
+    Treina (ou carrega) o modelo, pontua todas as linhas do snapshot e grava
+    o resultado ao lado dele. Reaproveita o que já estiver gravado.
+    """
+    _exigir_sklearn()
+
+    origem = _origem_modelo()
+    caminho = _diretorio(snap, origem)
+    gravado = _ler_gravado(caminho, len(snap.df))
+    if gravado is not None:
+        return gravado
+
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    # Apenas um processo treina; os outros esperam a trava e leem o resultado
+    with _trava(caminho):
+        gravado = _ler_gravado(caminho, len(snap.df))
+        if gravado is None:
+            _gravar(snap, origem, caminho)
+    return _ler(caminho, len(snap.df))
+
+
+def _carregar(snap):
+    if not config.RISCO or _sklearn() is None:
+        return None
+    try:
+        return construir(snap)
+    except (ModeloIndisponivel, ValueError, OSError) as e:
+        print(f"⚠️ Modelo de risco indisponível: {e}")
+        return None
+
+
+def modelo(snap):
+    """Modelo e probabilidades do snapshot (uma vez por versão), ou None"""
+    return snap.derivado('risco', _carregar)
+
+
+def coluna(snap):
+    """Probabilidades de todas as linhas do snapshot, ou None sem modelo"""
+    risco = modelo(snap)
+    return None if risco is None else risco.risco
+
+
+def valor(snap, posicao):
+    """Probabilidade da linha na posição `posicao`, ou None sem modelo"""
+    risco = coluna(snap)
+    return None if risco is None else float(risco[posicao])
+
+
+# --- Pontuação de registros enviados ---
+
+def pontuar_csv(risco, arquivo, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    CSV de entrada com a coluna 'risco' adicionada, lido e pontuado em
+    blocos: gera os bytes do CSV de saída bloco a bloco
+    """
+    for i, bloco in enumerate(pd.read_csv(arquivo, chunksize=tamanho_bloco, na_values=['?'])):
+        bloco[COLUNA_RISCO] = np.round(risco.pontuar(bloco, tamanho_bloco), 4)
+        yield bloco.to_csv(header=(i == 0), index=False).encode('utf-8')
+
+
+def _muito_grande():
+    import flask
+    return flask.jsonify(erro=f'Arquivo maior que {config.RISCO_UPLOAD_MAX_MB:.0f} MB'), 413
+
+
+def _rota_risco():
+    import flask
+    from werkzeug.exceptions import RequestEntityTooLarge
+
+    import snapshot
+
+    # O limite vale também sem Content-Length (upload chunked): o Werkzeug
+    # para de ler o corpo um byte depois dele (o multipart falha com 413, o
+    # corpo lido com get_data vem truncado e é conferido abaixo)
+    limite = int(config.RISCO_UPLOAD_MAX_MB * 1024 * 1024)
+    flask.request.max_content_length = limite + 1
+    if flask.request.content_length and flask.request.content_length > limite:
+        return _muito_grande()
+
+    risco = modelo(snapshot.atual())
+    if risco is None:
+        return flask.jsonify(erro='Modelo de risco indisponível'), 503
+
+    # multipart (campo 'arquivo') ou o CSV no corpo da requisição, lidos por
+    # inteiro (até o limite) antes de a resposta começar
+    try:
+        enviado = flask.request.files.get('arquivo')
+        if enviado is not None:
+            arquivo = enviado.stream
+        else:
+            dados = flask.request.get_data()
+            if len(dados) > limite:
+                return _muito_grande()
+            arquivo = io.BytesIO(dados)
+    except RequestEntityTooLarge:
+        return _muito_grande()
+
+    # O primeiro bloco é pontuado aqui: colunas ausentes e CSV inválido ainda
+    # viram 400; o restante segue em streaming, como em exportacao.py
+    partes = pontuar_csv(risco, arquivo)
+    try:
+        primeira = next(partes, b'')
+    except (ValueError, pd.errors.ParserError) as e:
+        return flask.jsonify(erro=str(e)), 400
+    corpo = itertools.chain([primeira], partes)
+    return flask.Response(flask.stream_with_context(corpo), mimetype='text/csv')
+
+
+def instalar(app):
+    """Adiciona a rota de pontuação em lote ao servidor Flask do app"""
+    if config.RISCO:
+        app.server.add_url_rule(ROTA_RISCO, 'risco', _rota_risco, methods=['POST'])
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Modelo de risco de doença cardíaca')
+    sub = parser.add_subparsers(dest='comando', required=True)
+    sub.add_parser('treinar', help='treina (ou carrega) o modelo e pontua o snapshot em uso')
+    pontuar_cmd = sub.add_parser('pontuar', help='pontua um CSV com as colunas de features')
+    pontuar_cmd.add_argument('entrada')
+    pontuar_cmd.add_argument('saida')
+    args = parser.parse_args(argv)
+
+    import snapshot
+
+    try:
+        snap = snapshot.atual()
+        risco = construir(snap)
+    except (ModeloIndisponivel, snapshot.SnapshotIndisponivel) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    if args.comando == 'treinar':
+        print(f"✅ Modelo de risco do snapshot {snap.versao}: {json.dumps(risco.info, ensure_ascii=False)}")
+    else:
+        inicio = time.perf_counter()
+        with open(args.entrada, 'rb') as f, open(args.saida, 'wb') as saida:
+            for parte in pontuar_csv(risco, f):
+                saida.write(parte)
+        print(f"✅ {args.saida} gravado em {time.perf_counter() - inicio:.1f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,122 @@
+# Modo de produção: vários processos servindo o mesmo snapshot
+#
+# O snapshot e todas as estruturas derivadas (máscaras de filtro, cubo,
+# permutações da tabela, índice de pacientes) são montados uma única vez no
+# processo mestre do gunicorn (preload_app), antes do fork. Os workers
+# herdam essas páginas por copy-on-write: as colunas são memmaps somente
+# leitura e os arrays derivados também são marcados como somente leitura,
+# então nenhuma página é copiada e a memória total cresce pouco com o
+# número de workers. Configuração em gunicorn.conf.py e config.py.
+#
+# Uso:
+#
+#   gunicorn 'servidor:criar_app()'     # lê gunicorn.conf.py automaticamente
+#   python servidor.py                  # o mesmo, pelo próprio Python
+#
+# Rotas de saúde: /saude (processo vivo) e /pronto (dados carregados e
+# cache de respostas aquecido, veja aquecimento.py).
+# O mestre verifica periodicamente se há um snapshot novo, o prepara uma
+# vez e troca os workers por novos forks, sem reiniciar (veja recarga.py).
+
+import sys
+import threading
+import time
+
+import flask
+
+import config
+import correlacoes
+import cubo
+import filtros
+import modo_cliente
+import pacientes
+import risco
+import snapshot
+import tabela
+
+ROTA_SAUDE = '/saude'
+ROTA_PRONTO = '/pronto'
+
+_pronto = threading.Event()
+
+
+def preparar(snap):
+    """
+    Monta as estruturas derivadas do snapshot que os callbacks consultam,
+    para que sejam criadas uma vez (no mestre) e compartilhadas.
+    """
+    indice_filtros = filtros.indice(snap)
+    for sexo in (filtros.TODOS, 0, 1):
+        for diagnostico in (filtros.TODOS, 0, 1):
+            indice_filtros.posicoes(sexo, diagnostico)
+
+    cubo.cubo(snap)
+    # Matrizes de correlação: o custo O(n·k²) uma vez por snapshot
+    for metodo in correlacoes.NOMES_METODOS:
+        for sexo in (filtros.TODOS, 0, 1):
+            correlacoes.matriz(snap, metodo, sexo)
+    pacientes.indice(snap)
+    # Modelo treinado (ou carregado) e todas as linhas pontuadas em lote
+    risco.modelo(snap)
+
+    indice_tabela = tabela.indice(snap)
+    for coluna in tabela.COLUNAS_TABELA:
+        indice_tabela.permutacao(coluna)
+    indice_tabela.posicoes()
+
+    if modo_cliente.modo(snap) == modo_cliente.MODO_CLIENTE:
+        modo_cliente.payload_snapshot(snap)
+    return snap
+
+
+def pronto():
+    """True quando o snapshot e as estruturas derivadas estão prontos"""
+    return _pronto.is_set()
+
+
+def _rota_saude():
+    return flask.jsonify(status='ok')
+
+
+def _rota_pronto():
+    if not pronto():
+        return flask.jsonify(status='carregando'), 503
+    snap = snapshot.atual()
+    return flask.jsonify(status='pronto', versao=snap.versao, linhas=len(snap.df))
+
+
+def criar_app():
+    """Aplicação WSGI (Flask) do dashboard, com os dados já carregados"""
+    inicio = time.perf_counter()
+    snap = preparar(snapshot.atual())
+
+    import app
+
+    servidor = app.create_app().server
+    servidor.add_url_rule(ROTA_SAUDE, 'saude', _rota_saude)
+    servidor.add_url_rule(ROTA_PRONTO, 'pronto', _rota_pronto)
+
+    # Respostas de todas as combinações dos controles, antes de ficar pronto
+    # (no mestre, com preload: os workers herdam o cache em memória)
+    if config.AQUECIMENTO:
+        import aquecimento
+        aquecimento.aquecer(snap)
+    _pronto.set()
+    print(f"✅ Snapshot {snap.versao} ({len(snap.df)} linhas) pronto em "
+          f"{time.perf_counter() - inicio:.1f}s")
+    return servidor
+
+
+def main(argv=None):
+    try:
+        from gunicorn.app.wsgiapp import run
+    except ImportError:
+        print("❌ gunicorn não está instalado (pip install -r requirements.txt); "
+              "use 'python app.py' para o servidor de desenvolvimento", file=sys.stderr)
+        return 1
+    sys.argv = ['gunicorn', *(argv if argv is not None else sys.argv[1:]), 'servidor:criar_app()']
+    return run()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,139 @@
+# Gerador de dados sintéticos no formato do dataset de doenças cardíacas
+#
+# Produz as mesmas colunas de heart_disease.data.features mais 'target', com
+# distribuições marginais próximas às do dataset UCI (303 pacientes), uma
+# relação plausível entre as variáveis e o diagnóstico, e valores ausentes
+# em 'ca' e 'thal'. Os dados são gerados em blocos, então é possível gravar
+# snapshots de 10 mil a 100 milhões de linhas sem carregá-los na memória.
+#
+# Uso pela linha de comando:
+#
+#   python sintetico.py 1000000                    # snapshot em dados_cache/
+#   python sintetico.py 1000000 --destino /tmp/x   # em outro diretório
+#   python sintetico.py 10000 --csv dados.csv      # exporta em CSV
+
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import snapshot
+
+# Colunas de heart_disease.data.features, na ordem do UCI
+COLUNAS_FEATURES = [
+    'age', 'sex', 'cp', 'trestbps', 'chol', 'fbs', 'restecg',
+    'thalach', 'exang', 'oldpeak', 'slope', 'ca', 'thal'
+]
+
+TAMANHO_BLOCO = 1_000_000
+
+# Proporções observadas no dataset UCI
+_P_CP = [0.076, 0.165, 0.284, 0.475]          # 1..4
+_P_RESTECG = [0.498, 0.013, 0.489]             # 0..2
+_P_SLOPE = [0.469, 0.462, 0.069]               # 1..3
+_P_CA = [0.586, 0.215, 0.125, 0.074]           # 0..3
+_P_THAL = [0.555, 0.060, 0.385]                # 3, 6, 7
+_P_GRAVIDADE = [0.40, 0.26, 0.25, 0.09]        # target 1..4 entre os doentes
+_P_CA_AUSENTE = 4 / 303
+_P_THAL_AUSENTE = 2 / 303
+
+
+def _bloco(rng, n):
+    """Um bloco de `n` linhas sintéticas (features + target)"""
+    age = np.clip(rng.normal(54.4, 9.0, n), 29, 77).round()
+    sex = (rng.random(n) < 0.68).astype(np.int64)
+    cp = rng.choice([1, 2, 3, 4], n, p=_P_CP)
+    trestbps = np.clip(rng.normal(131.7, 17.6, n), 94, 200).round()
+    chol = np.clip(rng.lognormal(np.log(242), 0.2, n), 126, 564).round()
+    fbs = (rng.random(n) < 0.149).astype(np.int64)
+    restecg = rng.choice([0, 1, 2], n, p=_P_RESTECG)
+    # Frequência máxima cai com a idade
+    thalach = np.clip(rng.normal(208 - 1.08 * age, 20.0, n), 71, 202).round()
+    exang = (rng.random(n) < 0.327).astype(np.int64)
+    oldpeak = np.clip(rng.exponential(1.04, n), 0, 6.2).round(1)
+    slope = rng.choice([1, 2, 3], n, p=_P_SLOPE)
+    ca = rng.choice([0, 1, 2, 3], n, p=_P_CA).astype(float)
+    thal = rng.choice([3, 6, 7], n, p=_P_THAL).astype(float)
+
+    # Probabilidade de doença a partir de um escore logístico
+    escore = (
+        -3.2
+        + 1.1 * (cp == 4) + 0.9 * exang + 0.6 * oldpeak + 0.8 * ca
+        + 1.2 * (thal == 7) + 0.7 * sex - 0.02 * (thalach - 150)
+        + 0.02 * (age - 54)
+    )
+    doente = rng.random(n) < 1 / (1 + np.exp(-escore))
+    target = np.where(doente, rng.choice([1, 2, 3, 4], n, p=_P_GRAVIDADE), 0)
+
+    ca[rng.random(n) < _P_CA_AUSENTE] = np.nan
+    thal[rng.random(n) < _P_THAL_AUSENTE] = np.nan
+
+    df = pd.DataFrame({
+        'age': age.astype(np.int64),
+        'sex': sex,
+        'cp': cp.astype(np.int64),
+        'trestbps': trestbps.astype(np.int64),
+        'chol': chol.astype(np.int64),
+        'fbs': fbs,
+        'restecg': restecg.astype(np.int64),
+        'thalach': thalach.astype(np.int64),
+        'exang': exang,
+        'oldpeak': oldpeak,
+        'slope': slope.astype(np.int64),
+        'ca': ca,
+        'thal': thal,
+    })
+    df['target'] = target.astype(np.int64)
+    return df
+
+
+def gerar_blocos(n, semente=0, tamanho_bloco=TAMANHO_BLOCO, derivar=True):
+    """
+    Gera `n` linhas em blocos de até `tamanho_bloco`. Com derivar=True
+    cada bloco já vem com patient_id e as colunas derivadas do dashboard.
+    """
+    rng = np.random.default_rng(semente)
+    for inicio in range(0, n, tamanho_bloco):
+        bloco = _bloco(rng, min(tamanho_bloco, n - inicio))
+        if derivar:
+            snapshot.derivar_colunas(bloco, primeiro_id=inicio + 1)
+        yield bloco
+
+
+def gerar(n, semente=0, derivar=True):
+    """DataFrame com `n` linhas sintéticas"""
+    return pd.concat(list(gerar_blocos(n, semente, derivar=derivar)), ignore_index=True)
+
+
+def gerar_snapshot(n, raiz=None, semente=0, tamanho_bloco=TAMANHO_BLOCO):
+    """Grava um snapshot sintético de `n` linhas e o marca como atual"""
+    origem = {'tipo': 'sintetico', 'linhas': int(n), 'semente': int(semente)}
+    return snapshot.salvar_blocos(
+        gerar_blocos(n, semente, tamanho_bloco), n, raiz=raiz, origem=origem
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Gera dados sintéticos de doenças cardíacas')
+    parser.add_argument('linhas', type=int, help='número de pacientes')
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--destino', help='diretório de snapshots (padrão: config.DIRETORIO_CACHE)')
+    parser.add_argument('--csv', help='exporta features + target em CSV em vez de gravar snapshot')
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    if args.csv:
+        for i, bloco in enumerate(gerar_blocos(args.linhas, args.semente, derivar=False)):
+            bloco.to_csv(args.csv, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+        print(f"✅ {args.linhas} linhas gravadas em {args.csv}")
+    else:
+        manifesto = gerar_snapshot(args.linhas, raiz=args.destino, semente=args.semente)
+        print(f"✅ Snapshot sintético {manifesto['versao']} com {args.linhas} linhas")
+    print(f"Tempo: {time.perf_counter() - inicio:.1f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,418 @@
+# Snapshot colunar local do dataset de doenças cardíacas
+#
+# Na primeira carga o dataset é baixado do UCI ML Repository, as colunas
+# derivadas são calculadas e o DataFrame resultante é gravado como um pacote
+# de arquivos .npy (um por coluna) com um manifesto versionado e checksums.
+# As inicializações seguintes apenas mapeiam esses arquivos em memória
+# (np.load com mmap_mode='r'), sem depender da rede.
+#
+# Estrutura em disco:
+#
+#   dados_cache/heart-disease/
+#   ├── ATUAL                  # nome da versão em uso
+#   └── v2-<hash>/
+#       ├── manifesto.json     # colunas, dtypes, checksums sha256, linhas
+#       ├── age.npy
+#       └── ...
+#
+# Uso pela linha de comando:
+#
+#   python snapshot.py atualizar    # baixa o dataset e grava novo snapshot
+#   python snapshot.py info         # mostra o snapshot em uso
+#   python snapshot.py verificar    # confere os checksums do snapshot
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import config
+import esquema
+
+
+UCI_ID = 45
+NOME_DATASET = 'heart-disease'
+
+# Incrementar sempre que o formato gravado em disco mudar
+# (2: dtypes compactos de esquema.py e rótulos montados na leitura)
+VERSAO_FORMATO = 2
+
+# Formatos que ainda podem ser lidos (convertidos para o atual na carga)
+FORMATOS_LEGIVEIS = (1, 2)
+
+MAPA_SEXO = esquema.MAPA_SEXO
+MAPA_DOR = esquema.MAPA_DOR
+
+
+class SnapshotIndisponivel(RuntimeError):
+    """Nenhum snapshot local disponível e o download não é permitido"""
+
+
+class SnapshotCorrompido(RuntimeError):
+    """Os arquivos do snapshot não conferem com o manifesto"""
+
+
+@dataclass
+class Snapshot:
+    """Versão imutável do dataset carregada a partir do disco"""
+    df: pd.DataFrame
+    versao: str
+    manifesto: dict
+    caminho: Path
+    _derivados: dict = field(default_factory=dict, repr=False)
+    _lock: threading.RLock = field(default_factory=threading.RLock, repr=False)
+
+    def derivado(self, nome, fabrica):
+        """
+        Estrutura derivada do snapshot (índices, agregados...), calculada
+        uma única vez por versão com fabrica(snapshot) e reutilizada depois.
+        """
+        try:
+            return self._derivados[nome]
+        except KeyError:
+            pass
+        with self._lock:
+            if nome not in self._derivados:
+                self._derivados[nome] = fabrica(self)
+            return self._derivados[nome]
+
+
+def derivar_colunas(df, primeiro_id=1):
+    """
+    Adiciona as colunas derivadas usadas pelo dashboard (in-place).
+    Para dados em blocos, `primeiro_id` é o patient_id da primeira linha.
+    """
+    # ID persistente do paciente: gravado no snapshot, não depende da
+    # posição da linha em visões filtradas ou ordenadas
+    if 'patient_id' not in df.columns:
+        df.insert(0, 'patient_id', np.arange(primeiro_id, primeiro_id + len(df), dtype=np.int64))
+
+    # Converter target para binário (0 = sem doença, 1 = com doença)
+    df['has_disease'] = (df['target'] > 0).astype(np.int8)
+
+    # Labels legíveis como Categorical (veja esquema.py)
+    return esquema.adicionar_rotulos(df)
+
+
+def baixar_uci():
+    """Baixa o dataset do UCI ML Repository e monta o DataFrame completo"""
+    # Import tardio: só é necessário quando há download
+    from ucimlrepo import fetch_ucirepo
+
+    heart_disease = fetch_ucirepo(id=UCI_ID)
+
+    # Combinar features e target em um único DataFrame
+    df = heart_disease.data.features.copy()
+    df['target'] = heart_disease.data.targets
+    return derivar_colunas(df)
+
+
+def _diretorio_dataset(raiz=None):
+    return Path(raiz or config.DIRETORIO_CACHE) / NOME_DATASET
+
+
+def _sha256(caminho):
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def _para_array(serie):
+    """Converte uma coluna do DataFrame em array numpy gravável em .npy"""
+    if serie.dtype == object:
+        return serie.fillna('').astype(str).to_numpy(dtype=str)
+    return esquema.converter(serie)
+
+
+def salvar(df, raiz=None, origem=None, extras=None):
+    """Grava o DataFrame como um novo snapshot e o marca como atual"""
+    return salvar_blocos([df], len(df), raiz=raiz, origem=origem, extras=extras)
+
+
+def salvar_blocos(blocos, linhas, raiz=None, origem=None, extras=None):
+    """
+    Grava um snapshot a partir de blocos de DataFrame (com as mesmas
+    colunas) somando `linhas` no total, sem manter o dataset inteiro em
+    memória: cada coluna é escrita diretamente em um .npy mapeado.
+    As colunas de rótulo não são gravadas (são montadas na leitura).
+
+    `extras` ({nome do arquivo: bytes}) são gravados junto com as colunas,
+    com checksum no manifesto (ex.: o resumo de uma ingestão em blocos).
+    """
+    base = _diretorio_dataset(raiz)
+    base.mkdir(parents=True, exist_ok=True)
+
+    # Grava em diretório temporário e renomeia no final (operação atômica)
+    tmp = Path(tempfile.mkdtemp(prefix='.tmp-', dir=base))
+    try:
+        arquivos = None
+        escritas = 0
+        for bloco in blocos:
+            if arquivos is None:
+                # O primeiro bloco define colunas e dtypes
+                arquivos = {}
+                for nome in bloco.columns.difference(list(esquema.ROTULOS), sort=False):
+                    dtype = _para_array(bloco[nome].iloc[:1]).dtype
+                    arquivos[nome] = np.lib.format.open_memmap(
+                        tmp / f'{nome}.npy', mode='w+', dtype=dtype, shape=(linhas,)
+                    )
+            if escritas + len(bloco) > linhas:
+                raise ValueError('Os blocos têm mais linhas que o informado')
+            for nome, destino in arquivos.items():
+                destino[escritas:escritas + len(bloco)] = _para_array(bloco[nome])
+            escritas += len(bloco)
+        if arquivos is None or escritas != linhas:
+            raise ValueError(f'Esperadas {linhas} linhas, recebidas {escritas}')
+
+        colunas = []
+        for nome, arr in arquivos.items():
+            arr.flush()
+            arquivo = f'{nome}.npy'
+            colunas.append({
+                'nome': nome,
+                'arquivo': arquivo,
+                'dtype': arr.dtype.str,
+                'sha256': _sha256(tmp / arquivo),
+            })
+        del arquivos, arr
+
+        arquivos_extras = {}
+        for nome, dados in (extras or {}).items():
+            (tmp / nome).write_bytes(dados)
+            arquivos_extras[nome] = {'sha256': _sha256(tmp / nome), 'bytes': len(dados)}
+
+        # A versão é derivada do conteúdo: dados idênticos geram a mesma versão
+        conteudo = hashlib.sha256()
+        for col in colunas:
+            conteudo.update(f"{col['nome']}:{col['sha256']};".encode())
+        for nome, extra in sorted(arquivos_extras.items()):
+            conteudo.update(f"{nome}:{extra['sha256']};".encode())
+        versao = f'v{VERSAO_FORMATO}-{conteudo.hexdigest()[:12]}'
+
+        manifesto = {
+            'dataset': NOME_DATASET,
+            'uci_id': UCI_ID,
+            'origem': origem or {'tipo': 'uci', 'uci_id': UCI_ID},
+            'formato': VERSAO_FORMATO,
+            'versao': versao,
+            'linhas': int(linhas),
+            'colunas': colunas,
+            'extras': arquivos_extras,
+            'criado_em': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        }
+        with open(tmp / 'manifesto.json', 'w', encoding='utf-8') as f:
+            json.dump(manifesto, f, ensure_ascii=False, indent=2)
+
+        destino = base / versao
+        if destino.exists():
+            shutil.rmtree(tmp)
+        else:
+            os.replace(tmp, destino)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    _marcar_atual(base, versao)
+    return manifesto
+
+
+def _marcar_atual(base, versao):
+    ponteiro_tmp = base / f'.ATUAL.{os.getpid()}'
+    ponteiro_tmp.write_text(versao, encoding='utf-8')
+    os.replace(ponteiro_tmp, base / 'ATUAL')
+
+
+def versao_atual(raiz=None):
+    """Nome da versão marcada como atual, ou None se não houver snapshot"""
+    ponteiro = _diretorio_dataset(raiz) / 'ATUAL'
+    try:
+        versao = ponteiro.read_text(encoding='utf-8').strip()
+    except FileNotFoundError:
+        return None
+    return versao or None
+
+
+def ler(versao=None, raiz=None, verificar=False):
+    """Mapeia em memória um snapshot gravado em disco"""
+    versao = versao or versao_atual(raiz)
+    if versao is None:
+        raise SnapshotIndisponivel('Nenhum snapshot local encontrado')
+
+    caminho = _diretorio_dataset(raiz) / versao
+    try:
+        with open(caminho / 'manifesto.json', encoding='utf-8') as f:
+            manifesto = json.load(f)
+    except FileNotFoundError:
+        raise SnapshotIndisponivel(f'Snapshot {versao} não encontrado em {caminho}')
+
+    if manifesto.get('formato') not in FORMATOS_LEGIVEIS:
+        raise SnapshotIndisponivel(
+            f"Snapshot {versao} usa o formato {manifesto.get('formato')}, "
+            f"esperado {VERSAO_FORMATO}"
+        )
+
+    colunas = {}
+    for col in manifesto['colunas']:
+        if col['nome'] in esquema.ROTULOS:
+            # Formato 1 gravava os rótulos como texto; agora vêm dos códigos
+            continue
+        arquivo = caminho / col['arquivo']
+        if verificar and _sha256(arquivo) != col['sha256']:
+            raise SnapshotCorrompido(f"Checksum inválido para a coluna {col['nome']}")
+
+        arr = np.load(arquivo, mmap_mode='r', allow_pickle=False)
+        if len(arr) != manifesto['linhas']:
+            raise SnapshotCorrompido(f"Tamanho inválido para a coluna {col['nome']}")
+
+        if arr.dtype.kind == 'U':
+            # Colunas de texto não são mapeáveis como objeto: materializa
+            # uma vez e marca como somente leitura, assim como os memmaps.
+            # Cada valor distinto vira um único objeto str compartilhado por
+            # todas as linhas (menos memória e nenhuma página tocada pelo
+            # contador de referências nos workers após o fork)
+            distintos, codigos = np.unique(arr, return_inverse=True)
+            distintos = distintos.astype(object)
+            distintos[distintos == ''] = np.nan
+            obj = distintos.take(codigos)
+            obj.flags.writeable = False
+            serie = pd.Series(obj, copy=False)
+        else:
+            if esquema.TIPOS.get(col['nome'], arr.dtype) != arr.dtype:
+                # Snapshot em formato antigo: convertido uma vez na carga
+                arr = esquema.converter(pd.Series(arr, name=col['nome'], copy=False))
+                arr.flags.writeable = False
+            serie = pd.Series(arr, copy=False)
+        colunas[col['nome']] = serie
+
+    if verificar:
+        for nome, extra in manifesto.get('extras', {}).items():
+            if _sha256(caminho / nome) != extra['sha256']:
+                raise SnapshotCorrompido(f'Checksum inválido para o arquivo {nome}')
+
+    df = pd.DataFrame(colunas, copy=False)
+    if 'patient_id' not in df.columns:
+        # Snapshots anteriores aos IDs persistentes: IDs pela ordem das linhas
+        ids = np.arange(1, len(df) + 1, dtype=esquema.TIPOS['patient_id'])
+        ids.flags.writeable = False
+        df.insert(0, 'patient_id', ids)
+    esquema.adicionar_rotulos(df)
+    return Snapshot(df=df, versao=versao, manifesto=manifesto, caminho=caminho)
+
+
+def carregar(offline=None, atualizar=False, raiz=None):
+    """
+    Retorna o snapshot do dataset, baixando-o apenas quando necessário.
+
+    offline=True nunca acessa a rede (padrão: config.MODO_OFFLINE).
+    atualizar=True força um novo download mesmo havendo snapshot local.
+    """
+    if offline is None:
+        offline = config.MODO_OFFLINE
+
+    if not atualizar:
+        try:
+            return ler(raiz=raiz)
+        except SnapshotIndisponivel:
+            if offline:
+                raise SnapshotIndisponivel(
+                    'Modo offline ativo e nenhum snapshot local disponível. '
+                    'Execute "python snapshot.py atualizar" com acesso à rede.'
+                )
+    elif offline:
+        raise SnapshotIndisponivel('Não é possível atualizar o snapshot em modo offline')
+
+    try:
+        df = baixar_uci()
+    except Exception as e:
+        # Sem rede: se já existe um snapshot, seguimos com ele
+        if atualizar and versao_atual(raiz) is not None:
+            print(f"⚠️ Falha ao atualizar o dataset ({e}); usando snapshot local.")
+            return ler(raiz=raiz)
+        raise
+
+    manifesto = salvar(df, raiz=raiz)
+    return ler(manifesto['versao'], raiz=raiz)
+
+
+_lock = threading.Lock()
+_atual = None
+_ouvintes = []
+
+
+def atual():
+    """Snapshot em uso pelo processo (carregado na primeira chamada)"""
+    global _atual
+    if _atual is None:
+        with _lock:
+            if _atual is None:
+                _atual = carregar()
+    return _atual
+
+
+def publicar(snap):
+    """
+    Troca o snapshot em uso por `snap` (troca atômica da referência).
+    Quem já obteve o snapshot anterior com atual() continua com ele até o
+    fim da requisição; as próximas chamadas recebem o novo. Devolve o
+    snapshot anterior (ou None).
+    """
+    global _atual
+    with _lock:
+        anterior, _atual = _atual, snap
+    if anterior is None or anterior.versao != snap.versao:
+        for ouvinte in list(_ouvintes):
+            ouvinte(snap)
+    return anterior
+
+
+def ao_publicar(funcao):
+    """Registra funcao(snapshot) para ser chamada a cada troca de versão"""
+    _ouvintes.append(funcao)
+    return funcao
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Gerencia o snapshot local do dataset')
+    sub = parser.add_subparsers(dest='comando', required=True)
+    sub.add_parser('atualizar', help='baixa o dataset do UCI e grava um novo snapshot')
+    sub.add_parser('info', help='mostra o snapshot em uso')
+    sub.add_parser('verificar', help='confere os checksums do snapshot em uso')
+    args = parser.parse_args(argv)
+
+    try:
+        if args.comando == 'atualizar':
+            inicio = time.perf_counter()
+            snap = carregar(offline=False, atualizar=True)
+            print(f"✅ Snapshot {snap.versao} gravado em {snap.caminho} "
+                  f"({time.perf_counter() - inicio:.1f}s)")
+        elif args.comando == 'info':
+            inicio = time.perf_counter()
+            snap = ler()
+            print(f"Versão: {snap.versao}")
+            print(f"Caminho: {snap.caminho}")
+            print(f"Criado em: {snap.manifesto['criado_em']}")
+            print(f"Formato do dataset: {snap.df.shape}")
+            print(f"Tempo de carga: {(time.perf_counter() - inicio) * 1000:.1f} ms")
+        elif args.comando == 'verificar':
+            snap = ler(verificar=True)
+            print(f"✅ Snapshot {snap.versao} íntegro")
+    except (SnapshotIndisponivel, SnapshotCorrompido) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
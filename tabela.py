@@ -0,0 +1,379 @@
+# Paginação, ordenação e filtro da tabela de pacientes no servidor
+#
+# A DataTable usa page_action/sort_action/filter_action='custom': o servidor
+# recebe a página, a ordenação e a filter_query e devolve apenas as linhas
+# visíveis e o total. A filter_query é convertida em predicados vetorizados
+# (NumPy) e a ordenação usa permutações pré-calculadas por coluna, de modo
+# que nenhuma requisição percorre as linhas em Python.
+#
+# Sintaxe de filter_query suportada (a gerada pela DataTable):
+#   {coluna} operador valor   [&& {coluna} operador valor ...]
+#   operadores: = eq != ne < lt <= le > gt >= ge contains datestartswith,
+#               opcionalmente com prefixo 'i' (sem diferenciar maiúsculas)
+#               ou 's' (diferenciando); e também 'is blank' / 'is not blank'
+
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import filtros
+import metricas
+import risco
+from pacientes import COLUNA_ID
+
+# Colunas exibidas na tabela, na ordem das colunas da DataTable
+COLUNAS_TABELA = ['id', 'age', 'sex_label', 'cp_label', 'trestbps', 'chol', 'thalach', 'risco', 'diagnostico_label']
+COLUNAS_NUMERICAS = ('id', 'age', 'trestbps', 'chol', 'thalach', 'risco')
+
+# Label para diagnóstico (derivada de has_disease)
+LABELS_DIAGNOSTICO = {0: 'Sem Doença', 1: 'Com Doença'}
+
+# Quantas ordenações completas (sem filter_query) ficam em cache
+MAX_ORDENACOES_CACHE = 32
+
+_OPERADORES = {
+    '=': 'eq', 'eq': 'eq',
+    '!=': 'ne', 'ne': 'ne',
+    '<': 'lt', 'lt': 'lt',
+    '<=': 'le', 'le': 'le',
+    '>': 'gt', 'gt': 'gt',
+    '>=': 'ge', 'ge': 'ge',
+    'contains': 'contains',
+    'datestartswith': 'datestartswith',
+}
+
+_RE_EXPRESSAO = re.compile(
+    r'''^\s*\{(?P<coluna>[^}]+)\}\s+
+        (?:
+            (?P<unario>is\s+(?:not\s+)?blank)
+          | (?P<prefixo>[is])?(?P<operador><=|>=|!=|<|>|=|eq|ne|lt|le|gt|ge|contains|datestartswith)
+            \s+(?P<valor>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*'|`(?:[^`\\]|\\.)*`|\S+)
+        )\s*$''',
+    re.IGNORECASE | re.VERBOSE
+)
+
+
+class FiltroInvalido(ValueError):
+    """filter_query com sintaxe não suportada"""
+
+
+def argumentos_consulta(diagnostico, num_registros, page_current=0, sort_by=None, filter_query=''):
+    """
+    Entradas do callback da tabela em forma canônica (chave de cache): a
+    DataTable envia sort_by=[] e filter_query='' no estado inicial, e None
+    quando a propriedade não foi definida; as duas formas são a mesma consulta.
+    """
+    return (diagnostico, num_registros, page_current or 0, list(sort_by or []), filter_query or '')
+
+
+def interpretar_filtro(filter_query):
+    """
+    Converte a filter_query da DataTable em uma lista de condições
+    (coluna, operador, valor, diferenciar_maiusculas).
+    """
+    if not filter_query or not filter_query.strip():
+        return []
+    if '||' in filter_query or re.search(r'\sor\s', filter_query, re.IGNORECASE):
+        raise FiltroInvalido('Apenas condições combinadas com "&&" são suportadas')
+
+    condicoes = []
+    for parte in re.split(r'\s+(?:&&|and)\s+', filter_query.strip(), flags=re.IGNORECASE):
+        m = _RE_EXPRESSAO.match(parte)
+        if not m:
+            raise FiltroInvalido(f'Expressão de filtro não suportada: {parte}')
+        coluna = m.group('coluna')
+        if coluna not in COLUNAS_TABELA:
+            raise FiltroInvalido(f'Coluna desconhecida: {coluna}')
+        if m.group('unario'):
+            operador = 'not_blank' if 'not' in m.group('unario').lower() else 'blank'
+            condicoes.append((coluna, operador, None, True))
+            continue
+        valor = m.group('valor')
+        if valor[0] in '"\'`' and valor[-1] == valor[0]:
+            valor = re.sub(r'\\(.)', r'\1', valor[1:-1])
+        sensivel = (m.group('prefixo') or 's').lower() == 's'
+        condicoes.append((coluna, _OPERADORES[m.group('operador').lower()], valor, sensivel))
+    return condicoes
+
+
+def _comparar(valores, operador, alvo):
+    if operador == 'eq':
+        return valores == alvo
+    if operador == 'ne':
+        return valores != alvo
+    if operador == 'lt':
+        return valores < alvo
+    if operador == 'le':
+        return valores <= alvo
+    if operador == 'gt':
+        return valores > alvo
+    if operador == 'ge':
+        return valores >= alvo
+    raise FiltroInvalido(f'Operador não suportado: {operador}')
+
+
+class _ColunaTexto:
+    """Coluna de texto fatorada: códigos inteiros + poucos valores distintos"""
+
+    def __init__(self, codigos, categorias):
+        self.codigos = codigos
+        self.categorias = np.asarray(categorias, dtype=object)
+
+    def mascara(self, operador, valor, sensivel):
+        # O predicado é avaliado só nas categorias; as linhas herdam o resultado
+        categorias = pd.Series(self.categorias, dtype=object)
+        if operador == 'blank':
+            return self.codigos < 0
+        if operador == 'not_blank':
+            return self.codigos >= 0
+
+        texto = categorias if sensivel else categorias.str.lower()
+        alvo = str(valor) if sensivel else str(valor).lower()
+        if operador == 'contains':
+            ok = texto.str.contains(alvo, regex=False)
+        elif operador == 'datestartswith':
+            ok = texto.str.startswith(alvo)
+        else:
+            ok = _comparar(texto, operador, alvo)
+        selecionadas = np.flatnonzero(ok.to_numpy(dtype=bool))
+        return np.isin(self.codigos, selecionadas)
+
+    def chave_ordenacao(self):
+        # Posição de cada categoria na ordem alfabética; ausentes por último
+        ordem = np.argsort(self.categorias.astype(str), kind='stable')
+        rank = np.empty(len(self.categorias) + 1, dtype=np.int64)
+        rank[ordem] = np.arange(len(self.categorias))
+        rank[-1] = len(self.categorias)
+        return rank[self.codigos], int((self.codigos >= 0).sum())
+
+    def valores(self, posicoes):
+        codigos = self.codigos[posicoes]
+        saida = self.categorias.take(np.maximum(codigos, 0))
+        saida[codigos < 0] = None
+        return saida
+
+
+class IndiceTabela:
+    """Colunas da tabela, permutações de ordenação e consultas paginadas"""
+
+    def __init__(self, snap):
+        self.indice = filtros.indice(snap)
+        self.snap = snap
+        self.df = snap.df
+        self.total = len(self.df)
+        self._texto = {}
+        self._coluna_risco = None
+        self._permutacoes = {}
+        self._postos = {}
+        self._ordenacoes = OrderedDict()
+        self._lock = threading.Lock()
+
+    # --- Colunas ---
+
+    def _coluna_texto(self, coluna):
+        if coluna not in self._texto:
+            if coluna == 'diagnostico_label':
+                codigos = self.df['has_disease'].to_numpy().astype(np.int8)
+                categorias = [LABELS_DIAGNOSTICO[0], LABELS_DIAGNOSTICO[1]]
+            elif isinstance(self.df[coluna].dtype, pd.CategoricalDtype):
+                # Rótulos Categorical (esquema.py): os códigos já estão prontos
+                codigos = self.df[coluna].cat.codes.to_numpy()
+                categorias = self.df[coluna].cat.categories
+            else:
+                codigos, categorias = pd.factorize(self.df[coluna])
+            self._texto[coluna] = _ColunaTexto(codigos, categorias)
+        return self._texto[coluna]
+
+    def _numerica(self, coluna):
+        if coluna == 'id':
+            # ID persistente do paciente (também usado como row id da DataTable)
+            coluna = COLUNA_ID
+        elif coluna == 'risco':
+            # Probabilidades do modelo, calculadas em lote por snapshot (risco.py)
+            return self._risco()
+        return self.df[coluna].to_numpy()
+
+    def _risco(self):
+        if self._coluna_risco is None:
+            valores = risco.coluna(self.snap)
+            if valores is None:
+                # Sem modelo: coluna vazia
+                valores = np.full(self.total, np.nan, dtype=np.float32)
+            self._coluna_risco = valores
+        return self._coluna_risco
+
+    def valores(self, coluna, posicoes):
+        """Valores da coluna nas posições pedidas"""
+        if coluna == 'risco':
+            # float32 -> 4 casas (evita 0.7312800288... no JSON); ausentes em branco
+            valores = np.round(self._numerica(coluna)[posicoes].astype(float), 4).astype(object)
+            valores[pd.isna(valores)] = None
+            return valores
+        if coluna in COLUNAS_NUMERICAS:
+            return self._numerica(coluna)[posicoes]
+        return self._coluna_texto(coluna).valores(posicoes)
+
+    # --- Filtro e ordenação ---
+
+    def mascara(self, condicoes):
+        """Máscara booleana das linhas que satisfazem todas as condições"""
+        mascara = np.ones(self.total, dtype=bool)
+        for coluna, operador, valor, sensivel in condicoes:
+            if coluna in COLUNAS_NUMERICAS:
+                valores = self._numerica(coluna)
+                if operador == 'blank':
+                    parcial = np.isnan(valores.astype(float))
+                elif operador == 'not_blank':
+                    parcial = ~np.isnan(valores.astype(float))
+                elif operador in ('contains', 'datestartswith'):
+                    # Mesmo comportamento da DataTable: compara como texto
+                    texto = pd.Series(valores).astype(str)
+                    parcial = (texto.str.contains(str(valor), regex=False)
+                               if operador == 'contains' else texto.str.startswith(str(valor))).to_numpy()
+                else:
+                    try:
+                        alvo = float(valor)
+                    except (TypeError, ValueError):
+                        parcial = np.zeros(self.total, dtype=bool)
+                    else:
+                        with np.errstate(invalid='ignore'):
+                            parcial = _comparar(valores, operador, alvo)
+            else:
+                parcial = self._coluna_texto(coluna).mascara(operador, valor, sensivel)
+            mascara &= parcial
+        return mascara
+
+    def _chave(self, coluna):
+        """Valores comparáveis da coluna (códigos na ordem alfabética para texto) e nº de válidos"""
+        if coluna in COLUNAS_NUMERICAS:
+            valores = self._numerica(coluna)
+            return valores, int((~np.isnan(valores.astype(float))).sum())
+        return self._coluna_texto(coluna).chave_ordenacao()
+
+    def _crescente(self, coluna):
+        # Chamado com self._lock
+        if coluna not in self._permutacoes:
+            chave, validos = self._chave(coluna)
+            perm = np.argsort(chave, kind='stable')
+            perm.flags.writeable = False
+            self._permutacoes[coluna] = (perm, validos)
+        return self._permutacoes[coluna]
+
+    def postos(self, coluna):
+        """
+        Postos densos da coluna por linha (valores iguais, o mesmo posto;
+        ausentes com o maior) e o número de valores distintos
+        """
+        with self._lock:
+            if coluna not in self._postos:
+                perm, validos = self._crescente(coluna)
+                chave, _ = self._chave(coluna)
+                ordenados = chave[perm[:validos]]
+                novo = np.ones(validos, dtype=bool)
+                novo[1:] = ordenados[1:] != ordenados[:-1]
+                distintos = int(novo.sum())
+                postos = np.full(self.total, distintos, dtype=np.int32)
+                postos[perm[:validos]] = np.cumsum(novo) - 1
+                postos.flags.writeable = False
+                self._postos[coluna] = (postos, distintos)
+            return self._postos[coluna]
+
+    def permutacao(self, coluna, decrescente=False):
+        """
+        Posições na ordem da coluna, crescente ou decrescente; ausentes
+        sempre no fim e empates na ordem original das linhas
+        """
+        if not decrescente:
+            with self._lock:
+                return self._crescente(coluna)
+        postos, distintos = self.postos(coluna)
+        with self._lock:
+            if (coluna, 'desc') not in self._permutacoes:
+                perm, validos = self._crescente(coluna)
+                presentes = perm[:validos]
+                # Reordena só os valores presentes, por posto decrescente (estável)
+                invertida = presentes[np.argsort(distintos - 1 - postos[presentes], kind='stable')]
+                perm_desc = np.concatenate([invertida, perm[validos:]])
+                perm_desc.flags.writeable = False
+                self._permutacoes[(coluna, 'desc')] = (perm_desc, validos)
+            return self._permutacoes[(coluna, 'desc')]
+
+    def _ordenar(self, mascara, sort_by):
+        if len(sort_by) == 1:
+            perm, _ = self.permutacao(sort_by[0]['column_id'], sort_by[0].get('direction') == 'desc')
+            return perm if mascara is None else perm[mascara[perm]]
+
+        # Várias colunas: lexsort (estável) dos postos apenas nas linhas
+        # selecionadas; a última chave do lexsort é a primeira coluna
+        posicoes = np.arange(self.total) if mascara is None else np.flatnonzero(mascara)
+        chaves = []
+        for item in reversed(sort_by):
+            postos, distintos = self.postos(item['column_id'])
+            chave = postos[posicoes]
+            if item.get('direction') == 'desc':
+                # Inverte apenas os presentes: ausentes (posto `distintos`) no fim
+                chave = np.where(chave < distintos, distintos - 1 - chave, distintos)
+            chaves.append(chave)
+        return posicoes[np.lexsort(chaves)]
+
+    def posicoes(self, diagnostico=filtros.TODOS, filter_query='', sort_by=None):
+        """Posições de todas as linhas selecionadas, já na ordem pedida"""
+        condicoes = interpretar_filtro(filter_query)
+        sort_by = [s for s in (sort_by or []) if s.get('column_id') in COLUNAS_TABELA]
+
+        if not condicoes:
+            chave = (filtros._chave(diagnostico), tuple(
+                (s['column_id'], s.get('direction')) for s in sort_by
+            ))
+            with self._lock:
+                if chave in self._ordenacoes:
+                    self._ordenacoes.move_to_end(chave)
+                    return self._ordenacoes[chave]
+
+        with metricas.fase('filtro'):
+            mascara = self.indice.mascara(filtros.COLUNAS_FILTRO['diagnostico'], diagnostico)
+            if condicoes:
+                filtrada = self.mascara(condicoes)
+                mascara = filtrada if mascara is None else (mascara & filtrada)
+
+        with metricas.fase('agregacao'):
+            if sort_by:
+                posicoes = self._ordenar(mascara, sort_by)
+            elif mascara is None:
+                posicoes = np.arange(self.total)
+            else:
+                posicoes = np.flatnonzero(mascara)
+
+        if not condicoes:
+            posicoes.flags.writeable = False
+            with self._lock:
+                self._ordenacoes[chave] = posicoes
+                while len(self._ordenacoes) > MAX_ORDENACOES_CACHE:
+                    self._ordenacoes.popitem(last=False)
+        return posicoes
+
+    def consultar(self, diagnostico=filtros.TODOS, filter_query='', sort_by=None,
+                  pagina=0, tamanho_pagina=25, posicoes=None):
+        """Registros da página pedida e o total de linhas selecionadas
+
+        `posicoes` (o resultado de self.posicoes para os mesmos filtros) evita
+        refazer o filtro e a ordenação quando o chamador já as calculou.
+        """
+        if posicoes is None:
+            posicoes = self.posicoes(diagnostico, filter_query, sort_by)
+        total = len(posicoes)
+        inicio = pagina * tamanho_pagina
+        pagina_posicoes = posicoes[inicio:inicio + tamanho_pagina]
+
+        with metricas.fase('figura'):
+            dados = {coluna: self.valores(coluna, pagina_posicoes) for coluna in COLUNAS_TABELA}
+            registros = pd.DataFrame(dados).to_dict('records')
+        return registros, total
+
+
+def indice(snap):
+    """Índice da tabela do snapshot (construído uma vez por versão)"""
+    return snap.derivado('tabela', IndiceTabela)
@@ -0,0 +1,29 @@
+# Configuração dos testes
+#
+# Os módulos do app ficam na raiz do repositório (sem pacote): a raiz entra
+# no sys.path. Os testes usam snapshots sintéticos pequenos em diretórios
+# temporários, sem rede e sem o cache de dados local.
+#
+#   python -m pytest -q
+
+import os
+import sys
+from pathlib import Path
+
+RAIZ_REPO = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ_REPO))
+
+os.environ.setdefault('DASH_OFFLINE', '1')
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def snap(tmp_path_factory):
+    """Snapshot sintético de 2 mil pacientes"""
+    import sintetico
+    import snapshot
+
+    raiz = tmp_path_factory.mktemp('snapshot')
+    sintetico.gerar_snapshot(2_000, raiz=raiz, semente=0)
+    return snapshot.ler(raiz=raiz)
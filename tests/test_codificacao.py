@@ -0,0 +1,24 @@
+# Arrays tipados nas figuras (codificacao.py)
+
+import numpy as np
+import plotly.graph_objects as go
+
+import codificacao
+
+
+def test_arrays_de_dados_viram_base64_e_voltam_iguais():
+    x = np.arange(200, dtype=np.int64)
+    y = np.linspace(0, 1, 200)
+    fig = codificacao.figura(go.Figure(go.Scatter(x=x, y=y)), minimo=10)
+    trace = fig['data'][0]
+    assert trace['x']['dtype'] == 'u1'
+    assert codificacao.decodificar(trace['x']) == x.tolist()
+    assert codificacao.decodificar(trace['y']) == y.tolist()
+
+
+def test_ids_ficam_como_estao():
+    # O Plotly.js trata 'ids' como texto: nem ids numéricos viram array tipado
+    ids = list(range(200))
+    fig = codificacao.figura(go.Figure(go.Scatter(x=list(range(200)), ids=ids)), minimo=10)
+    assert fig['data'][0]['ids'] == ids
+    assert 'bdata' in fig['data'][0]['x']
@@ -0,0 +1,33 @@
+# Matriz de correlação (correlacoes.py) e o gráfico que a exibe
+
+import numpy as np
+import pytest
+
+import correlacoes
+import filtros
+import graficos
+from graficos import matriz_correlacao
+
+
+@pytest.mark.parametrize('metodo', [correlacoes.METODO_PEARSON, correlacoes.METODO_SPEARMAN])
+def test_matriz_igual_a_do_pandas(snap, metodo):
+    matriz = correlacoes.calcular(filtros.indice(snap), metodo, tamanho_bloco=512)
+    df = snap.df[list(matriz.colunas)].astype(float)
+    if metodo == correlacoes.METODO_SPEARMAN:
+        # Postos calculados uma vez por coluna (o pandas refaz os postos em
+        # cada par de colunas quando há ausentes)
+        df = df.rank()
+    esperada = df.corr(method=correlacoes.METODO_PEARSON).to_numpy()
+    np.testing.assert_allclose(matriz.valores, esperada, atol=1e-12)
+
+
+def test_metodo_desconhecido_no_calculo():
+    with pytest.raises(ValueError):
+        correlacoes.calcular(None, 'kendall')
+
+
+@pytest.mark.parametrize('metodo', ['kendall', None, 123])
+def test_grafico_com_metodo_invalido_usa_pearson(snap, metodo):
+    contexto = graficos.Contexto(snap)
+    fig = matriz_correlacao.construir(contexto, filtros.TODOS, metodo)
+    assert 'Pearson' in fig.layout.title.text
@@ -0,0 +1,33 @@
+# Exportação em streaming das linhas filtradas (exportacao.py)
+
+import io
+
+import pandas as pd
+
+import exportacao
+
+
+def _ler_csv(partes):
+    return pd.read_csv(io.BytesIO(b''.join(partes)))
+
+
+def test_csv_em_blocos_igual_ao_filtro(snap):
+    csv = _ler_csv(exportacao.exportar(snap, exportacao.FORMATO_CSV, sexo=1, diagnostico=0, tamanho_bloco=100))
+    esperado = snap.df[(snap.df['sex'] == 1) & (snap.df['has_disease'] == 0)]
+    assert len(csv) == len(esperado)
+    assert csv['patient_id'].tolist() == esperado['patient_id'].tolist()
+
+
+def test_csv_sem_linhas_mantem_o_cabecalho(snap):
+    # Nenhum paciente com sexo 7: só o cabeçalho
+    partes = list(exportacao.exportar(snap, exportacao.FORMATO_CSV, sexo=7))
+    csv = _ler_csv(partes)
+    assert len(csv) == 0
+    assert list(csv.columns)[:len(snap.df.columns)] == list(snap.df.columns)
+
+
+def test_csv_sem_linhas_comprimido(snap):
+    import gzip
+
+    corpo = b''.join(exportacao.exportar(snap, exportacao.FORMATO_CSV, sexo=7, codificacao='gzip'))
+    assert gzip.decompress(corpo).startswith(b'patient_id,')
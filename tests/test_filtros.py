@@ -0,0 +1,36 @@
+# Índice de filtros (filtros.py): posições por combinação de sexo e diagnóstico
+
+import numpy as np
+import pytest
+
+import filtros
+
+
+@pytest.fixture
+def indice(snap):
+    return filtros.IndiceFiltros(snap.df)
+
+
+def test_posicoes_iguais_as_do_pandas(indice, snap):
+    df = snap.df
+    assert indice.posicoes() is None
+    np.testing.assert_array_equal(indice.posicoes(1, 0), np.flatnonzero((df['sex'] == 1) & (df['has_disease'] == 0)))
+    # Valores equivalentes vindos do navegador caem na mesma entrada
+    assert indice.posicoes('1', 0.0) is indice.posicoes(1, 0)
+
+
+@pytest.mark.parametrize('sexo', [7, 'x', -1.5, [1], {'a': 1}])
+def test_valor_desconhecido_nao_entra_no_cache(indice, sexo):
+    indice.posicoes(filtros.TODOS, 1)
+    tamanho = len(indice._posicoes)
+    posicoes = indice.posicoes(sexo, 1)
+    assert len(posicoes) == 0
+    assert indice.contagem(sexo, 1) == 0
+    assert len(indice._posicoes) == tamanho
+
+
+def test_cache_limitado_as_combinacoes_existentes(indice):
+    for sexo in [filtros.TODOS, 0, 1, 2, 3, 'a', None]:
+        for diagnostico in [filtros.TODOS, 0, 1, 5, '1', 'b']:
+            indice.posicoes(sexo, diagnostico)
+    assert len(indice._posicoes) == 3 * 3
@@ -0,0 +1,68 @@
+# Modo de gráficos no navegador (modo_cliente.py): um app iniciado no modo
+# cliente volta ao servidor quando o snapshot em uso passa do limite
+
+import json
+
+import pytest
+
+import config
+import histograma
+import modo_cliente
+import snapshot
+
+
+@pytest.fixture
+def app(snap, monkeypatch):
+    monkeypatch.setattr(config, 'MODO_GRAFICOS', 'auto')
+    monkeypatch.setattr(config, 'LIMITE_MODO_CLIENTE_MB', 5)
+    anterior = snapshot._atual
+    snapshot.publicar(snap)
+    import app as modulo_app
+    yield modulo_app.create_app()
+    snapshot._atual = anterior
+
+
+def _store(componente, id_store):
+    if getattr(componente, 'id', None) == id_store:
+        return componente
+    filhos = getattr(componente, 'children', None)
+    for filho in filhos if isinstance(filhos, list) else [filhos]:
+        if filho is not None and not isinstance(filho, str):
+            encontrado = _store(filho, id_store)
+            if encontrado is not None:
+                return encontrado
+    return None
+
+
+def test_layout_confere_o_limite_a_cada_pagina(app, monkeypatch):
+    assert app.modo_graficos == modo_cliente.MODO_CLIENTE
+    assert _store(app.layout(), 'dados-cliente').data is not None
+
+    # Snapshot "recarregado" acima do limite: a página vai sem os dados
+    monkeypatch.setattr(config, 'LIMITE_MODO_CLIENTE_MB', 0)
+    assert _store(app.layout(), 'dados-cliente').data is None
+
+
+def test_pedido_do_navegador_calcula_figuras_no_servidor(app):
+    saida = next(chave for chave in app.callback_map if 'grafico-distribuicao.figure@' in chave)
+    corpo = {
+        'output': saida,
+        'outputs': [{'id': s.split('.')[0].lstrip('.'), 'property': s.split('.')[1]}
+                    for s in saida.strip('.').split('...')],
+        'inputs': [{'id': 'pedido-graficos', 'property': 'data',
+                    'value': {'valores': ['age', 'all', histograma.REGRA_FIXA, 'kendall'], 'disparadas': None}}],
+        'changedPropIds': ['pedido-graficos.data'],
+        'state': [],
+    }
+    resposta = app.server.test_client().post('/_dash-update-component', json=corpo)
+    assert resposta.status_code == 200
+    figuras = json.loads(resposta.get_data())['response']
+    assert len(figuras) == len(modo_cliente.GRAFICOS_CLIENTE)
+
+
+def test_pedido_invalido_nao_atualiza(app):
+    import callbacks
+    from dash.exceptions import PreventUpdate
+    for pedido in [None, 'x', {'valores': 'age'}]:
+        with pytest.raises(PreventUpdate):
+            callbacks.atualizar_graficos_pedido(pedido)
@@ -0,0 +1,78 @@
+# Pontuação em lote pela rota POST /risco (risco.py)
+
+import io
+import types
+
+import flask
+import pandas as pd
+import pytest
+from werkzeug.test import EnvironBuilder, run_wsgi_app
+
+import config
+import risco
+import snapshot
+from sintetico import COLUNAS_FEATURES
+
+pytest.importorskip('sklearn')
+
+
+@pytest.fixture
+def cliente(snap, monkeypatch):
+    monkeypatch.setattr(config, 'RISCO', True)
+    monkeypatch.setattr(snapshot, '_atual', snap)
+    app = types.SimpleNamespace(server=flask.Flask(__name__))
+    risco.instalar(app)
+    return app.server.test_client()
+
+
+def _csv(snap, linhas):
+    return snap.df[list(COLUNAS_FEATURES)].head(linhas).to_csv(index=False).encode('utf-8')
+
+
+def test_csv_pontuado_em_streaming(cliente, snap):
+    resposta = cliente.post(risco.ROTA_RISCO, data=_csv(snap, len(snap.df)), content_type='text/csv')
+    assert resposta.status_code == 200
+    # Em streaming: sem Content-Length, o CSV não é montado inteiro na memória
+    assert 'Content-Length' not in resposta.headers
+    saida = pd.read_csv(io.BytesIO(resposta.get_data()))
+    assert len(saida) == len(snap.df)
+    assert saida[risco.COLUNA_RISCO].between(0, 1).all()
+
+
+def test_colunas_ausentes_400(cliente):
+    resposta = cliente.post(risco.ROTA_RISCO, data=b'a,b\n1,2\n', content_type='text/csv')
+    assert resposta.status_code == 400
+
+
+def test_upload_acima_do_limite_413(cliente, snap, monkeypatch):
+    monkeypatch.setattr(config, 'RISCO_UPLOAD_MAX_MB', 1 / 1024)
+    resposta = cliente.post(risco.ROTA_RISCO, data=_csv(snap, 200), content_type='text/csv')
+    assert resposta.status_code == 413
+
+
+def _post_chunked(cliente, **kwargs):
+    """POST sem Content-Length (Transfer-Encoding: chunked): (corpo, status)"""
+    environ = EnvironBuilder(risco.ROTA_RISCO, method='POST', **kwargs).get_environ()
+    del environ['CONTENT_LENGTH']
+    environ['wsgi.input_terminated'] = True
+    resposta, status, _ = run_wsgi_app(cliente.application, environ, buffered=True)
+    return b''.join(resposta), status
+
+
+@pytest.mark.parametrize('multipart', [False, True])
+def test_upload_chunked_acima_do_limite_413(cliente, snap, monkeypatch, multipart):
+    monkeypatch.setattr(config, 'RISCO_UPLOAD_MAX_MB', 1 / 1024)
+    corpo = _csv(snap, 200)
+    if multipart:
+        _, status = _post_chunked(cliente, data={'arquivo': (io.BytesIO(corpo), 'novos.csv')})
+    else:
+        _, status = _post_chunked(cliente, input_stream=io.BytesIO(corpo), content_type='text/csv')
+    assert status.startswith('413')
+
+
+def test_upload_chunked_no_limite_exato(cliente, snap, monkeypatch):
+    corpo = _csv(snap, 200)
+    monkeypatch.setattr(config, 'RISCO_UPLOAD_MAX_MB', len(corpo) / 1024 / 1024)
+    saida, status = _post_chunked(cliente, input_stream=io.BytesIO(corpo), content_type='text/csv')
+    assert status.startswith('200')
+    assert len(pd.read_csv(io.BytesIO(saida))) == 200
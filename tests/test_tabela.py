@@ -0,0 +1,66 @@
+# Ordenação e paginação da tabela no servidor (tabela.py), comparadas com o
+# sort_values estável do pandas sobre as mesmas colunas
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import tabela
+
+
+@pytest.fixture
+def indice(snap):
+    indice = tabela.IndiceTabela(snap)
+    # Coluna de risco conhecida, com ausentes, sem treinar o modelo
+    risco = np.random.default_rng(0).integers(0, 5, len(snap.df)).astype(np.float32) / 4
+    risco[::7] = np.nan
+    indice._coluna_risco = risco
+    return indice
+
+
+def _referencia(indice, sort_by):
+    df = pd.DataFrame({
+        item['column_id']: indice.valores(item['column_id'], np.arange(indice.total)) for item in sort_by
+    })
+    df = df.astype({c: float for c in df.columns if c in tabela.COLUNAS_NUMERICAS})
+    ordenado = df.sort_values(
+        [item['column_id'] for item in sort_by],
+        ascending=[item.get('direction') != 'desc' for item in sort_by],
+        kind='mergesort',
+        na_position='last',
+    )
+    return ordenado.index.to_numpy()
+
+
+@pytest.mark.parametrize('sort_by', [
+    [{'column_id': 'sex_label', 'direction': 'asc'}, {'column_id': 'age', 'direction': 'asc'}],
+    [{'column_id': 'sex_label', 'direction': 'asc'}, {'column_id': 'age', 'direction': 'desc'}],
+    [{'column_id': 'cp_label', 'direction': 'desc'}, {'column_id': 'chol', 'direction': 'asc'}],
+    [{'column_id': 'risco', 'direction': 'desc'}, {'column_id': 'age', 'direction': 'asc'}],
+    [{'column_id': 'age', 'direction': 'asc'}, {'column_id': 'risco', 'direction': 'desc'}],
+])
+def test_ordenacao_por_duas_colunas(indice, sort_by):
+    np.testing.assert_array_equal(indice.posicoes(sort_by=sort_by), _referencia(indice, sort_by))
+
+
+@pytest.mark.parametrize('direcao', ['asc', 'desc'])
+@pytest.mark.parametrize('coluna', ['age', 'sex_label', 'risco'])
+def test_ordenacao_por_uma_coluna_mantem_empates_e_ausentes_no_fim(indice, coluna, direcao):
+    sort_by = [{'column_id': coluna, 'direction': direcao}]
+    np.testing.assert_array_equal(indice.posicoes(sort_by=sort_by), _referencia(indice, sort_by))
+
+
+def test_ordenacao_respeita_filtro_de_diagnostico(indice, snap):
+    sort_by = [{'column_id': 'sex_label', 'direction': 'asc'}, {'column_id': 'age', 'direction': 'desc'}]
+    posicoes = indice.posicoes(1, sort_by=sort_by)
+    esperado = [p for p in _referencia(indice, sort_by) if snap.df['has_disease'].iat[p] == 1]
+    np.testing.assert_array_equal(posicoes, esperado)
+
+
+def test_consultar_pagina_e_total(indice):
+    sort_by = [{'column_id': 'age', 'direction': 'desc'}]
+    posicoes = indice.posicoes(sort_by=sort_by, filter_query='{age} >= 60')
+    registros, total = indice.consultar(pagina=1, tamanho_pagina=10, posicoes=posicoes)
+    assert total == len(posicoes)
+    assert [r['id'] for r in registros] == list(indice.valores('id', posicoes[10:20]))
+    assert all(r['age'] >= 60 for r in registros)
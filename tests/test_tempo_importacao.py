@@ -0,0 +1,15 @@
+# `import app` continua barato: nenhuma biblioteca pesada na importação
+# (o tempo em si é medido por benchmarks/tempo_importacao.py)
+
+from benchmarks import tempo_importacao
+
+
+def test_importar_app_nao_carrega_modulos_pesados():
+    _, modulos = tempo_importacao.medir('app')
+    assert 'app' in modulos
+    assert tempo_importacao.modulos_proibidos(modulos) == []
+
+
+def test_modulos_proibidos_reconhece_submodulos():
+    modulos = {'plotly.io': (0, 0), 'pandasx': (0, 0), 'config': (0, 0)}
+    assert tempo_importacao.modulos_proibidos(modulos) == ['plotly']